@@ -1,20 +1,30 @@
+import argparse
+import atexit
+import copy
+import itertools
+import json
 import math
+import os
 import random
+import struct
 import sys
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+import weakref
+import zlib
+from collections import Counter, OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
+import numpy as np
 import pygame
 from pygame import Surface, gfxdraw
 
-# Game initialization
-pygame.init()
-
 # Screen settings
 WIDTH: int = 800
 HEIGHT: int = 600
-screen: Surface = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("COSMIC DODGE")
+FULLSCREEN: bool = False
+RENDER_SCALE: float = 1.0  # Resolution the game world is drawn at, relative to WIDTH x HEIGHT
+SMOOTH_SCALING: bool = False  # Filter the world when stretching it to the screen
 
 # Color definitions
 WHITE: Tuple[int, int, int] = (255, 255, 255)
@@ -42,136 +52,1161 @@ STAR_COLORS: List[Tuple[int, int, int]] = [
     (255, 240, 200),  # Yellowish
 ]
 
-# Load sound effects
-sound_enabled: bool = False
-try:
-    pygame.mixer.init()
-    explosion_sound: pygame.mixer.Sound = pygame.mixer.Sound("explosion.wav")
-    powerup_sound: pygame.mixer.Sound = pygame.mixer.Sound("powerup.wav")
-    game_over_sound: pygame.mixer.Sound = pygame.mixer.Sound("gameover.wav")
-    # Set default volume
-    explosion_sound.set_volume(0.3)
-    powerup_sound.set_volume(0.5)
-    game_over_sound.set_volume(0.7)
-    sound_enabled = True
-except:
-    sound_enabled = False
-    print("Sound initialization failed. Game will run without sound.")
+# Subsystems are started lazily on first use (see init()), so importing
+# this module does not open a window or touch the audio device.
+screen: Optional[Surface] = None
+startup_times: Dict[str, float] = {}  # Subsystem -> seconds spent starting it
+_audio_attempted: bool = False
+_audio_lock = threading.Lock()
+# Held while creating or rendering with fonts; SDL_ttf must not be used from two threads at once
+font_lock = threading.RLock()
 
-# Particle effects
-class Particle:
-    def __init__(self, x: float, y: float, color: Tuple[int, int, int], 
-                 velocity: Optional[Tuple[float, float]] = None, 
-                 size: float = 2, life: int = 30, gravity: bool = False):
-        self.x: float = x
-        self.y: float = y
-        self.color: Tuple[int, int, int] = color
-        self.size: float = size
-        self.life: int = life
-        self.max_life: int = life
-        self.gravity: bool = gravity
-        self.vx: float = 0.0
-        self.vy: float = 0.0
-        
-        if velocity:
-            self.vx, self.vy = velocity
+
+def init_display() -> Surface:
+    """Open the game window on first call and return it."""
+    global screen
+    if screen is None:
+        start = time.perf_counter()
+        pygame.display.init()
+        # Fullscreen keeps the logical size and lets SDL stretch it, so nothing is drawn at the desktop's size
+        flags = pygame.FULLSCREEN | pygame.SCALED if FULLSCREEN else 0
+        if scheduler.vsync:
+            # SDL only offers vsync through its renderer, which SCALED windows use
+            try:
+                screen = pygame.display.set_mode((WIDTH, HEIGHT), flags | pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"Vsync unavailable ({e}); pacing frames by timer instead.")
+                scheduler.vsync = False
+        if screen is None:
+            screen = pygame.display.set_mode((WIDTH, HEIGHT), flags)
+        pygame.display.set_caption("COSMIC DODGE")
+        startup_times["display"] = time.perf_counter() - start
+    return screen
+
+
+def init_fonts() -> None:
+    if not pygame.font.get_init():
+        start = time.perf_counter()
+        pygame.font.init()
+        startup_times["fonts"] = time.perf_counter() - start
+
+
+def get_font(size: int) -> pygame.font.Font:
+    return assets.font(size)
+
+
+def init_audio() -> bool:
+    """Start the mixer and load sound effects once; return whether sound works."""
+    with _audio_lock:  # The asset preloader may be doing this on its own thread
+        return _init_audio()
+
+
+def _init_audio() -> bool:
+    global audio_engine, _audio_attempted
+    if _audio_attempted:
+        return audio_engine is not None
+    _audio_attempted = True
+    
+    start = time.perf_counter()
+    try:
+        pygame.mixer.init(AUDIO_SAMPLE_RATE, -16, 2, AUDIO_BUFFER)
+    except pygame.error as e:
+        print(f"Sound initialization failed ({e}). Game will run without sound.")
+        return False
+    finally:
+        startup_times["mixer"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    audio_engine = AudioEngine()
+    if audio_engine.synthesized:
+        print(f"Sound files missing; using synthesized {', '.join(audio_engine.synthesized)}.")
+    startup_times["sounds"] = time.perf_counter() - start
+    return True
+
+
+def init(display: bool = True, audio: bool = True) -> Dict[str, float]:
+    """Start the requested subsystems and return the startup times so far."""
+    if display:
+        init_display()
+        init_fonts()
+    if audio:
+        init_audio()
+    return startup_times
+
+
+def report_startup() -> None:
+    for name, seconds in startup_times.items():
+        print(f"{name:>9}: {seconds * 1000:7.1f} ms")
+    print(f"{'total':>9}: {sum(startup_times.values()) * 1000:7.1f} ms")
+
+
+# Asset registry
+FONT_NAME: Optional[str] = None  # System font to draw text with; None for pygame's bundled font
+FONT_SIZES: Tuple[int, ...] = (18, 24, 36, 48, 72, 100)  # Every size the game draws text at
+STATIC_TEXT: List[Tuple[int, str, Tuple[int, int, int]]] = [
+    # Font size, text, color: labels that never change, rendered ahead of time
+    (100, "COSMIC DODGE", NEON_BLUE),
+    (48, "1: Normal Mode", GREEN),
+    (48, "2: Hard Mode", RED),
+    (36, "Move mouse to avoid asteroids", WHITE),
+    (72, "GAME OVER!", RED),
+]
+
+
+class AssetRegistry:
+    """Process-wide fonts, loaded once and shared by every scene.
+    
+    A system font named by FONT_NAME is looked up only once per install:
+    the path found is saved in the cache directory and reused by later
+    launches for as long as the file is still there. ``preload`` loads the
+    fonts, the sound effects and the static text on a background thread, so
+    they are ready by the time a scene asks for them.
+    """
+    
+    def __init__(self) -> None:
+        self.fonts: Dict[int, pygame.font.Font] = {}
+        self.font_path: Optional[str] = None
+        self.font_resolved: bool = False
+        self.thread: Optional[threading.Thread] = None
+    
+    def font(self, size: int) -> pygame.font.Font:
+        font = self.fonts.get(size)
+        if font is None:
+            with font_lock:
+                font = self.fonts.get(size)
+                if font is None:
+                    init_fonts()
+                    font = self.fonts[size] = pygame.font.Font(self.resolve_font(), size)
+        return font
+    
+    def resolve_font(self) -> Optional[str]:
+        """Path of FONT_NAME's file, from the disk cache if possible; None means the bundled font."""
+        if self.font_resolved:
+            return self.font_path
+        self.font_resolved = True
+        if FONT_NAME is None:
+            return None
+        
+        start = time.perf_counter()
+        cache_file = os.path.join(cache_dir(), "fonts.json")
+        try:
+            with open(cache_file) as f:
+                paths: Dict[str, Optional[str]] = json.load(f)
+        except (OSError, ValueError):
+            paths = {}
+        path = paths.get(FONT_NAME)
+        # A font remembered as missing stays missing until the cache file is deleted
+        if FONT_NAME not in paths or (path is not None and not os.path.exists(path)):
+            path = pygame.font.match_font(FONT_NAME)  # The slow part: asks the OS for its fonts
+            if path is None:
+                print(f"Font {FONT_NAME!r} not found; using the default font.")
+            paths[FONT_NAME] = path
+            try:
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                with open(cache_file, "w") as f:
+                    json.dump(paths, f, indent=2)
+            except OSError:
+                pass
+        self.font_path = path
+        startup_times["font path"] = time.perf_counter() - start
+        return path
+    
+    def preload(self, audio: bool = True) -> None:
+        """Start loading everything in the background; returns at once."""
+        if self.thread is None:
+            init_fonts()
+            self.thread = threading.Thread(target=self._preload, args=(audio,), name="asset-preload", daemon=True)
+            self.thread.start()
+    
+    def wait(self) -> None:
+        """Block until a preload started earlier has finished."""
+        if self.thread is not None:
+            self.thread.join()
+    
+    def _preload(self, audio: bool) -> None:
+        start = time.perf_counter()
+        for size in FONT_SIZES:
+            self.font(size)
+        for size, text, color in STATIC_TEXT:
+            text_cache.render(self.font(size), text, color)
+        startup_times["preload"] = time.perf_counter() - start  # Fonts and text; audio books its own
+        if audio:
+            init_audio()
+
+
+assets = AssetRegistry()
+
+
+# Sound effects
+class SoundSpec(NamedTuple):
+    filename: str
+    volume: float
+    category: str  # Channel group it plays on, see AUDIO_CHANNELS
+    max_voices: int  # Most copies of this effect heard at once
+
+
+SOUNDS: Dict[str, SoundSpec] = {
+    # Event name: spec
+    "explosion": SoundSpec("explosion.wav", 0.3, "effects", 3),
+    "powerup": SoundSpec("powerup.wav", 0.5, "effects", 2),
+    "game_over": SoundSpec("gameover.wav", 0.7, "stingers", 1),
+}
+AUDIO_CHANNELS: Dict[str, int] = {"effects": 6, "stingers": 2}  # Channels reserved per category
+AUDIO_SAMPLE_RATE: int = 44100
+AUDIO_BUFFER: int = 512  # Mixer buffer in samples; small, so effects start promptly
+SYNTH_VERSION: int = 1  # Bumped whenever a synthesizer changes, so cached buffers are rebuilt
+
+
+def cache_dir() -> str:
+    """Per-user directory for files the game generates; COSMIC_DODGE_CACHE overrides it."""
+    override = os.environ.get("COSMIC_DODGE_CACHE")
+    if override:
+        return override
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cosmic-dodge")
+
+
+def envelope(samples: int, rate: int, attack: float, decay: float) -> np.ndarray:
+    """Linear attack, then exponential decay with time constant ``decay`` seconds."""
+    t = np.arange(samples) / rate
+    return np.minimum(1.0, t / attack) * np.exp(-t / decay)
+
+
+def synth_explosion(rate: int) -> np.ndarray:
+    # Low-passed noise burst over a falling thump
+    n = int(rate * 0.7)
+    t = np.arange(n) / rate
+    noise = np.random.default_rng(1).uniform(-1.0, 1.0, n)
+    window = max(1, rate // 2000)
+    rumble = np.convolve(noise, np.ones(window) / window, mode="same")
+    thump = np.sin(2 * np.pi * np.cumsum(np.linspace(90.0, 35.0, n)) / rate)
+    return (rumble * 1.6 + thump * 0.8) * envelope(n, rate, 0.004, 0.18) * (1.0 - t / t[-1])
+
+
+def synth_powerup(rate: int) -> np.ndarray:
+    # Rising sweep with a fifth above it
+    n = int(rate * 0.4)
+    freq = np.geomspace(440.0, 1320.0, n)
+    phase = 2 * np.pi * np.cumsum(freq) / rate
+    tone = np.sin(phase) + 0.4 * np.sin(phase * 1.5) + 0.2 * np.sign(np.sin(phase * 2))
+    return tone * envelope(n, rate, 0.01, 0.25)
+
+
+def synth_game_over(rate: int) -> np.ndarray:
+    # Three falling notes, slightly detuned against each other
+    note = int(rate * 0.35)
+    parts = []
+    for start, end in ((392.0, 370.0), (311.0, 294.0), (233.0, 196.0)):
+        freq = np.linspace(start, end, note)
+        phase = 2 * np.pi * np.cumsum(freq) / rate
+        tone = np.sin(phase) + np.sin(phase * 1.005) + 0.3 * np.sin(phase * 2)
+        parts.append(tone * envelope(note, rate, 0.01, 0.3))
+    return np.concatenate(parts)
+
+
+SYNTHS: Dict[str, Callable[[int], np.ndarray]] = {
+    "explosion": synth_explosion,
+    "powerup": synth_powerup,
+    "game_over": synth_game_over,
+}
+
+
+def synthesize(name: str, rate: int) -> np.ndarray:
+    """Render effect ``name`` as 16-bit mono PCM, reusing the copy cached on disk if there is one."""
+    path = os.path.join(cache_dir(), f"{name}-{rate}-v{SYNTH_VERSION}.npy")
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        pass
+    wave = SYNTHS[name](rate)
+    fade = min(len(wave), rate // 200)  # 5 ms fade out, so the end never clicks
+    wave[len(wave) - fade:] *= np.linspace(1.0, 0.0, fade)
+    pcm = (wave / max(1e-9, float(np.abs(wave).max())) * 0.8 * 32767).astype(np.int16)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as f:
+            np.save(f, pcm)
+        os.replace(partial, path)
+    except OSError:
+        pass  # Not cached this time; it is cheap enough to make again
+    return pcm
+
+
+class AudioEngine:
+    """Plays sound effects on channels reserved per category.
+    
+    Each effect has a voice limit; a trigger over it restarts the effect's
+    oldest voice instead of taking another channel, and a full category
+    takes over its longest-playing channel. Triggers of the same effect
+    within one frame are merged into a single, slightly louder, voice, so
+    a burst of explosions cannot flood the mixer. Effects whose file is
+    missing are synthesized instead.
+    """
+    
+    def __init__(self) -> None:
+        frequency, _, channels = pygame.mixer.get_init()
+        total = sum(AUDIO_CHANNELS.values())
+        pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)  # Keep Sound.play() off our channels
+        self.channels: Dict[str, List[pygame.mixer.Channel]] = {}
+        first = 0
+        for category, count in AUDIO_CHANNELS.items():
+            self.channels[category] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+            first += count
+        # Channels of each category, and of each effect's voices, oldest start first
+        self.started: Dict[str, List[pygame.mixer.Channel]] = {
+            category: list(channels) for category, channels in self.channels.items()
+        }
+        self.voices: Dict[str, List[pygame.mixer.Channel]] = {name: [] for name in SOUNDS}
+        self.sounds: Dict[str, pygame.mixer.Sound] = {}
+        self.synthesized: List[str] = []  # Effects whose file was missing
+        for name, spec in SOUNDS.items():
+            try:
+                sound = pygame.mixer.Sound(spec.filename)
+            except (pygame.error, FileNotFoundError):
+                pcm = synthesize(name, frequency)
+                sound = pygame.sndarray.make_sound(np.repeat(pcm[:, None], channels, axis=1) if channels > 1 else pcm)
+                self.synthesized.append(name)
+            self.sounds[name] = sound  # Played at full volume; the channel applies the effect's
+    
+    def play(self, events: List[str]) -> None:
+        """Start the effects for one frame's events."""
+        for name, count in Counter(events).items():
+            spec = SOUNDS[name]
+            channel = self._channel(name, spec)
+            channel.play(self.sounds[name])
+            # Merged triggers sound a little louder
+            channel.set_volume(min(1.0, spec.volume * (1.0 + 0.2 * (count - 1))))
+            for order in (self.started[spec.category], self.voices[name]):
+                if channel in order:
+                    order.remove(channel)
+                order.append(channel)
+    
+    def _channel(self, name: str, spec: SoundSpec) -> pygame.mixer.Channel:
+        sound = self.sounds[name]
+        # Forget voices that finished or were taken over by another effect
+        voices = self.voices[name] = [channel for channel in self.voices[name] if channel.get_sound() is sound]
+        if len(voices) >= spec.max_voices:
+            return voices[0]
+        for channel in self.channels[spec.category]:
+            if not channel.get_busy():
+                return channel
+        return self.started[spec.category][0]
+
+
+audio_engine: Optional[AudioEngine] = None
+
+# Simulation timing
+REFERENCE_FPS: int = 60  # Per-frame speeds and lifetimes are tuned for this rate
+
+
+def lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
+
+
+def per_tick_chance(chance: float, frames: float) -> float:
+    """Probability that a per-frame ``chance`` fires during ``frames`` frames."""
+    return 1.0 - (1.0 - chance) ** frames
+
+
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed simulation ticks.
+
+    Leftover time carries over in an accumulator. ``alpha`` says how far the
+    display is between the last two simulation states, for interpolation.
+    """
+
+    def __init__(self, hz: float = 60.0, max_steps: int = 5, max_frame_time: float = 0.25):
+        if hz <= 0:
+            raise ValueError(f"simulation rate must be positive, got {hz} Hz")
+        self.dt: float = 1.0 / hz
+        self.max_steps: int = max_steps  # Catch-up limit per rendered frame
+        self.max_frame_time: float = max_frame_time
+        self.accumulator: float = 0.0
+        self.dropped_time: float = 0.0  # Simulation time skipped to avoid a spiral of death
+        self.last_time: Optional[float] = None
+    
+    def advance(self, now: Optional[float] = None) -> int:
+        """Return how many ticks to simulate for the frame ending at ``now``."""
+        if now is None:
+            now = time.perf_counter()
+        if self.last_time is None:
+            self.last_time = now
+            return 0
+        frame_time = min(now - self.last_time, self.max_frame_time)
+        self.last_time = now
+        self.accumulator += frame_time
+        
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            self.dropped_time += (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.dt
         else:
-            angle: float = random.uniform(0, math.pi * 2)
-            speed: float = random.uniform(0.5, 2.0)
-            self.vx = math.cos(angle) * speed
-            self.vy = math.sin(angle) * speed
+            self.accumulator -= steps * self.dt
+        return steps
+    
+    @property
+    def alpha(self) -> float:
+        return min(1.0, self.accumulator / self.dt)
+
+
+def grow_arrays(owner: Any, names: Tuple[str, ...], count: int, capacity: int) -> None:
+    """Reallocate ``owner``'s named arrays to ``capacity``, keeping the first ``count`` items."""
+    for name in names:
+        old = getattr(owner, name)
+        grown = np.zeros(capacity, old.dtype)
+        grown[:count] = old[:count]
+        setattr(owner, name, grown)
+
+
+# Deferred drawing
+LAYER_TRAILS: int = 0  # Layers of the game world, back to front; objects use a few layers above their base
+LAYER_BALLS: int = 10
+LAYER_POWERUPS: int = 20
+LAYER_PLAYER: int = 30
+LAYER_EXPLOSIONS: int = 40
+
+
+class DrawList:
+    """One frame's draw commands, recorded first and executed together.
+    
+    Every command names a layer. ``flush`` sorts by (layer, primitive,
+    color), so stacking between layers is kept while commands of the same
+    kind end up next to each other, and a backend can run them as batches:
+    PygameBackend sends each run of sprites in one ``blits`` call. Sprites
+    keep their recording order, so overlapping ones never swap places.
+    Commands that would land entirely outside ``viewport`` are dropped as
+    they are recorded and counted in ``culled``. Callers always work in
+    logical coordinates; a list with another ``scale`` converts positions,
+    sizes and sprites to the target's pixels as it records them.
+    """
+    
+    SPRITE, CIRCLE, LINE, BATCH = range(4)  # Primitives, in their order within a layer
+    
+    def __init__(self, viewport: Tuple[int, int, int, int] = (0, 0, WIDTH, HEIGHT), scale: float = 1.0):
+        self.viewport = pygame.Rect(viewport)  # Logical coordinates
+        self.scale: float = scale  # Target pixels per logical pixel
+        self.commands: List[Tuple[Any, ...]] = []
+        self.culled: int = 0
+    
+    def __len__(self) -> int:
+        return len(self.commands)
+    
+    def visible(self, left: float, top: float, right: float, bottom: float) -> bool:
+        viewport = self.viewport
+        if right < viewport.left or left >= viewport.right or bottom < viewport.top or top >= viewport.bottom:
+            self.culled += 1
+            return False
+        return True
+    
+    def sprite(self, layer: int, sprite: Surface, x: float, y: float) -> None:
+        """Blit ``sprite`` centered on (x, y)."""
+        width, height = sprite.get_size()
+        left = int(x) - width // 2
+        top = int(y) - height // 2
+        if not self.visible(left, top, left + width, top + height):
+            return
+        scale = self.scale
+        if scale != 1.0:
+            sprite = scaled_sprite(sprite, scale)
+            left = int(x * scale) - sprite.get_width() // 2
+            top = int(y * scale) - sprite.get_height() // 2
+        self.commands.append((layer, self.SPRITE, 0, sprite, (left, top)))
+    
+    def circle(self, layer: int, color: Tuple[int, int, int], center: Tuple[int, int], radius: int,
+               width: int = 0) -> None:
+        x, y = center
+        if not self.visible(x - radius, y - radius, x + radius, y + radius):
+            return
+        scale = self.scale
+        if scale != 1.0:
+            center = (int(x * scale), int(y * scale))
+            radius = max(1, round(radius * scale))
+            width = width and max(1, round(width * scale))  # 0 still means filled
+        self.commands.append((layer, self.CIRCLE, color, center, radius, width))
+    
+    def line(self, layer: int, color: Tuple[int, int, int], start: Tuple[float, float], end: Tuple[float, float],
+             width: int = 1) -> None:
+        if not self.visible(min(start[0], end[0]) - width, min(start[1], end[1]) - width,
+                            max(start[0], end[0]) + width, max(start[1], end[1]) + width):
+            return
+        scale = self.scale
+        if scale != 1.0:
+            start = (start[0] * scale, start[1] * scale)
+            end = (end[0] * scale, end[1] * scale)
+            width = max(1, round(width * scale))
+        self.commands.append((layer, self.LINE, color, start, end, width))
+    
+    def batch(self, layer: int, blits: List[Tuple[Any, ...]], flags: int = 0) -> None:
+        """Many sprites at once, as ``Surface.blits`` sequences; the caller culls them."""
+        if blits:
+            self.commands.append((layer, self.BATCH, flags, blits))
+    
+    def flush(self, backend: "RenderBackend") -> None:
+        """Sort, execute on ``backend`` and start a new frame."""
+        self.commands.sort(key=lambda command: command[:3])  # Stable, so ties keep their recording order
+        backend.execute(self.commands)
+        self.commands = []
+
+
+class RenderBackend:
+    """Executes the sorted commands of a DrawList."""
+    
+    def execute(self, commands: List[Tuple[Any, ...]]) -> None:
+        raise NotImplementedError
+
+
+class PygameBackend(RenderBackend):
+    """Draws onto a pygame Surface."""
+    
+    def __init__(self, surface: Surface):
+        self.surface = surface
+    
+    def execute(self, commands: List[Tuple[Any, ...]]) -> None:
+        surface = self.surface
+        circle = pygame.draw.circle
+        line = pygame.draw.line
+        sprites: List[Tuple[Surface, Tuple[int, int]]] = []
+        for command in commands:
+            primitive = command[1]
+            if primitive == DrawList.SPRITE:
+                sprites.append((command[3], command[4]))
+                continue
+            if sprites:
+                surface.blits(sprites, doreturn=False)
+                sprites = []
+            if primitive == DrawList.CIRCLE:
+                circle(surface, command[2], command[3], command[4], command[5])
+            elif primitive == DrawList.LINE:
+                line(surface, command[2], command[3], command[4], command[5])
+            else:
+                surface.blits(command[3], doreturn=False)
+        if sprites:
+            surface.blits(sprites, doreturn=False)
+
+
+class NullBackend(RenderBackend):
+    """Draws nothing, only counting what it is given, to time everything but rasterization."""
+    
+    def __init__(self) -> None:
+        self.commands: Counter = Counter()  # Primitive name -> commands executed
+        self.sprites: int = 0  # Sprites blitted, including those inside batches
+        self.frames: int = 0
+    
+    def execute(self, commands: List[Tuple[Any, ...]]) -> None:
+        names = ("sprite", "circle", "line", "batch")
+        for command in commands:
+            primitive = command[1]
+            self.commands[names[primitive]] += 1
+            if primitive == DrawList.SPRITE:
+                self.sprites += 1
+            elif primitive == DrawList.BATCH:
+                self.sprites += len(command[3])
+        self.frames += 1
+
+
+# Particle effects
+FADE_LEVELS: int = 16  # Fade steps baked into glow sprites
+GLOW_RADIUS_STEP: float = 0.5  # Glow sprites are baked at multiples of this radius
+GLOW_MAX_RADIUS: float = 12.0
+GLOW_HALO: int = 2  # Soft edge beyond a particle's radius, in pixels
+
+
+class ParticleSystem:
+    """Array-backed particle pool.
+
+    Live particles occupy the first ``count`` slots of each array. Dead
+    particles are compacted away by moving live ones from the tail into
+    their slots, so a whole frame is a handful of vectorized operations.
+    Drawing blits pre-rendered glow sprites, one per (color, fade level,
+    radius), in a single ``Surface.blits`` call; ``additive`` particles
+    add their light to what is underneath instead of covering it.
+    """
+
+    ARRAYS: Tuple[str, ...] = ("x", "y", "vx", "vy", "ay", "life", "max_life", "size", "color")
+
+    def __init__(self, capacity: int = 1024, rng: Optional[np.random.Generator] = None, additive: bool = False):
+        self.capacity: int = capacity
+        self.count: int = 0
+        self.rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
+        self.emission: float = 1.0  # Scale emitters apply to their spawn chances and counts
+        self.limit: Optional[int] = None  # Hard cap on live particles; emits over it are dropped
+        self.additive: bool = additive
+        self.x: np.ndarray = np.zeros(capacity, np.float32)
+        self.y: np.ndarray = np.zeros(capacity, np.float32)
+        self.vx: np.ndarray = np.zeros(capacity, np.float32)
+        self.vy: np.ndarray = np.zeros(capacity, np.float32)
+        self.ay: np.ndarray = np.zeros(capacity, np.float32)  # Gravity
+        self.life: np.ndarray = np.zeros(capacity, np.float32)
+        self.max_life: np.ndarray = np.ones(capacity, np.float32)
+        self.size: np.ndarray = np.zeros(capacity, np.float32)
+        self.color: np.ndarray = np.zeros(capacity, np.int16)  # Index into colors
+        self.palette: Dict[Tuple[int, int, int], int] = {}  # Base color -> index
+        self.colors: List[Tuple[int, int, int]] = []
+
+    def _color_index(self, color: Tuple[int, int, int]) -> int:
+        index = self.palette.get(color)
+        if index is None:
+            index = len(self.colors)
+            self.palette[color] = index
+            self.colors.append(color)
+        return index
+
+    def _reserve(self, n: int) -> None:
+        needed = self.count + n
+        if needed <= self.capacity:
+            return
+        self.capacity = max(self.capacity * 2, needed)
+        grow_arrays(self, self.ARRAYS, self.count, self.capacity)
+
+    def emit(self, x: Any, y: Any, color: Tuple[int, int, int],
+             vx: Any, vy: Any, size: Any, life: Any, gravity: bool = False) -> None:
+        """Add particles; every numeric argument may be a scalar or an array."""
+        total = np.broadcast(x, y, vx, vy, size, life).size
+        n = total if self.limit is None else min(total, self.limit - self.count)
+        if n <= 0:
+            return
+        if n < total:
+            # Over the cap: keep only the first n
+            x, y, vx, vy, size, life = [np.broadcast_to(value, (total,))[:n] for value in (x, y, vx, vy, size, life)]
+        self._reserve(n)
+        start, end = self.count, self.count + n
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = vx
+        self.vy[start:end] = vy
+        self.ay[start:end] = 0.1 if gravity else 0.0
+        self.life[start:end] = life
+        self.max_life[start:end] = life
+        self.size[start:end] = size
+        self.color[start:end] = self._color_index(color)
+        self.count = end
+
+    def emit_drift(self, x: Any, y: Any, color: Tuple[int, int, int],
+                   size_range: Tuple[float, float], life_range: Tuple[int, int],
+                   count: int = 1) -> None:
+        """Add slow particles drifting in random directions."""
+        angle = self.rng.uniform(0, math.pi * 2, count)
+        speed = self.rng.uniform(0.5, 2.0, count)
+        self.emit(x, y, color, np.cos(angle) * speed, np.sin(angle) * speed,
+                  self.rng.uniform(size_range[0], size_range[1], count),
+                  self.rng.integers(life_range[0], life_range[1], count, endpoint=True))
+
+    def update(self, dt: float = 1.0) -> None:
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+        self.vy[:n] += self.ay[:n] * dt
+        self.life[:n] -= dt
+
+        dead = np.flatnonzero(self.life[:n] <= 0)
+        if dead.size == 0:
+            return
+
+        # Swap-and-truncate: fill holes below the new count with the
+        # survivors sitting above it, then drop the tail.
+        alive_count = n - dead.size
+        holes = dead[dead < alive_count]
+        if holes.size:
+            tail = np.arange(alive_count, n)
+            survivors = tail[self.life[alive_count:n] > 0]
+            for name in self.ARRAYS:
+                arr = getattr(self, name)
+                arr[holes] = arr[survivors]
+        self.count = alive_count
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def snapshot(self) -> "ParticleSystem":
+        """A copy of the live particles for drawing elsewhere; emitting into it is not supported."""
+        snapshot = copy.copy(self)
+        for name in self.ARRAYS:
+            setattr(snapshot, name, getattr(self, name)[:self.count].copy())
+        snapshot.capacity = self.count
+        snapshot.colors = list(self.colors)  # Grows as new colors are emitted
+        return snapshot
+
+    def extents(self, lag: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Centers and drawn radius of every live particle, as ``draw`` places them."""
+        n = self.count
+        radius = np.minimum(self.size[:n], GLOW_MAX_RADIUS) + GLOW_HALO + 1
+        return self.x[:n] - self.vx[:n] * lag, self.y[:n] - self.vy[:n] * lag, radius
     
-    def update(self) -> None:
-        self.x += self.vx
-        self.y += self.vy
+    def draw(self, commands: DrawList, layer: int, lag: float = 0.0, antialias: bool = True) -> None:
+        """Record every visible particle, ``lag`` frames back along its velocity, as one batch.
         
-        if self.gravity:
-            self.vy += 0.1  # Gravity effect
-            
-        self.life -= 1
+        Without ``antialias`` the sprites are hard-edged discs with no halo.
+        """
+        n = self.count
+        if n == 0:
+            return
+        # Sprites are centered on the particle, with the halo around the radius
+        steps = np.clip(np.rint(self.size[:n] / GLOW_RADIUS_STEP), 1,
+                        GLOW_MAX_RADIUS / GLOW_RADIUS_STEP).astype(np.int32)
+        offsets = (steps * GLOW_RADIUS_STEP).astype(np.int32) + GLOW_HALO
+        xs = self.x[:n] - self.vx[:n] * lag
+        ys = self.y[:n] - self.vy[:n] * lag
+        viewport = commands.viewport
+        visible = np.flatnonzero((xs + offsets >= viewport.left) & (xs - offsets < viewport.right) &
+                                 (ys + offsets >= viewport.top) & (ys - offsets < viewport.bottom))
+        commands.culled += n - visible.size
+        if visible.size == 0:
+            return
         
-        # Fade out based on remaining life
-        fade_factor: float = self.life / self.max_life
-        r: int = min(255, int(self.color[0] * fade_factor))
-        g: int = min(255, int(self.color[1] * fade_factor))
-        b: int = min(255, int(self.color[2] * fade_factor))
-        self.color = (r, g, b)
+        # One sprite per (color, fade level, radius step); particles fade out as they age
+        fraction = self.life[visible] / self.max_life[visible]
+        levels = np.clip(np.ceil(fraction * FADE_LEVELS), 1, FADE_LEVELS).astype(np.int32)
+        keys = (self.color[visible].astype(np.int32) * (FADE_LEVELS + 1) + levels) * 256 + steps[visible]
+        unique, inverse = np.unique(keys, return_inverse=True)
+        scale = commands.scale
+        sprites = [self._glow_sprite(int(key), antialias, scale) for key in unique.tolist()]
+        
+        # Positions in the target's pixels; the halo stays GLOW_HALO pixels wide at any scale
+        if scale != 1.0:
+            offsets = (steps * (GLOW_RADIUS_STEP * scale)).astype(np.int32) + GLOW_HALO
+        picked = inverse.ravel().tolist()
+        sources = map(sprites.__getitem__, picked)
+        positions = zip(((xs[visible] * scale).astype(np.int32) - offsets[visible]).tolist(),
+                        ((ys[visible] * scale).astype(np.int32) - offsets[visible]).tolist())
+        if self.additive:
+            areas = [sprite.get_rect() for sprite in sprites]
+            commands.batch(layer, list(zip(sources, positions, map(areas.__getitem__, picked),
+                                           itertools.repeat(pygame.BLEND_RGB_ADD))), pygame.BLEND_RGB_ADD)
+        else:
+            commands.batch(layer, list(zip(sources, positions)))
     
-    def draw(self, surface: Surface) -> None:
-        alpha: int = int(255 * (self.life / self.max_life))
-        if self.size <= 1:
-            pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), int(self.size))
+    def _glow_sprite(self, key: int, antialias: bool, scale: float = 1.0) -> Surface:
+        color_index, rest = divmod(key, (FADE_LEVELS + 1) * 256)
+        level, step = divmod(rest, 256)
+        color = self.colors[color_index]
+        return glow_atlas.get(("glow", color, level, step, antialias, self.additive, scale),
+                              lambda: bake_glow(color, step * GLOW_RADIUS_STEP * scale, level / FADE_LEVELS,
+                                                antialias, self.additive))
+
+# Pre-rendered sprites
+ROTATION_STEPS: int = 32  # Rotating sprites are baked at this many angles
+
+
+def rotation_bucket(angle: float) -> int:
+    return int(round(angle / (2 * math.pi) * ROTATION_STEPS)) % ROTATION_STEPS
+
+
+def bucket_angle(bucket: int) -> float:
+    return bucket * (2 * math.pi / ROTATION_STEPS)
+
+
+SPRITE_KEY: Tuple[int, int, int] = (255, 0, 255)  # Transparent color of baked sprites
+
+
+def new_sprite(size: int) -> Surface:
+    """Blank square sprite in the display format, transparent through a color key.
+
+    The shapes drawn into sprites are not anti-aliased, so a color key
+    loses nothing against per-pixel alpha and blits faster.
+    """
+    display = pygame.display.get_surface() if pygame.display.get_init() else None
+    if display is not None:
+        sprite = pygame.Surface((size, size), 0, display)
+    else:
+        sprite = pygame.Surface((size, size))
+    sprite.fill(SPRITE_KEY)
+    sprite.set_colorkey(SPRITE_KEY)
+    return sprite
+
+
+class SpriteAtlas:
+    """Least-recently-used cache of baked sprites.
+
+    Vector shapes are drawn once per (shape, quantized angle) and blitted
+    from then on. Once the cached pixels exceed ``max_pixels``, sprites
+    that have gone unused longest (such as angles of shapes no longer on
+    screen) are evicted.
+    """
+
+    def __init__(self, max_pixels: int = 16_000_000):
+        self.max_pixels: int = max_pixels
+        self.pixels: int = 0
+        self.sprites: "OrderedDict[Hashable, Surface]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+    
+    def lookup(self, key: Hashable) -> Optional[Surface]:
+        """Return the sprite stored under ``key`` and mark it recently used, or None."""
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+        return sprite
+    
+    def store(self, key: Hashable, sprite: Surface) -> Surface:
+        self.misses += 1
+        self.sprites[key] = sprite
+        self.pixels += sprite.get_width() * sprite.get_height()
+        while self.pixels > self.max_pixels and len(self.sprites) > 1:
+            _, evicted = self.sprites.popitem(last=False)
+            self.pixels -= evicted.get_width() * evicted.get_height()
+        return sprite
+    
+    def get(self, key: Hashable, bake: Callable[[], Surface]) -> Surface:
+        """Return the sprite stored under ``key``, calling ``bake`` to make it if missing."""
+        sprite = self.lookup(key)
+        if sprite is None:
+            sprite = self.store(key, bake())
+        return sprite
+    
+    def clear(self) -> None:
+        self.sprites.clear()
+        self.pixels = 0
+
+
+sprite_atlas = SpriteAtlas()
+glow_atlas = SpriteAtlas(max_pixels=2_000_000)  # Particle sprites, kept apart so they never evict ships
+# Copies of atlas sprites for drawing at another render scale; they go when the original is evicted
+_scaled_sprites: "weakref.WeakKeyDictionary[Surface, Dict[float, Surface]]" = weakref.WeakKeyDictionary()
+
+
+def scaled_sprite(sprite: Surface, scale: float) -> Surface:
+    """``sprite`` resized by ``scale``, made once and reused while the original is alive.
+    
+    Color-keyed sprites are scaled without filtering, so the key color
+    never bleeds into their edges.
+    """
+    copies = _scaled_sprites.get(sprite)
+    if copies is None:
+        copies = _scaled_sprites[sprite] = {}
+    resized = copies.get(scale)
+    if resized is None:
+        width, height = sprite.get_size()
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        colorkey = sprite.get_colorkey()
+        if colorkey is None:
+            resized = pygame.transform.smoothscale(sprite, size)
         else:
-            # Use anti-aliased circle for smoother particles
-            gfxdraw.aacircle(surface, int(self.x), int(self.y), int(self.size), self.color)
-            gfxdraw.filled_circle(surface, int(self.x), int(self.y), int(self.size), self.color)
-
-# Star class for background
-class Star:
-    def __init__(self):
-        self.x: float = float(random.randint(0, WIDTH))
-        self.y: float = float(random.randint(0, HEIGHT))
-        self.size: int = random.choice([1, 1, 1, 2, 2, 3])  # Mostly small stars
-        self.color: Tuple[int, int, int] = random.choice(STAR_COLORS)
-        self.speed: float = self.size * 0.2  # Larger stars move faster (parallax effect)
-        self.twinkle_speed: float = random.uniform(0.01, 0.05)
-        self.brightness: float = random.uniform(0.5, 1.0)
-        self.max_brightness: float = random.uniform(0.8, 1.0)
-        self.min_brightness: float = random.uniform(0.3, 0.6)
-        self.brightening: bool = True
-    
-    def update(self) -> None:
-        # Move star down to create scrolling effect
-        self.y += self.speed
-        
-        # Reset position if off screen
-        if self.y > HEIGHT:
-            self.y = 0
-            self.x = float(random.randint(0, WIDTH))
-        
-        # Twinkle effect
-        if self.brightening:
-            self.brightness += self.twinkle_speed
-            if self.brightness >= self.max_brightness:
-                self.brightening = False
+            resized = pygame.transform.scale(sprite, size)
+            resized.set_colorkey(colorkey)
+        copies[scale] = resized
+    return resized
+
+
+def bake_glow(color: Tuple[int, int, int], radius: float, fade: float, antialias: bool = True,
+              additive: bool = False) -> Surface:
+    """Particle sprite: a disc of ``radius`` with a soft halo, at ``fade`` opacity.
+    
+    Additive sprites are opaque with the light premultiplied into the
+    color, for BLEND_RGB_ADD. Without ``antialias`` the disc is hard-edged,
+    and unless additive it is a color-keyed sprite darkened by ``fade``, the
+    cheapest thing to blit. Otherwise sprites carry per-pixel alpha.
+    """
+    half = int(radius) + GLOW_HALO
+    size = half * 2 + 1
+    offsets = np.arange(size, dtype=np.float32) - half
+    distance = np.hypot(offsets[:, None], offsets[None, :])
+    strength: np.ndarray
+    if antialias:
+        coverage = np.clip(radius + 0.5 - distance, 0.0, 1.0)
+        halo = np.clip(1.0 - (distance - radius) / (GLOW_HALO + 0.5), 0.0, 1.0) ** 2 * 0.35
+        strength = np.maximum(coverage, halo) * fade
+    else:
+        strength = (distance <= radius + 0.25).astype(np.float32) * fade
+        if not additive:
+            sprite = new_sprite(size)
+            shade = tuple(int(channel * fade) for channel in color)
+            pygame.draw.circle(sprite, shade, (half, half), max(1, int(radius + 0.25)))
+            return sprite
+    if additive:
+        sprite = pygame.Surface((size, size))
+        rgb = pygame.surfarray.pixels3d(sprite)
+        rgb[...] = (strength[:, :, None] * np.array(color, np.float32)).astype(np.uint8)
+        del rgb
+        return sprite.convert() if pygame.display.get_surface() is not None else sprite
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    sprite.fill(color)
+    alpha = pygame.surfarray.pixels_alpha(sprite)
+    alpha[...] = (strength * 255).astype(np.uint8)
+    del alpha
+    return sprite.convert_alpha() if pygame.display.get_surface() is not None else sprite
+
+
+# Rendered text
+SCALE_STEP: float = 0.02  # Pulsing text is pre-scaled at multiples of this
+
+
+class TextCache:
+    """Least-recently-used cache of rendered, optionally scaled, text surfaces.
+
+    Keyed by (font, string, color, quantized scale), so a label is only
+    rendered again when one of those actually changes.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries: int = max_entries
+        self.surfaces: "OrderedDict[Tuple[Any, ...], Surface]" = OrderedDict()
+    
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int],
+               scale: float = 1.0) -> Surface:
+        with font_lock:
+            return self._render(font, text, color, scale)
+    
+    def _render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int], scale: float) -> Surface:
+        step = int(round(scale / SCALE_STEP))
+        key = (font, text, color, step)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        if step == int(round(1.0 / SCALE_STEP)):
+            surface = font.render(text, True, color)
         else:
-            self.brightness -= self.twinkle_speed
-            if self.brightness <= self.min_brightness:
-                self.brightening = True
+            base = self._render(font, text, color, 1.0)
+            scale = step * SCALE_STEP
+            surface = pygame.transform.scale(
+                base, (int(base.get_width() * scale), int(base.get_height() * scale))
+            )
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+text_cache = TextCache()
+
+
+# Dirty-rectangle rendering
+DIRTY_TILE: int = 32  # Side of the square screen tiles that redraws are tracked in
+
+
+class DirtyRegions:
+    """Screen tiles that are drawn over this frame or were drawn over last frame.
+
+    Each frame, mark the bounds of everything about to be drawn, ``restore``
+    the background under both frames' tiles, draw as usual and ``flush``
+    only those tiles to the display. Runs of adjacent tiles are merged so
+    the rect list stays short.
+    """
     
-    def draw(self, surface: Surface) -> None:
-        # Apply brightness to color
-        r: int = min(255, int(self.color[0] * self.brightness))
-        g: int = min(255, int(self.color[1] * self.brightness))
-        b: int = min(255, int(self.color[2] * self.brightness))
-        color: Tuple[int, int, int] = (r, g, b)
-        
-        if self.size == 1:
-            surface.set_at((int(self.x), int(self.y)), color)
+    def __init__(self, background: Surface, tile: int = DIRTY_TILE):
+        self.background: Surface = background
+        self.tile: int = tile
+        self.width, self.height = background.get_size()
+        self.cols: int = -(-self.width // tile)
+        self.rows: int = -(-self.height // tile)
+        self.previous: np.ndarray = np.ones((self.rows, self.cols), dtype=bool)  # First frame redraws everything
+        self.current: np.ndarray = np.zeros((self.rows, self.cols), dtype=bool)
+        self.rects: List[pygame.Rect] = []  # Regions restored this frame
+    
+    def mark(self, rect: Any) -> None:
+        x, y, w, h = rect
+        if w <= 0 or h <= 0:
+            return
+        t = self.tile
+        self.current[max(0, y // t):max(0, (y + h - 1) // t + 1),
+                     max(0, x // t):max(0, (x + w - 1) // t + 1)] = True
+    
+    def mark_all(self) -> None:
+        self.current[:] = True
+    
+    def mark_circles(self, xs: np.ndarray, ys: np.ndarray, radii: np.ndarray) -> None:
+        """Mark the bounding boxes of many circles at once."""
+        visible = ((xs + radii >= 0) & (xs - radii < self.width) &
+                   (ys + radii >= 0) & (ys - radii < self.height))
+        if not visible.any():
+            return
+        xs, ys, radii = xs[visible], ys[visible], radii[visible]
+        t = self.tile
+        x0 = np.clip((xs - radii) // t, 0, self.cols - 1).astype(np.intp)
+        x1 = np.clip((xs + radii) // t, 0, self.cols - 1).astype(np.intp)
+        y0 = np.clip((ys - radii) // t, 0, self.rows - 1).astype(np.intp)
+        y1 = np.clip((ys + radii) // t, 0, self.rows - 1).astype(np.intp)
+        # Circles span only a tile or two, so loop over the span instead of the circles
+        for dy in range(int((y1 - y0).max()) + 1):
+            rows = np.minimum(y0 + dy, y1)
+            for dx in range(int((x1 - x0).max()) + 1):
+                self.current[rows, np.minimum(x0 + dx, x1)] = True
+    
+    def restore(self, surface: Surface) -> None:
+        """Put the background back under every tile drawn last frame or about to be drawn."""
+        self.rects = self._merge(self.previous | self.current)
+        background = self.background
+        for rect in self.rects:
+            surface.blit(background, rect, rect)
+    
+    def flush(self) -> None:
+        pygame.display.update(self.rects)
+        self.previous, self.current = self.current, self.previous
+        self.current[:] = False
+    
+    def _merge(self, tiles: np.ndarray) -> List[pygame.Rect]:
+        t = self.tile
+        padded = np.zeros((self.rows, self.cols + 2), dtype=np.int8)
+        padded[:, 1:-1] = tiles
+        edges = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        
+        # Horizontal runs that line up with the run in the row above extend it downwards
+        rects: List[pygame.Rect] = []
+        open_runs: Dict[Tuple[int, int], pygame.Rect] = {}
+        for row, start, end in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+            rect = open_runs.get((start, end))
+            if rect is not None and rect.bottom == row * t:
+                rect.height += t
+            else:
+                rect = pygame.Rect(start * t, row * t, (end - start) * t, t)
+                open_runs[(start, end)] = rect
+                rects.append(rect)
+        return rects
+
+
+# Scrolling star background
+class Starfield:
+    """Parallax star background built from pre-rendered, vertically tiling layers.
+
+    Every depth is drawn once per twinkle frame into an RLE-accelerated
+    color-keyed surface. A frame is two wrapped blits per depth no matter
+    how many stars there are. Twinkling cycles each star through
+    TWINKLE_PALETTE, starting at a random phase. Scrolling is kept in
+    logical pixels; drawing onto a surface of another size than the
+    starfield's uses layers baked for that scale, so scenes drawn at
+    different resolutions share one scroll position.
+    """
+    
+    # (star size, scroll speed in px per reference frame, share of all stars)
+    DEPTHS: Tuple[Tuple[int, float, float], ...] = ((1, 0.2, 1 / 2), (2, 0.4, 1 / 3), (3, 0.6, 1 / 6))
+    TWINKLE_PALETTE: Tuple[float, ...] = (0.5, 0.75, 1.0, 0.75)  # Brightness levels
+    TWINKLE_STEP: float = 6.0  # Reference frames between twinkle frames
+    
+    def __init__(self, star_count: int = 100, width: int = WIDTH, height: int = HEIGHT,
+                 seed: Optional[int] = None):
+        rng = random.Random(seed)
+        self.width: int = width
+        self.height: int = height
+        self.offsets: List[float] = [0.0] * len(self.DEPTHS)  # Scroll position of each depth
+        self.twinkle_clock: float = 0.0
+        levels = len(self.TWINKLE_PALETTE)
+        self.stars: List[List[Tuple[float, float, int, int]]] = [  # [depth] -> (x, y, color, phase)
+            [(rng.uniform(0, width), rng.uniform(0, height),
+              rng.randrange(len(STAR_COLORS)), rng.randrange(levels))
+             for _ in range(round(star_count * share))]
+            for _, _, share in self.DEPTHS]
+        self.scaled_layers: Dict[float, List[List[Surface]]] = {}  # Scale -> [depth][twinkle frame]
+        self._bake(1.0)  # Menus always draw at the logical size, so that one is baked up front
+    
+    def _bake(self, scale: float) -> List[List[Surface]]:
+        width, height = round(self.width * scale), round(self.height * scale)
+        # Every star color at every palette brightness
+        shades = [[(int(r * b), int(g * b), int(bl * b)) for b in self.TWINKLE_PALETTE]
+                  for r, g, bl in STAR_COLORS]
+        levels = len(self.TWINKLE_PALETTE)
+        
+        layers: List[List[Surface]] = []
+        for (star_size, _, _), stars in zip(self.DEPTHS, self.stars):
+            size = max(1, round(star_size * scale))
+            frames: List[Surface] = []
+            for frame in range(levels):
+                layer = self._new_layer(width, height)
+                for x, y, color, phase in stars:
+                    shade = shades[color][(phase + frame) % levels]
+                    x, y = x * scale, y * scale
+                    # Stars straddling the seam are drawn on both edges so the tile wraps cleanly
+                    for wrapped_y in (y, y - height, y + height):
+                        if -size <= wrapped_y <= height + size:
+                            if size == 1:
+                                layer.set_at((int(x), int(wrapped_y)), shade)
+                            else:
+                                pygame.draw.circle(layer, shade, (int(x), int(wrapped_y)), size)
+                layer.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+                frames.append(layer)
+            layers.append(frames)
+        self.scaled_layers[scale] = layers
+        return layers
+    
+    def _new_layer(self, width: int, height: int) -> Surface:
+        display = pygame.display.get_surface() if pygame.display.get_init() else None
+        if display is not None:
+            layer = pygame.Surface((width, height), 0, display)
         else:
-            pygame.draw.circle(surface, color, (int(self.x), int(self.y)), self.size)
+            layer = pygame.Surface((width, height))
+        layer.fill(SPRITE_KEY)
+        return layer
+    
+    def update(self, frames: float = 1.0) -> None:
+        # Move stars down to create scrolling effect
+        for i, (_, speed, _) in enumerate(self.DEPTHS):
+            self.offsets[i] = (self.offsets[i] + speed * frames) % self.height
+        self.twinkle_clock += frames
+    
+    def draw(self, surface: Surface, depths: Optional[int] = None) -> None:
+        """Draw the nearest ``depths`` layers, or all of them, scaled to fit ``surface``'s width."""
+        scale = surface.get_width() / self.width
+        layers = self.scaled_layers.get(scale) or self._bake(scale)
+        height = layers[0][0].get_height()
+        frame = int(self.twinkle_clock / self.TWINKLE_STEP) % len(self.TWINKLE_PALETTE)
+        skip = 0 if depths is None else max(0, len(layers) - depths)
+        for frames, offset in zip(layers[skip:], self.offsets[skip:]):
+            layer = frames[frame]
+            y = int(offset * scale)
+            surface.blit(layer, (0, y))
+            surface.blit(layer, (0, y - height))
+
+
+# One starfield is shared by the menu and the game so it scrolls on across scenes
+STAR_COUNT: int = 100
+_starfield: Optional[Starfield] = None
+
+
+def get_starfield() -> Starfield:
+    global _starfield
+    if _starfield is None:
+        _starfield = Starfield(STAR_COUNT)
+    return _starfield
+
+
+def make_background(starfield: Starfield) -> Surface:
+    """Snapshot of the star background, for dirty-rect mode where the stars hold still."""
+    background = pygame.Surface((WIDTH, HEIGHT), 0, init_display())
+    background.fill(BG_COLOR)
+    starfield.draw(background)
+    return background
+
 
 # Player class
 class Player:
-    def __init__(self, x: float, y: float):
+    def __init__(self, x: float, y: float, rng: Optional[random.Random] = None):
         self.x: float = x
         self.y: float = y
+        self.prev_x: float = x  # Position at the previous simulation tick
+        self.prev_y: float = y
         self.radius: int = 15
         self.color: Tuple[int, int, int] = WHITE
         self.trail: List[Tuple[float, float]] = []
         self.max_trail: int = 10
         self.angle: float = 0.0  # For ship rotation
-        self.thruster_particles: List[Particle] = []
         self.shield_angle: float = 0.0
-        self.engine_flicker: int = 0
+        self.engine_flicker: float = 0.0
+        self.rng: random.Random = rng if rng is not None else random.Random()  # Gameplay randomness only
+    
+    def snapshot(self) -> "Player":
+        snapshot = copy.copy(self)
+        snapshot.trail = list(self.trail)
+        return snapshot
     
-    def update(self, target_x: float, target_y: float, speed_boost: bool = False) -> None:
+    def update(self, target_x: float, target_y: float, particles: ParticleSystem,
+               speed_boost: bool = False, frames: float = 1.0) -> None:
+        self.prev_x, self.prev_y = self.x, self.y
+        rng = self.rng
+        
         # Calculate direction to mouse
         dx: float = target_x - self.x
         dy: float = target_y - self.y
         
         # Smooth movement with optional speed boost
-        move_speed: float = 0.3 if speed_boost else 0.2
+        move_speed: float = per_tick_chance(0.3 if speed_boost else 0.2, frames)
         self.x += dx * move_speed
         self.y += dy * move_speed
         
@@ -187,304 +1222,461 @@ class Player:
             self.trail.pop(0)
         
         # Create thruster particles
-        if random.random() < (0.5 if speed_boost else 0.3):  # More particles when boosting
+        # More particles when boosting
+        if rng.random() < per_tick_chance((0.5 if speed_boost else 0.3) * particles.emission, frames):
             # Calculate thruster position (back of the ship)
             thruster_x: float = self.x - math.cos(self.angle) * self.radius
             thruster_y: float = self.y - math.sin(self.angle) * self.radius
             
             # Add some randomness to thruster position
-            thruster_x += random.uniform(-3, 3)
-            thruster_y += random.uniform(-3, 3)
+            thruster_x += rng.uniform(-3, 3)
+            thruster_y += rng.uniform(-3, 3)
             
             # Create particle with velocity opposite to ship direction
-            vel_x: float = -math.cos(self.angle) * random.uniform(1, 3)
-            vel_y: float = -math.sin(self.angle) * random.uniform(1, 3)
+            vel_x: float = -math.cos(self.angle) * rng.uniform(1, 3)
+            vel_y: float = -math.sin(self.angle) * rng.uniform(1, 3)
             
             # Random thruster color
-            thruster_color: Tuple[int, int, int] = random.choice([ORANGE, YELLOW, RED])
+            thruster_color: Tuple[int, int, int] = rng.choice([ORANGE, YELLOW, RED])
             
             # Larger particles when boosting
             size_range: Tuple[float, float] = (1.5, 4) if speed_boost else (1, 3)
             
-            self.thruster_particles.append(
-                Particle(thruster_x, thruster_y, thruster_color, 
-                        velocity=(vel_x, vel_y), 
-                        size=random.uniform(size_range[0], size_range[1]), 
-                        life=random.randint(10, 20))
-            )
-        
-        # Update thruster particles
-        for particle in self.thruster_particles[:]:
-            particle.update()
-            if particle.life <= 0:
-                self.thruster_particles.remove(particle)
+            particles.emit(thruster_x, thruster_y, thruster_color,
+                           vel_x, vel_y,
+                           size=rng.uniform(size_range[0], size_range[1]),
+                           life=rng.randint(10, 20))
         
         # Rotate shield
-        self.shield_angle += 0.05
+        self.shield_angle += 0.05 * frames
         
         # Engine flicker effect
-        self.engine_flicker = (self.engine_flicker + 1) % 10
+        self.engine_flicker = (self.engine_flicker + frames) % 10
     
-    def draw(self, surface: Surface, active_powerups: Dict[str, Dict[str, Any]]) -> None:
-        # Draw thruster particles behind ship
-        for particle in self.thruster_particles:
-            particle.draw(surface)
-        
-        # Draw trail
-        if len(self.trail) > 1:
+    def bounds(self, alpha: float = 1.0) -> pygame.Rect:
+        """Screen area ``draw`` can touch, including the trail and power-up effects."""
+        x = lerp(self.prev_x, self.x, alpha)
+        y = lerp(self.prev_y, self.y, alpha)
+        reach = self.radius + 26  # The slow-time ripple reaches furthest
+        rect = pygame.Rect(int(x) - reach, int(y) - reach, reach * 2, reach * 2)
+        if self.trail:
+            xs = [point[0] for point in self.trail]
+            ys = [point[1] for point in self.trail]
+            rect.union_ip(pygame.Rect(int(min(xs)) - 3, int(min(ys)) - 3,
+                                      int(max(xs) - min(xs)) + 7, int(max(ys) - min(ys)) + 7))
+        return rect
+    
+    def draw(self, commands: DrawList, active_powerups: Dict[str, Dict[str, Any]], ticks: int,
+             alpha: float = 1.0) -> None:
+        # Interpolate between the last two simulation states
+        x = lerp(self.prev_x, self.x, alpha)
+        y = lerp(self.prev_y, self.y, alpha)
+        center = (int(x), int(y))
+        
+        # Draw trail (the speed power-up draws a wider one over it instead)
+        if len(self.trail) > 1 and not active_powerups["speed"]["active"]:
             for i in range(len(self.trail) - 1):
-                # Calculate trail opacity based on position
-                alpha: int = int(255 * (i / len(self.trail)))
                 color: Tuple[int, int, int] = (min(255, self.color[0]), 
                          min(255, self.color[1]), 
                          min(255, self.color[2]))
                 
                 # Draw trail segment
-                pygame.draw.line(surface, color, 
-                                self.trail[i], self.trail[i+1], 
-                                max(1, int((i / len(self.trail)) * 3)))
-        
-        # Draw ship
-        ship_points: List[Tuple[float, float]] = [
-            # Nose of the ship
-            (self.x + math.cos(self.angle) * self.radius,
-             self.y + math.sin(self.angle) * self.radius),
-            # Right wing
-            (self.x + math.cos(self.angle + 2.5) * self.radius * 0.8,
-             self.y + math.sin(self.angle + 2.5) * self.radius * 0.8),
-            # Back of the ship
-            (self.x + math.cos(self.angle + math.pi) * self.radius * 0.5,
-             self.y + math.sin(self.angle + math.pi) * self.radius * 0.5),
-            # Left wing
-            (self.x + math.cos(self.angle - 2.5) * self.radius * 0.8,
-             self.y + math.sin(self.angle - 2.5) * self.radius * 0.8),
-        ]
+                commands.line(LAYER_PLAYER, color, 
+                              self.trail[i], self.trail[i+1], 
+                              max(1, int((i / len(self.trail)) * 3)))
         
         # Draw engine glow (flickering)
         if self.engine_flicker < 5:
-            engine_x = self.x - math.cos(self.angle) * (self.radius * 0.7)
-            engine_y = self.y - math.sin(self.angle) * (self.radius * 0.7)
-            engine_size = random.uniform(3, 6)
-            engine_color = random.choice([ORANGE, YELLOW])
-            pygame.draw.circle(surface, engine_color, (int(engine_x), int(engine_y)), int(engine_size))
-        
-        # Draw ship body
-        pygame.draw.polygon(surface, self.color, ship_points)
-        
-        # Draw ship outline
-        pygame.draw.polygon(surface, NEON_BLUE, ship_points, 2)
-        
-        # Draw cockpit
-        cockpit_x = self.x + math.cos(self.angle) * (self.radius * 0.3)
-        cockpit_y = self.y + math.sin(self.angle) * (self.radius * 0.3)
-        pygame.draw.circle(surface, NEON_BLUE, (int(cockpit_x), int(cockpit_y)), int(self.radius * 0.3))
+            engine_x = x - math.cos(self.angle) * (self.radius * 0.7)
+            engine_y = y - math.sin(self.angle) * (self.radius * 0.7)
+            # Flicker is hashed from the tick, so every redraw of a tick looks the same
+            flicker = (ticks * 0x9E3779B1) & 0xFFFFFFFF
+            engine_size = 3 + 3 * (flicker >> 24) / 255
+            engine_color = ORANGE if flicker & 0x800000 else YELLOW
+            commands.circle(LAYER_PLAYER + 1, engine_color, (int(engine_x), int(engine_y)), int(engine_size))
+        
+        # Draw ship hull from the sprite atlas
+        bucket = rotation_bucket(self.angle)
+        sprite = sprite_atlas.get(("ship", self.color, self.radius, bucket),
+                                  lambda: bake_ship(self.color, self.radius, bucket_angle(bucket)))
+        commands.sprite(LAYER_PLAYER + 2, sprite, x, y)
         
         # Visual effects for active power-ups
+        effects = LAYER_PLAYER + 3
         if active_powerups["invincible"]["active"]:
             # Gold aura for invincibility
-            pygame.draw.circle(surface, GOLD, (int(self.x), int(self.y)), self.radius + 8, 2)
+            commands.circle(effects, GOLD, center, self.radius + 8, 2)
             
             # Rotating shield effect
             for i in range(8):
                 angle = self.shield_angle + i * (math.pi / 4)
-                shield_x = self.x + math.cos(angle) * (self.radius + 12)
-                shield_y = self.y + math.sin(angle) * (self.radius + 12)
-                pygame.draw.circle(surface, GOLD, (int(shield_x), int(shield_y)), 3)
+                shield_x = x + math.cos(angle) * (self.radius + 12)
+                shield_y = y + math.sin(angle) * (self.radius + 12)
+                commands.circle(effects, GOLD, (int(shield_x), int(shield_y)), 3)
         
         if active_powerups["reflect"]["active"]:
             # Orange shield for reflect
-            pygame.draw.circle(surface, ORANGE, (int(self.x), int(self.y)), self.radius + 10, 2)
+            commands.circle(effects, ORANGE, center, self.radius + 10, 2)
             
             # Pulsing shield effect
             pulse = (math.sin(pygame.time.get_ticks() * 0.01) + 1) * 0.5
             shield_radius = self.radius + 10 + int(pulse * 5)
-            pygame.draw.circle(surface, ORANGE, (int(self.x), int(self.y)), shield_radius, 1)
+            commands.circle(effects, ORANGE, center, shield_radius, 1)
         
         if active_powerups["speed"]["active"]:
             # Extra trail for speed
             if len(self.trail) > 1:
                 for i in range(len(self.trail) - 1):
-                    alpha = int(255 * (i / len(self.trail)))
-                    pygame.draw.line(surface, YELLOW, 
-                                    self.trail[i], self.trail[i+1], 
-                                    max(1, int((i / len(self.trail)) * 5)))
+                    commands.line(effects, YELLOW, 
+                                  self.trail[i], self.trail[i+1], 
+                                  max(1, int((i / len(self.trail)) * 5)))
         
         if active_powerups["slow"]["active"]:
             # Cyan ripple for slow time
             ripple_size = (math.sin(pygame.time.get_ticks() * 0.01) + 1) * 0.5
-            pygame.draw.circle(surface, CYAN, (int(self.x), int(self.y)), 
-                              int(self.radius + 10 + ripple_size * 10), 1)
-            pygame.draw.circle(surface, CYAN, (int(self.x), int(self.y)), 
-                              int(self.radius + 15 + ripple_size * 10), 1)
-
-# Ball class with enhanced visuals
-class Ball:
-    def __init__(self, x: float, difficulty: float, is_homing: bool = False, 
-                 player_pos: Optional[List[float]] = None):
-        self.x: float = x
-        self.y: float = 0.0
-        self.is_homing: bool = is_homing
-        self.player_pos: Optional[List[float]] = player_pos
-        self.particles: List[Particle] = []
-        self.pulse_phase: float = random.uniform(0, math.pi * 2)  # Random starting phase
-        self.rotation: float = 0.0
-        self.rotation_speed: float = random.uniform(-0.1, 0.1)
-        self.radius: int = 0
-        self.speed: int = 0
-        self.color: Tuple[int, int, int] = WHITE  # Default, will be overridden
-        self.inner_color: Tuple[int, int, int] = WHITE  # Default, will be overridden
-        self.type: str = "small"  # Default, will be overridden
-        self.points: List[Tuple[float, float]] = []
+            commands.circle(effects, CYAN, center, 
+                            int(self.radius + 10 + ripple_size * 10), 1)
+            commands.circle(effects, CYAN, center, 
+                            int(self.radius + 15 + ripple_size * 10), 1)
+
+def bake_ship(color: Tuple[int, int, int], radius: int, angle: float) -> Surface:
+    """Render the ship hull and cockpit, centered, pointing at ``angle``."""
+    c = radius + 2
+    sprite = new_sprite(c * 2)
+    ship_points: List[Tuple[float, float]] = [
+        # Nose of the ship
+        (c + math.cos(angle) * radius,
+         c + math.sin(angle) * radius),
+        # Right wing
+        (c + math.cos(angle + 2.5) * radius * 0.8,
+         c + math.sin(angle + 2.5) * radius * 0.8),
+        # Back of the ship
+        (c + math.cos(angle + math.pi) * radius * 0.5,
+         c + math.sin(angle + math.pi) * radius * 0.5),
+        # Left wing
+        (c + math.cos(angle - 2.5) * radius * 0.8,
+         c + math.sin(angle - 2.5) * radius * 0.8),
+    ]
+    
+    # Draw ship body
+    pygame.draw.polygon(sprite, color, ship_points)
+    
+    # Draw ship outline
+    pygame.draw.polygon(sprite, NEON_BLUE, ship_points, 2)
+    
+    # Draw cockpit
+    cockpit_x = c + math.cos(angle) * (radius * 0.3)
+    cockpit_y = c + math.sin(angle) * (radius * 0.3)
+    pygame.draw.circle(sprite, NEON_BLUE, (int(cockpit_x), int(cockpit_y)), int(radius * 0.3))
+    return sprite
+
+
+# Ball population with enhanced visuals
+BALL_TYPES: Tuple[str, ...] = ("small", "medium", "large", "homing")
+BALL_SMALL, BALL_MEDIUM, BALL_LARGE, BALL_HOMING = range(4)
+BALL_COLORS: List[Tuple[int, int, int]] = [NEON_BLUE, NEON_GREEN, RED, PURPLE]
+BALL_INNER_COLORS: List[Tuple[int, int, int]] = [BLUE, GREEN, (150, 0, 0), DARK_PURPLE]
+BALL_TRAIL_COLORS: List[Tuple[int, int, int]] = [BLUE, GREEN, RED, PURPLE]
+BALL_RADII: List[Tuple[int, int]] = [(10, 20), (21, 35), (36, 50)]  # Radius range of small, medium, large
+
+
+class AsteroidShape(NamedTuple):
+    radius: int
+    points: List[Tuple[float, float]]  # Outline as offsets from the center
+    craters: List[Tuple[float, float, int]]  # (angle, distance, size), fixed per shape so they do not flicker
+
+
+def make_shape_bank(per_size: int, seed: int) -> List[AsteroidShape]:
+    """Generate ``per_size`` asteroid shapes for each size class, smallest class first."""
+    rng = np.random.default_rng(seed)
+    bank: List[AsteroidShape] = []
+    for low, high in BALL_RADII:
+        for _ in range(per_size):
+            radius = int(rng.integers(low, high, endpoint=True))
+            
+            # Create points for the asteroid shape
+            num_points = int(rng.integers(6, 10, endpoint=True))
+            angles = np.arange(num_points) * (2 * math.pi / num_points)
+            # Vary the radius to create jagged edges
+            radius_var = radius * rng.uniform(0.8, 1.2, num_points)
+            points = list(zip((np.cos(angles) * radius_var).tolist(), (np.sin(angles) * radius_var).tolist()))
+            
+            # Add some craters for detail
+            crater_angles = rng.uniform(0, math.pi * 2, 3).tolist()
+            crater_dists = rng.uniform(0, radius * 0.7, 3).tolist()
+            crater_sizes = rng.integers(2, max(3, int(radius * 0.2)), 3, endpoint=True).tolist()
+            bank.append(AsteroidShape(radius, points, list(zip(crater_angles, crater_dists, crater_sizes))))
+    return bank
+
+
+# Spawning picks a shape from a fixed bank instead of generating one, so it
+# allocates nothing and every shape's rotated sprites stay cached. The bank
+# is made on first use, so importing the module for its tools stays cheap.
+SHAPES_PER_SIZE: int = 16
+SHAPE_SEED: int = 2024
+_shape_bank: Optional[List[AsteroidShape]] = None
+
+
+def get_shape_bank() -> List[AsteroidShape]:
+    global _shape_bank
+    if _shape_bank is None:
+        _shape_bank = make_shape_bank(SHAPES_PER_SIZE, SHAPE_SEED)
+    return _shape_bank
+
+
+def bake_asteroid(points: List[Tuple[float, float]], craters: List[Tuple[float, float, int]],
+                  radius: int, color: Tuple[int, int, int], inner_color: Tuple[int, int, int],
+                  rotation: float) -> Surface:
+    """Render one asteroid shape with its craters, centered, at one rotation."""
+    c = int(radius * 1.2) + 2  # Jagged points reach out to 1.2 * radius
+    sprite = new_sprite(c * 2)
+    cos_r = math.cos(rotation)
+    sin_r = math.sin(rotation)
+    rotated = [(c + px * cos_r - py * sin_r, c + px * sin_r + py * cos_r) for px, py in points]
+    
+    # Draw filled asteroid
+    pygame.draw.polygon(sprite, inner_color, rotated)
+    
+    # Draw outline
+    pygame.draw.polygon(sprite, color, rotated, 2)
+    
+    # Draw craters
+    for crater_angle, crater_dist, crater_size in craters:
+        crater_x = c + math.cos(crater_angle + rotation) * crater_dist
+        crater_y = c + math.sin(crater_angle + rotation) * crater_dist
+        pygame.draw.circle(sprite, (30, 30, 30), (int(crater_x), int(crater_y)), crater_size)
+    return sprite
+
+
+class BallStore:
+    """All balls as parallel NumPy arrays, moved in batches.
+
+    Balls occupy the first ``count`` slots. A ball is addressed by its slot
+    index, which stays valid until the next ``update`` or ``remove``.
+    """
+    
+    ARRAYS: Tuple[str, ...] = ("x", "y", "prev_x", "prev_y", "speed", "radius", "rotation",
+                               "prev_rotation", "rotation_speed", "pulse_phase", "type",
+                               "homing", "shape")
+    
+    def __init__(self, capacity: int = 256, rng: Optional[np.random.Generator] = None):
+        self.capacity: int = capacity
+        self.count: int = 0
+        self.rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
+        self.x: np.ndarray = np.zeros(capacity, np.float64)
+        self.y: np.ndarray = np.zeros(capacity, np.float64)
+        self.prev_x: np.ndarray = np.zeros(capacity, np.float64)  # Position at the previous tick
+        self.prev_y: np.ndarray = np.zeros(capacity, np.float64)
+        self.speed: np.ndarray = np.zeros(capacity, np.float64)
+        self.radius: np.ndarray = np.zeros(capacity, np.int32)
+        self.rotation: np.ndarray = np.zeros(capacity, np.float64)
+        self.prev_rotation: np.ndarray = np.zeros(capacity, np.float64)
+        self.rotation_speed: np.ndarray = np.zeros(capacity, np.float64)
+        self.pulse_phase: np.ndarray = np.zeros(capacity, np.float64)
+        self.type: np.ndarray = np.zeros(capacity, np.int8)  # Index into BALL_TYPES
+        self.homing: np.ndarray = np.zeros(capacity, np.bool_)
+        self.shape: np.ndarray = np.zeros(capacity, np.int32)  # Index into the shape bank
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def snapshot(self) -> "BallStore":
+        """A copy of the live balls for drawing elsewhere while this store keeps moving."""
+        snapshot = copy.copy(self)
+        for name in self.ARRAYS:
+            setattr(snapshot, name, getattr(self, name)[:self.count].copy())
+        snapshot.capacity = self.count
+        return snapshot
+    
+    def spawn(self, x: float, difficulty: float, is_homing: bool = False) -> int:
+        """Add one ball at the top of the screen and return its slot."""
+        if self.count == self.capacity:
+            self.capacity *= 2
+            grow_arrays(self, self.ARRAYS, self.count, self.capacity)
+        i = self.count
+        self.count += 1
         
         # Adjust ball size probabilities based on difficulty
-        size_chances: List[float] = [0.7 - difficulty * 0.3, 0.2, 0.1 + difficulty * 0.3]  # [small, medium, large]
-        size_choice: int = random.choices([0, 1, 2], weights=size_chances)[0]
+        rng = self.rng
+        # Past a difficulty of 7/3 small balls stop spawning rather than getting a negative weight
+        size_chances: List[float] = [max(0.0, 0.7 - difficulty * 0.3), 0.2,
+                                     max(0.0, 0.1 + difficulty * 0.3)]  # [small, medium, large]
+        size_choice: int = int(rng.choice(3, p=np.divide(size_chances, sum(size_chances))))
+        
+        # The shape fixes the radius within the size class
+        shape = size_choice * SHAPES_PER_SIZE + int(rng.integers(SHAPES_PER_SIZE))
+        radius = get_shape_bank()[shape].radius
         
         if size_choice == 0:  # Small ball
-            self.radius = random.randint(10, 20)
-            self.speed = random.randint(3, 5)
-            self.color = NEON_BLUE  # Small balls are neon blue
-            self.inner_color = BLUE
-            self.type = "small"
+            speed = int(rng.integers(3, 5, endpoint=True))
+            ball_type = BALL_SMALL
         elif size_choice == 1:  # Medium ball
-            self.radius = random.randint(21, 35)
-            self.speed = random.randint(2, 4)
-            self.color = NEON_GREEN  # Medium balls are neon green
-            self.inner_color = GREEN
-            self.type = "medium"
+            speed = int(rng.integers(2, 4, endpoint=True))
+            ball_type = BALL_MEDIUM
         else:  # Large ball
-            self.radius = random.randint(36, 50)
-            self.speed = random.randint(1, 3)
-            self.color = RED  # Large balls are red
-            self.inner_color = (150, 0, 0)
-            self.type = "large"
-        
-        # Homing balls are purple
-        if self.is_homing:
-            self.color = PURPLE
-            self.inner_color = DARK_PURPLE
-            self.speed = 1  # Homing balls are slower
-            self.type = "homing"
-            
-        # Create points for the asteroid shape
-        self.points = []
-        num_points: int = random.randint(6, 10)
-        for i in range(num_points):
-            angle: float = i * (2 * math.pi / num_points)
-            # Vary the radius to create jagged edges
-            radius_var: float = self.radius * random.uniform(0.8, 1.2)
-            x_offset: float = math.cos(angle) * radius_var
-            y_offset: float = math.sin(angle) * radius_var
-            self.points.append((x_offset, y_offset))
-
-    def update(self, time_factor: float = 1.0) -> None:
-        if self.is_homing and self.player_pos:
-            # Calculate direction towards player
-            dx: float = self.player_pos[0] - self.x
-            dy: float = self.player_pos[1] - self.y
-            distance: float = max(1, math.sqrt(dx*dx + dy*dy))  # Avoid division by zero
-            
-            # Normalize and apply speed
-            self.x += (dx / distance) * self.speed * time_factor
-            self.y += self.speed * time_factor
-        else:
-            # Normal vertical movement
-            self.y += self.speed * time_factor
+            speed = int(rng.integers(1, 3, endpoint=True))
+            ball_type = BALL_LARGE
+        
+        # Homing balls are purple and slower
+        if is_homing:
+            speed = 1
+            ball_type = BALL_HOMING
+        
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = 0.0
+        self.speed[i] = speed
+        self.radius[i] = radius
+        self.rotation[i] = self.prev_rotation[i] = 0.0
+        self.rotation_speed[i] = rng.uniform(-0.1, 0.1)
+        self.pulse_phase[i] = rng.uniform(0, math.pi * 2)  # Random starting phase
+        self.type[i] = ball_type
+        self.homing[i] = is_homing
+        self.shape[i] = shape
+        return i
+    
+    def update(self, player_x: float, player_y: float, particles: ParticleSystem,
+               time_factor: float = 1.0, frames: float = 1.0) -> None:
+        """Move every ball, emit trails and drop balls that left the screen."""
+        n = self.count
+        if n == 0:
+            return
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self.prev_rotation[:n] = self.rotation[:n]
+        time_factor *= frames
+        step = self.speed[:n] * time_factor
+        
+        # Homing balls steer sideways towards the player while falling
+        homing = np.flatnonzero(self.homing[:n])
+        if homing.size:
+            dx = player_x - self.x[homing]
+            dy = player_y - self.y[homing]
+            distance = np.maximum(1.0, np.hypot(dx, dy))  # Avoid division by zero
+            self.x[homing] += dx / distance * step[homing]
+        self.y[:n] += step
         
         # Update rotation
-        self.rotation += self.rotation_speed * time_factor
+        self.rotation[:n] += self.rotation_speed[:n] * time_factor
         
         # Create trail particles occasionally
-        if random.random() < 0.2:
-            particle_color: Tuple[int, int, int] = PURPLE  # Default
-            if self.type == "small":
-                particle_color = BLUE
-            elif self.type == "medium":
-                particle_color = GREEN
-            elif self.type == "large":
-                particle_color = RED
-            else:  # homing
-                particle_color = PURPLE
-            
-            self.particles.append(
-                Particle(self.x, self.y, particle_color, 
-                        size=random.uniform(1, 3), 
-                        life=random.randint(10, 30))
-            )
-        
-        # Update particles
-        for particle in self.particles[:]:
-            particle.update()
-            if particle.life <= 0:
-                self.particles.remove(particle)
+        emitting = np.flatnonzero(self.rng.random(n) < per_tick_chance(0.2 * particles.emission, frames))
+        if emitting.size:
+            types = self.type[emitting]
+            for ball_type, color in enumerate(BALL_TRAIL_COLORS):
+                chosen = emitting[types == ball_type]
+                if chosen.size:
+                    particles.emit_drift(self.x[chosen], self.y[chosen], color, (1, 3), (10, 30),
+                                         count=chosen.size)
+        
+        # Remove balls that are off-screen
+        x, y, radius = self.x[:n], self.y[:n], self.radius[:n]
+        on_screen = (y >= -radius) & (y <= HEIGHT + radius) & (x >= -radius) & (x <= WIDTH + radius)
+        if not on_screen.all():
+            self._compact(on_screen)
     
-    def draw(self, surface: Surface) -> None:
-        # Draw particles first (behind the ball)
-        for particle in self.particles:
-            particle.draw(surface)
-        
-        # Calculate pulse effect
-        pulse = math.sin(self.pulse_phase + pygame.time.get_ticks() * 0.005) * 0.2 + 0.8
-        
-        if self.type == "homing":
-            # Special drawing for homing balls - pulsing evil eye
-            # Outer circle
-            pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.radius)
-            
-            # Inner circle
-            inner_radius = int(self.radius * 0.7)
-            pygame.draw.circle(surface, self.inner_color, (int(self.x), int(self.y)), inner_radius)
-            
-            # Pupil
-            pupil_radius = int(self.radius * 0.3)
-            pupil_offset = (self.player_pos[0] - self.x) * 0.2, (self.player_pos[1] - self.y) * 0.2
-            pupil_offset = (
-                max(-inner_radius + pupil_radius, min(inner_radius - pupil_radius, pupil_offset[0])),
-                max(-inner_radius + pupil_radius, min(inner_radius - pupil_radius, pupil_offset[1]))
-            )
-            pygame.draw.circle(surface, BLACK, 
-                              (int(self.x + pupil_offset[0]), int(self.y + pupil_offset[1])), 
-                              pupil_radius)
-            
-            # Glowing effect
-            glow_radius = int(self.radius * (1.1 + pulse * 0.2))
-            pygame.draw.circle(surface, (PURPLE[0]//2, PURPLE[1]//2, PURPLE[2]//2), 
-                              (int(self.x), int(self.y)), glow_radius, 2)
-        else:
-            # Draw asteroid-like shape for regular balls
-            points = []
-            for point in self.points:
-                rotated_x = point[0] * math.cos(self.rotation) - point[1] * math.sin(self.rotation)
-                rotated_y = point[0] * math.sin(self.rotation) + point[1] * math.cos(self.rotation)
-                points.append((self.x + rotated_x, self.y + rotated_y))
-            
-            # Draw filled asteroid
-            pygame.draw.polygon(surface, self.inner_color, points)
-            
-            # Draw outline
-            pygame.draw.polygon(surface, self.color, points, 2)
+    def remove(self, indices: List[int]) -> None:
+        keep = np.ones(self.count, np.bool_)
+        keep[indices] = False
+        self._compact(keep)
+    
+    def _compact(self, keep: np.ndarray) -> None:
+        n = self.count
+        remaining = int(keep.sum())
+        for name in self.ARRAYS:
+            arr = getattr(self, name)
+            arr[:remaining] = arr[:n][keep]
+        self.count = remaining
+    
+    def extents(self, alpha: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Interpolated centers and drawn radius (sprite or glow) of every ball."""
+        n = self.count
+        xs = self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha
+        ys = self.prev_y[:n] + (self.y[:n] - self.prev_y[:n]) * alpha
+        return xs, ys, self.radius[:n] * 1.3 + 4
+    
+    def draw(self, commands: DrawList, player_x: float, player_y: float, alpha: float = 1.0,
+             rotation_steps: int = ROTATION_STEPS) -> None:
+        n = self.count
+        if n == 0:
+            return
+        # Interpolate between the last two simulation states, skipping balls outside the viewport
+        xs, ys, reach = self.extents(alpha)
+        viewport = commands.viewport
+        visible = np.flatnonzero((xs + reach >= viewport.left) & (xs - reach < viewport.right) &
+                                 (ys + reach >= viewport.top) & (ys - reach < viewport.bottom))
+        commands.culled += n - visible.size
+        rotations = (self.prev_rotation[visible] + (self.rotation[visible] - self.prev_rotation[visible]) * alpha)
+        ticks = pygame.time.get_ticks()
+        lookup = sprite_atlas.lookup
+        # Fewer steps reuse every stride-th sprite of the full set
+        stride = max(1, ROTATION_STEPS // rotation_steps)
+        bucket_scale = ROTATION_STEPS / (2 * math.pi) / stride
+        
+        for x, y, rotation, radius, ball_type, pulse_phase, shape in zip(
+                xs[visible].tolist(), ys[visible].tolist(), rotations.tolist(), self.radius[visible].tolist(),
+                self.type[visible].tolist(), self.pulse_phase[visible].tolist(), self.shape[visible].tolist()):
+            color = BALL_COLORS[ball_type]
+            inner_color = BALL_INNER_COLORS[ball_type]
             
-            # Add some craters for detail
-            for _ in range(3):
-                crater_angle = random.uniform(0, math.pi * 2)
-                crater_dist = random.uniform(0, self.radius * 0.7)
-                crater_x = self.x + math.cos(crater_angle + self.rotation) * crater_dist
-                crater_y = self.y + math.sin(crater_angle + self.rotation) * crater_dist
-                crater_size = random.randint(2, max(3, int(self.radius * 0.2)))
-                pygame.draw.circle(surface, (30, 30, 30), (int(crater_x), int(crater_y)), crater_size)
+            if ball_type == BALL_HOMING:
+                # Calculate pulse effect
+                pulse = math.sin(pulse_phase + ticks * 0.005) * 0.2 + 0.8
+                
+                # Special drawing for homing balls - pulsing evil eye
+                # Outer circle
+                center = (int(x), int(y))
+                commands.circle(LAYER_BALLS, color, center, radius)
+                
+                # Inner circle
+                inner_radius = int(radius * 0.7)
+                commands.circle(LAYER_BALLS + 1, inner_color, center, inner_radius)
+                
+                # Pupil
+                pupil_radius = int(radius * 0.3)
+                limit = inner_radius - pupil_radius
+                pupil_x = max(-limit, min(limit, (player_x - x) * 0.2))
+                pupil_y = max(-limit, min(limit, (player_y - y) * 0.2))
+                commands.circle(LAYER_BALLS + 2, BLACK, 
+                                (int(x + pupil_x), int(y + pupil_y)), 
+                                pupil_radius)
+                
+                # Glowing effect
+                glow_radius = int(radius * (1.1 + pulse * 0.2))
+                commands.circle(LAYER_BALLS + 3, (PURPLE[0]//2, PURPLE[1]//2, PURPLE[2]//2), 
+                                center, glow_radius, 2)
+            else:
+                # Asteroids are blitted from sprites baked per shape and angle
+                bucket = int(round(rotation * bucket_scale)) * stride % ROTATION_STEPS
+                key = ("asteroid", shape, bucket)
+                sprite = lookup(key)
+                if sprite is None:
+                    template = get_shape_bank()[shape]
+                    sprite = sprite_atlas.store(key, bake_asteroid(
+                        template.points, template.craters, radius,
+                        color, inner_color, bucket_angle(bucket)))
+                commands.sprite(LAYER_BALLS, sprite, x, y)
 
 # PowerUp class with enhanced visuals
 class PowerUp:
-    def __init__(self, x: float, y: float):
+    __slots__ = ("x", "y", "prev_x", "prev_y", "radius", "rng", "type", "active", "speed", "angle",
+                 "pulse_phase", "color", "inner_color")
+    
+    def __init__(self, x: float, y: float, rng: Optional[random.Random] = None):
+        self.reset(x, y, rng)
+    
+    def reset(self, x: float, y: float, rng: Optional[random.Random] = None) -> None:
+        """(Re)initialize as a fresh power-up, for objects coming back from a PowerUpPool."""
         self.x: float = x
         self.y: float = y
+        self.prev_x: float = x  # Position at the previous simulation tick
+        self.prev_y: float = y
         self.radius: int = 15
-        self.type: str = random.choice(["invincible", "slow", "reflect", "speed"])
+        self.rng: random.Random = rng if rng is not None else random.Random()  # Gameplay randomness only
+        self.type: str = self.rng.choice(["invincible", "slow", "reflect", "speed"])
         self.active: bool = True
         self.speed: float = 2.0
-        self.particles: List[Particle] = []
         self.angle: float = 0.0
-        self.pulse_phase: float = random.uniform(0, math.pi * 2)
+        self.pulse_phase: float = self.rng.uniform(0, math.pi * 2)
         self.color: Tuple[int, int, int] = WHITE  # Default, will be overridden
         self.inner_color: Tuple[int, int, int] = WHITE  # Default, will be overridden
         
@@ -502,224 +1694,261 @@ class PowerUp:
             self.color = YELLOW
             self.inner_color = (200, 200, 0)
     
-    def update(self) -> None:
-        self.y += self.speed
-        self.angle += 0.05  # Rotate the power-up
+    def update(self, particles: ParticleSystem, frames: float = 1.0) -> None:
+        self.prev_x, self.prev_y = self.x, self.y
+        self.y += self.speed * frames
+        self.angle += 0.05 * frames  # Rotate the power-up
         
         # Create particles occasionally
-        if random.random() < 0.2:
-            self.particles.append(
-                Particle(self.x, self.y, self.color, 
-                        size=random.uniform(1, 2), 
-                        life=random.randint(10, 20))
-            )
-        
-        # Update particles
-        for particle in self.particles[:]:
-            particle.update()
-            if particle.life <= 0:
-                self.particles.remove(particle)
+        if self.rng.random() < per_tick_chance(0.2 * particles.emission, frames):
+            particles.emit_drift(self.x, self.y, self.color, (1, 2), (10, 20))
     
-    def draw(self, surface: Surface) -> None:
+    def bounds(self, alpha: float = 1.0) -> pygame.Rect:
+        reach = int(self.radius * 1.3) + 3  # Outer ring at full pulse
+        x = int(lerp(self.prev_x, self.x, alpha))
+        y = int(lerp(self.prev_y, self.y, alpha))
+        return pygame.Rect(x - reach, y - reach, reach * 2, reach * 2)
+    
+    def draw(self, commands: DrawList, alpha: float = 1.0) -> None:
         if not self.active:
             return
         
-        # Draw particles first (behind the power-up)
-        for particle in self.particles:
-            particle.draw(surface)
+        # Interpolate between the last two simulation states
+        x = lerp(self.prev_x, self.x, alpha)
+        y = lerp(self.prev_y, self.y, alpha)
         
         # Calculate pulse effect
         pulse = math.sin(self.pulse_phase + pygame.time.get_ticks() * 0.01) * 0.2 + 0.8
         outer_radius = int(self.radius * (1 + pulse * 0.3))
             
         # Draw power-up circle with pulsing outer glow
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), outer_radius, 2)
-        pygame.draw.circle(surface, self.inner_color, (int(self.x), int(self.y)), self.radius)
-        
-        # Draw icon inside based on type
-        if self.type == "invincible":
-            # Draw a star shape
-            for i in range(5):
-                angle = self.angle + i * (2 * math.pi / 5)
-                outer_point = (
-                    self.x + math.cos(angle) * self.radius * 0.8,
-                    self.y + math.sin(angle) * self.radius * 0.8
-                )
-                inner_angle = angle + math.pi / 5
-                inner_point = (
-                    self.x + math.cos(inner_angle) * self.radius * 0.4,
-                    self.y + math.sin(inner_angle) * self.radius * 0.4
-                )
-                
-                next_angle = angle + 2 * math.pi / 5
-                next_outer_point = (
-                    self.x + math.cos(next_angle) * self.radius * 0.8,
-                    self.y + math.sin(next_angle) * self.radius * 0.8
-                )
-                
-                pygame.draw.polygon(surface, WHITE, [outer_point, inner_point, next_outer_point])
-                
-        elif self.type == "slow":
-            # Draw a clock shape
-            pygame.draw.circle(surface, WHITE, (int(self.x), int(self.y)), int(self.radius * 0.6), 1)
-            # Clock hands
-            hand_length = self.radius * 0.5
-            # Hour hand
-            hour_angle = self.angle
-            pygame.draw.line(surface, WHITE, 
-                            (self.x, self.y),
-                            (self.x + math.cos(hour_angle) * hand_length * 0.6,
-                             self.y + math.sin(hour_angle) * hand_length * 0.6), 2)
-            # Minute hand
-            minute_angle = self.angle * 2
-            pygame.draw.line(surface, WHITE, 
-                            (self.x, self.y),
-                            (self.x + math.cos(minute_angle) * hand_length,
-                             self.y + math.sin(minute_angle) * hand_length), 1)
+        commands.circle(LAYER_POWERUPS, self.color, (int(x), int(y)), outer_radius, 2)
+        
+        # Inner disc and icon come pre-rendered from the sprite atlas
+        bucket = rotation_bucket(self.angle) if self.type != "speed" else 0
+        sprite = sprite_atlas.get(("powerup", self.type, bucket),
+                                  lambda: bake_powerup(self.type, self.inner_color, self.radius,
+                                                       bucket_angle(bucket)))
+        commands.sprite(LAYER_POWERUPS + 1, sprite, x, y)
+
+
+class PowerUpPool:
+    """Free list of PowerUp objects, so spawning and collecting them allocates nothing."""
+    
+    def __init__(self) -> None:
+        self.free: List[PowerUp] = []
+    
+    def acquire(self, x: float, y: float, rng: Optional[random.Random] = None) -> PowerUp:
+        if self.free:
+            powerup = self.free.pop()
+            powerup.reset(x, y, rng)
+            return powerup
+        return PowerUp(x, y, rng)
+    
+    def release(self, powerup: PowerUp) -> None:
+        self.free.append(powerup)
+
+
+def bake_powerup(powerup_type: str, inner_color: Tuple[int, int, int], radius: int,
+                 rotation: float) -> Surface:
+    """Render a power-up's inner disc and icon, centered, at one rotation."""
+    c = radius + 1
+    sprite = new_sprite(c * 2)
+    pygame.draw.circle(sprite, inner_color, (c, c), radius)
+    
+    # Draw icon inside based on type
+    if powerup_type == "invincible":
+        # Draw a star shape
+        for i in range(5):
+            angle = rotation + i * (2 * math.pi / 5)
+            outer_point = (
+                c + math.cos(angle) * radius * 0.8,
+                c + math.sin(angle) * radius * 0.8
+            )
+            inner_angle = angle + math.pi / 5
+            inner_point = (
+                c + math.cos(inner_angle) * radius * 0.4,
+                c + math.sin(inner_angle) * radius * 0.4
+            )
             
-        elif self.type == "reflect":
-            # Draw a shield shape
-            shield_points = []
-            num_points = 12
-            for i in range(num_points):
-                angle = self.angle + i * (2 * math.pi / num_points)
-                # Make the shield slightly oval
-                x_radius = self.radius * 0.7
-                y_radius = self.radius * 0.8
-                point = (
-                    self.x + math.cos(angle) * x_radius,
-                    self.y + math.sin(angle) * y_radius
-                )
-                shield_points.append(point)
+            next_angle = angle + 2 * math.pi / 5
+            next_outer_point = (
+                c + math.cos(next_angle) * radius * 0.8,
+                c + math.sin(next_angle) * radius * 0.8
+            )
             
-            pygame.draw.polygon(surface, WHITE, shield_points, 1)
-            # Draw cross on shield
-            pygame.draw.line(surface, WHITE, 
-                            (self.x - self.radius * 0.4, self.y),
-                            (self.x + self.radius * 0.4, self.y), 1)
-            pygame.draw.line(surface, WHITE, 
-                            (self.x, self.y - self.radius * 0.4),
-                            (self.x, self.y + self.radius * 0.4), 1)
+            pygame.draw.polygon(sprite, WHITE, [outer_point, inner_point, next_outer_point])
             
-        elif self.type == "speed":
-            # Draw a lightning bolt
-            bolt_points = [
-                (self.x, self.y - self.radius * 0.7),  # Top
-                (self.x - self.radius * 0.3, self.y),  # Middle left
-                (self.x, self.y),                      # Middle
-                (self.x + self.radius * 0.3, self.y),  # Middle right
-                (self.x, self.y + self.radius * 0.7),  # Bottom
-            ]
-            pygame.draw.lines(surface, WHITE, False, bolt_points, 2)
+    elif powerup_type == "slow":
+        # Draw a clock shape
+        pygame.draw.circle(sprite, WHITE, (c, c), int(radius * 0.6), 1)
+        # Clock hands
+        hand_length = radius * 0.5
+        # Hour hand
+        hour_angle = rotation
+        pygame.draw.line(sprite, WHITE, 
+                        (c, c),
+                        (c + math.cos(hour_angle) * hand_length * 0.6,
+                         c + math.sin(hour_angle) * hand_length * 0.6), 2)
+        # Minute hand
+        minute_angle = rotation * 2
+        pygame.draw.line(sprite, WHITE, 
+                        (c, c),
+                        (c + math.cos(minute_angle) * hand_length,
+                         c + math.sin(minute_angle) * hand_length), 1)
+        
+    elif powerup_type == "reflect":
+        # Draw a shield shape
+        shield_points = []
+        num_points = 12
+        for i in range(num_points):
+            angle = rotation + i * (2 * math.pi / num_points)
+            # Make the shield slightly oval
+            x_radius = radius * 0.7
+            y_radius = radius * 0.8
+            point = (
+                c + math.cos(angle) * x_radius,
+                c + math.sin(angle) * y_radius
+            )
+            shield_points.append(point)
+        
+        pygame.draw.polygon(sprite, WHITE, shield_points, 1)
+        # Draw cross on shield
+        pygame.draw.line(sprite, WHITE, 
+                        (c - radius * 0.4, c),
+                        (c + radius * 0.4, c), 1)
+        pygame.draw.line(sprite, WHITE, 
+                        (c, c - radius * 0.4),
+                        (c, c + radius * 0.4), 1)
+        
+    elif powerup_type == "speed":
+        # Draw a lightning bolt
+        bolt_points = [
+            (c, c - radius * 0.7),  # Top
+            (c - radius * 0.3, c),  # Middle left
+            (c, c),                 # Middle
+            (c + radius * 0.3, c),  # Middle right
+            (c, c + radius * 0.7),  # Bottom
+        ]
+        pygame.draw.lines(sprite, WHITE, False, bolt_points, 2)
+    
+    return sprite
+
 
 # Explosion effect
-def create_explosion(x: float, y: float, color: Tuple[int, int, int], 
+def create_explosion(particles: ParticleSystem, x: float, y: float, color: Tuple[int, int, int], 
                     count: int = 20, 
                     size_range: Tuple[float, float] = (2, 5), 
-                    speed_range: Tuple[float, float] = (1, 3)) -> List[Particle]:
-    particles: List[Particle] = []
-    for _ in range(count):
-        angle: float = random.uniform(0, math.pi * 2)
-        speed: float = random.uniform(speed_range[0], speed_range[1])
-        vel_x: float = math.cos(angle) * speed
-        vel_y: float = math.sin(angle) * speed
-        size: float = random.uniform(size_range[0], size_range[1])
-        life: int = random.randint(20, 40)
-        
-        particles.append(Particle(x, y, color, velocity=(vel_x, vel_y), size=size, life=life))
-    
-    return particles
+                    speed_range: Tuple[float, float] = (1, 3)) -> None:
+    rng = particles.rng
+    count = max(1, round(count * particles.emission))
+    angle = rng.uniform(0, math.pi * 2, count)
+    speed = rng.uniform(speed_range[0], speed_range[1], count)
+    particles.emit(x, y, color,
+                   np.cos(angle) * speed, np.sin(angle) * speed,
+                   size=rng.uniform(size_range[0], size_range[1], count),
+                   life=rng.integers(20, 40, count, endpoint=True))
 
 # Start screen with enhanced visuals
-def start_screen() -> str:
-    # Create stars for background
-    stars: List[Star] = [Star() for _ in range(100)]
-    
-    # Title animation variables
-    title_scale: float = 0.0
-    title_target_scale: float = 1.0
+class Menu:
+    """Title screen: animated title, pulsing mode buttons and drifting particles."""
     
-    # Button animation
-    button_pulse: float = 0.0
-    
-    # Fonts
-    title_font = pygame.font.SysFont(None, 100)
-    font_medium = pygame.font.SysFont(None, 48)
-    font_small = pygame.font.SysFont(None, 36)
-    
-    # Particles
-    particles: List[Particle] = []
-    
-    # Title text
-    title_text = title_font.render("COSMIC DODGE", True, NEON_BLUE)
-    normal_text = font_medium.render("1: Normal Mode", True, GREEN)
-    hard_text = font_medium.render("2: Hard Mode", True, RED)
-    instruction_text = font_small.render("Move mouse to avoid asteroids", True, WHITE)
+    def __init__(self, starfield: Starfield, regions: Optional[DirtyRegions] = None):
+        self.starfield = starfield
+        self.regions = regions  # Only redraw what changed when given
+        
+        # Title animation variables
+        self.title_scale: float = 0.0
+        self.title_target_scale: float = 1.0
+        
+        # Button animation
+        self.button_pulse: float = 0.0
+        self.elapsed: float = 0.0  # Seconds since the menu opened
+        
+        # Fonts
+        self.title_font = get_font(100)
+        self.font_medium = get_font(48)
+        self.font_small = get_font(36)
+        
+        # Particles
+        self.particles = ParticleSystem()
     
-    difficulty = None
-    start_time = time.time()
+    def select(self, difficulty: str) -> None:
+        # Add explosion effect when selecting
+        color = GREEN if difficulty == "normal" else RED
+        create_explosion(self.particles, WIDTH // 2, HEIGHT // 2, color, 50, (2, 6), (2, 5))
     
-    while difficulty is None:
-        current_time = time.time()
-        elapsed = current_time - start_time
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_1:
-                    difficulty = "normal"
-                    # Add explosion effect when selecting
-                    particles.extend(create_explosion(WIDTH // 2, HEIGHT // 2, GREEN, 50, (2, 6), (2, 5)))
-                elif event.key == pygame.K_2:
-                    difficulty = "hard"
-                    # Add explosion effect when selecting
-                    particles.extend(create_explosion(WIDTH // 2, HEIGHT // 2, RED, 50, (2, 6), (2, 5)))
+    def update(self, elapsed: float, frames: float = 1.0) -> None:
+        """Advance the animations by ``frames`` reference frames, ``elapsed`` seconds after opening."""
+        self.elapsed = elapsed
         
         # Update stars
-        for star in stars:
-            star.update()
+        if self.regions is None:
+            self.starfield.update(frames)
         
         # Update title animation
-        title_scale = min(title_target_scale, title_scale + 0.02)
+        self.title_scale = min(self.title_target_scale, self.title_scale + 0.02 * frames)
         
         # Update button pulse
-        button_pulse = (button_pulse + 0.05) % (2 * math.pi)
+        self.button_pulse = (self.button_pulse + 0.05 * frames) % (2 * math.pi)
         
         # Add random particles occasionally
-        if random.random() < 0.1:
+        if random.random() < per_tick_chance(0.1, frames):
             x = random.randint(0, WIDTH)
             y = random.randint(0, HEIGHT)
             color = random.choice([NEON_BLUE, NEON_GREEN, CYAN, PURPLE])
-            particles.append(Particle(x, y, color, size=random.uniform(1, 3), life=random.randint(20, 40)))
+            self.particles.emit_drift(x, y, color, (1, 3), (20, 40))
         
         # Update particles
-        for particle in particles[:]:
-            particle.update()
-            if particle.life <= 0:
-                particles.remove(particle)
-        
-        # Clear screen with space background
-        screen.fill(BG_COLOR)
-        
-        # Draw stars
-        for star in stars:
-            star.draw(screen)
+        self.particles.update(frames)
+    
+    def clear(self, surface: Surface) -> None:
+        """Clear the screen to the star background, or with dirty rects only what is marked."""
+        regions = self.regions
+        if regions is None:
+            # Clear screen with space background
+            surface.fill(BG_COLOR)
+            
+            # Draw stars
+            self.starfield.draw(surface)
+        else:
+            regions.mark_circles(*self.particles.extents())
+            regions.restore(surface)
+    
+    def draw_particles(self, surface: Surface) -> None:
+        commands = DrawList()
+        self.particles.draw(commands, 0)
+        commands.flush(PygameBackend(surface))
+    
+    def draw(self, surface: Surface) -> None:
+        elapsed = self.elapsed
+        title_scale = self.title_scale
+        scaled_title = text_cache.render(self.title_font, "COSMIC DODGE", NEON_BLUE, title_scale)
+        normal_pulse = math.sin(self.button_pulse) * 0.1 + 1.0
+        hard_pulse = math.sin(self.button_pulse + math.pi) * 0.1 + 1.0
+        normal_scaled = text_cache.render(self.font_medium, "1: Normal Mode", GREEN, normal_pulse)
+        hard_scaled = text_cache.render(self.font_medium, "2: Hard Mode", RED, hard_pulse)
+        
+        regions = self.regions
+        if regions is not None:
+            # Clear only the particles, title, buttons and instructions
+            regions.mark((WIDTH // 2 - scaled_title.get_width() // 2 - 10,
+                          HEIGHT // 4 - scaled_title.get_height() // 2 - 10,
+                          scaled_title.get_width() + 20, scaled_title.get_height() + 20))
+            for scaled, y in ((normal_scaled, HEIGHT // 2), (hard_scaled, HEIGHT // 2 + 60)):
+                regions.mark((WIDTH // 2 - scaled.get_width() // 2 - 20, y - scaled.get_height() // 2 - 10,
+                              scaled.get_width() + 40, scaled.get_height() + 20))
+            if elapsed > 1.0:
+                regions.mark((0, HEIGHT * 3 // 4, WIDTH, self.font_small.get_linesize()))
+        self.clear(surface)
         
         # Draw particles
-        for particle in particles:
-            particle.draw(screen)
+        self.draw_particles(surface)
         
         # Draw title with scaling effect
-        scaled_title = pygame.transform.scale(
-            title_text, 
-            (int(title_text.get_width() * title_scale), 
-             int(title_text.get_height() * title_scale))
-        )
-        screen.blit(scaled_title, 
-                   (WIDTH // 2 - scaled_title.get_width() // 2, 
-                    HEIGHT // 4 - scaled_title.get_height() // 2))
+        surface.blit(scaled_title, 
+                    (WIDTH // 2 - scaled_title.get_width() // 2, 
+                     HEIGHT // 4 - scaled_title.get_height() // 2))
         
         # Draw pulsing outline around title
         if title_scale >= 0.9:
@@ -729,27 +1958,12 @@ def start_screen() -> str:
                 int(NEON_BLUE[1] * pulse),
                 int(NEON_BLUE[2] * pulse)
             )
-            pygame.draw.rect(screen, outline_color, 
+            pygame.draw.rect(surface, outline_color, 
                             (WIDTH // 2 - scaled_title.get_width() // 2 - 10,
                              HEIGHT // 4 - scaled_title.get_height() // 2 - 10,
                              scaled_title.get_width() + 20,
                              scaled_title.get_height() + 20), 2)
         
-        # Draw buttons with pulse effect
-        normal_pulse = math.sin(button_pulse) * 0.1 + 1.0
-        hard_pulse = math.sin(button_pulse + math.pi) * 0.1 + 1.0
-        
-        normal_scaled = pygame.transform.scale(
-            normal_text,
-            (int(normal_text.get_width() * normal_pulse),
-             int(normal_text.get_height() * normal_pulse))
-        )
-        hard_scaled = pygame.transform.scale(
-            hard_text,
-            (int(hard_text.get_width() * hard_pulse),
-             int(hard_text.get_height() * hard_pulse))
-        )
-        
         # Draw button backgrounds
         normal_rect = pygame.Rect(
             WIDTH // 2 - normal_scaled.get_width() // 2 - 20,
@@ -757,8 +1971,8 @@ def start_screen() -> str:
             normal_scaled.get_width() + 40,
             normal_scaled.get_height() + 20
         )
-        pygame.draw.rect(screen, (0, 50, 0), normal_rect, 0, 10)
-        pygame.draw.rect(screen, GREEN, normal_rect, 2, 10)
+        pygame.draw.rect(surface, (0, 50, 0), normal_rect, 0, 10)
+        pygame.draw.rect(surface, GREEN, normal_rect, 2, 10)
         
         hard_rect = pygame.Rect(
             WIDTH // 2 - hard_scaled.get_width() // 2 - 20,
@@ -766,346 +1980,1548 @@ def start_screen() -> str:
             hard_scaled.get_width() + 40,
             hard_scaled.get_height() + 20
         )
-        pygame.draw.rect(screen, (50, 0, 0), hard_rect, 0, 10)
-        pygame.draw.rect(screen, RED, hard_rect, 2, 10)
+        pygame.draw.rect(surface, (50, 0, 0), hard_rect, 0, 10)
+        pygame.draw.rect(surface, RED, hard_rect, 2, 10)
         
         # Draw button text
-        screen.blit(normal_scaled, 
-                   (WIDTH // 2 - normal_scaled.get_width() // 2, 
-                    HEIGHT // 2 - normal_scaled.get_height() // 2))
-        screen.blit(hard_scaled, 
-                   (WIDTH // 2 - hard_scaled.get_width() // 2, 
-                    HEIGHT // 2 + 60 - hard_scaled.get_height() // 2))
+        surface.blit(normal_scaled, 
+                    (WIDTH // 2 - normal_scaled.get_width() // 2, 
+                     HEIGHT // 2 - normal_scaled.get_height() // 2))
+        surface.blit(hard_scaled, 
+                    (WIDTH // 2 - hard_scaled.get_width() // 2, 
+                     HEIGHT // 2 + 60 - hard_scaled.get_height() // 2))
         
         # Draw instruction with fade-in effect
         if elapsed > 1.0:  # Start showing instructions after 1 second
-            alpha = min(255, int((elapsed - 1.0) * 255))
-            instruction_surface = font_small.render("Move mouse to avoid asteroids", True, (255, 255, 255))
-            screen.blit(instruction_surface, 
-                       (WIDTH // 2 - instruction_surface.get_width() // 2, 
-                        HEIGHT * 3 // 4))
-        
+            instruction_surface = text_cache.render(self.font_small, "Move mouse to avoid asteroids", WHITE)
+            surface.blit(instruction_surface, 
+                        (WIDTH // 2 - instruction_surface.get_width() // 2, 
+                         HEIGHT * 3 // 4))
+
+
+# Frame pacing
+class FrameScheduler:
+    """Paces the frames of every scene against ``time.perf_counter``.
+    
+    ``wait`` sleeps until just before the frame's deadline and spins
+    through the rest, which holds the rate far more evenly than the
+    millisecond sleeps of ``Clock.tick``. How early it wakes follows how
+    much the OS has been oversleeping, so the spin stays short. While the window is unfocused, or
+    a scene that allows it has seen no input for IDLE_AFTER seconds, the
+    rate drops to BACKGROUND_FPS or IDLE_FPS, so an unattended title screen
+    leaves the CPU nearly idle. With vsync the display paces full-rate
+    frames and only the lowered rates are slept for. Frames whose work ran
+    past their deadline are counted and kept in ``missed``.
+    """
+    
+    SPIN_RANGE = (0.0002, 0.004)  # Bounds on how early, in seconds, to stop sleeping and spin
+    BACKGROUND_FPS = 10
+    IDLE_FPS = 20
+    IDLE_AFTER = 10.0  # Seconds without input before a scene counts as idle
+    INPUT_EVENTS = frozenset((pygame.KEYDOWN, pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN))
+    HISTORY = 600  # Missed deadlines kept
+    
+    def __init__(self, fps: int = 60, vsync: bool = False):
+        self.fps: int = fps  # Full rate; 0 runs unpaced
+        self.vsync: bool = vsync
+        self.focused: bool = True
+        self.idle_allowed: bool = False  # Whether the current scene may slow down when left alone
+        now = time.perf_counter()
+        self.last_input: float = now
+        self.frame_start: float = now
+        self.deadline: Optional[float] = None
+        self.period: float = 0.0  # Frame length the deadline was set for
+        self.work_ms: float = 0.0  # Time the last frame spent before waiting
+        self.frame_time: float = 1.0 / fps if fps else 0.0  # Seconds between the last two frames
+        self.oversleep: float = 0.001  # Running average of how late sleeps wake up
+        self.frames: int = 0
+        self.missed: Deque[Tuple[int, float]] = deque(maxlen=self.HISTORY)  # (frame, ms late)
+        self.missed_total: int = 0
+    
+    def handle(self, event: pygame.event.Event) -> None:
+        """Let the scheduler see an event, for focus and idle tracking."""
+        if event.type == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+        elif event.type == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        elif event.type in self.INPUT_EVENTS:
+            self.last_input = time.perf_counter()
+    
+    def target_fps(self, now: float) -> int:
+        if not self.focused:
+            return self.BACKGROUND_FPS
+        if self.idle_allowed and now - self.last_input > self.IDLE_AFTER:
+            return self.IDLE_FPS
+        return self.fps
+    
+    def reset(self) -> None:
+        """Start pacing afresh, for example after a scene spent a while loading."""
+        self.deadline = None
+        self.frame_start = time.perf_counter()
+    
+    def wait(self) -> float:
+        """End the frame: wait for its deadline and return the seconds since the previous one."""
+        now = time.perf_counter()
+        self.work_ms = (now - self.frame_start) * 1000.0
+        self.frames += 1
+        fps = self.target_fps(now)
+        paced = fps > 0 and not (self.vsync and fps >= self.fps)
+        if paced:
+            period = 1.0 / fps
+            if self.deadline is None or period != self.period:
+                self.deadline, self.period = self.frame_start + period, period
+            if now > self.deadline:
+                # Late: record it and start a fresh schedule rather than rushing to catch up
+                self.missed.append((self.frames, (now - self.deadline) * 1000.0))
+                self.missed_total += 1
+                self.deadline = now
+            else:
+                low, high = self.SPIN_RANGE
+                sleep = self.deadline - now - min(high, max(low, self.oversleep * 2))
+                if sleep > 0:
+                    time.sleep(sleep)
+                    late = time.perf_counter() - now - sleep
+                    self.oversleep += (late - self.oversleep) * 0.1
+                while time.perf_counter() < self.deadline:
+                    pass
+            self.deadline += period
+        else:
+            self.deadline = None
+        end = time.perf_counter()
+        self.frame_time = end - self.frame_start
+        self.frame_start = end
+        return self.frame_time
+    
+    def report(self) -> str:
+        if not self.frames:
+            return "No frames paced"
+        text = f"{self.frames} frames, {self.missed_total} missed their deadline ({self.missed_total / self.frames:.1%})"
+        if self.missed:
+            late = np.array([ms for _, ms in self.missed])
+            text += f"; last {late.size} missed by {late.mean():.1f} ms on average, {late.max():.1f} ms at worst"
+        return text
+
+
+scheduler = FrameScheduler()
+
+
+class RenderCanvas:
+    """Off-screen surface the stars and game world are drawn into, ``scale`` times the logical size.
+    
+    Below 1 it cuts the pixels filled every frame by the square of the
+    scale; above 1 the world is supersampled. ``present_to`` stretches it
+    over the screen, which keeps the logical size, so the HUD and menus
+    drawn on top stay sharp and the simulation and mouse keep logical
+    coordinates. Growing uses transform.scale, blocky but cheapest, unless
+    ``smooth``; shrinking always uses transform.smoothscale.
+    """
+    
+    def __init__(self, scale: float, smooth: bool = False):
+        self.scale: float = scale
+        self.smooth: bool = smooth or scale > 1.0
+        self.surface: Surface = pygame.Surface((round(WIDTH * scale), round(HEIGHT * scale)), 0, init_display())
+    
+    def present_to(self, screen: Surface) -> None:
+        if self.smooth:
+            pygame.transform.smoothscale(self.surface, screen.get_size(), screen)
+        else:
+            pygame.transform.scale(self.surface, screen.get_size(), screen)
+
+
+def integer_scale(scale: float) -> float:
+    """The nearest scale at which the world maps onto the screen by a whole number of pixels."""
+    if scale >= 1.0:
+        return float(round(scale))
+    return 1.0 / round(1.0 / scale)
+
+
+def present(regions: Optional[DirtyRegions] = None) -> None:
+    """Send the finished frame to the display, only the dirty regions if given."""
+    if regions is None:
         pygame.display.update()
-        pygame.time.Clock().tick(60)
+    else:
+        regions.flush()
+
+
+def start_screen(dirty: bool = False) -> str:
+    screen = init_display()
+    
+    # Shared star background
+    starfield = get_starfield()
+    regions = DirtyRegions(make_background(starfield)) if dirty else None
+    menu = Menu(starfield, regions)
+    
+    difficulty = None
+    start_time = time.time()
+    # Menus may drop to a low frame rate when nobody is touching them
+    scheduler.idle_allowed = True
+    scheduler.reset()
+    frames = 1.0
+    
+    while difficulty is None:
+        current_time = time.time()
+        elapsed = current_time - start_time
+        
+        for event in pygame.event.get():
+            scheduler.handle(event)
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_1:
+                    difficulty = "normal"
+                    menu.select(difficulty)
+                elif event.key == pygame.K_2:
+                    difficulty = "hard"
+                    menu.select(difficulty)
+        
+        menu.update(elapsed, frames)
+        menu.draw(screen)
+        present(regions)
+        frames = min(scheduler.wait(), 0.25) * REFERENCE_FPS
     
     # Wait a moment before returning to show explosion effect
     if difficulty:
         start_time = time.time()
         while time.time() - start_time < 0.5:  # Wait for 0.5 seconds
             # Update and draw particles
-            screen.fill(BG_COLOR)
-            
-            # Draw stars
-            for star in stars:
-                star.update()
-                star.draw(screen)
+            if regions is None:
+                starfield.update(frames)
+            menu.particles.update(frames)
+            menu.clear(screen)
             
             # Draw particles
-            for particle in particles[:]:
-                particle.update()
-                if particle.life <= 0:
-                    particles.remove(particle)
-                particle.draw(screen)
-            
-            pygame.display.update()
-            pygame.time.Clock().tick(60)
+            menu.draw_particles(screen)
+            present(regions)
+            frames = min(scheduler.wait(), 0.25) * REFERENCE_FPS
     
+    scheduler.idle_allowed = False
     return difficulty
 
-# Game loop with enhanced visuals
-def game(difficulty_level: str) -> None:
-    # Game variables
-    balls: List[Ball] = []
-    powerups: List[PowerUp] = []
-    explosion_particles: List[Particle] = []
-    score: int = 0
-    start_time: float = time.time()
-    last_score_update: float = start_time
-    ball_spawn_timer: int = 0
-    homing_ball_timer: int = 0
-    powerup_timer: int = 0
-    game_over: bool = False
-    clock = pygame.time.Clock()
-    
-    # Create stars for background
-    stars: List[Star] = [Star() for _ in range(100)]
-    
-    # Create player
-    player: Player = Player(WIDTH // 2, HEIGHT // 2)
-    
-    # Dynamic difficulty variables
-    player_skill: float = 0.5  # Start at medium skill level (0.0 to 1.0)
-    near_miss_count: int = 0
-    last_near_miss_check: float = time.time()
-    
-    # Power-up status
-    active_powerups: Dict[str, Dict[str, Any]] = {
-        "invincible": {"active": False, "end_time": 0},
-        "slow": {"active": False, "end_time": 0},
-        "reflect": {"active": False, "end_time": 0},
-        "speed": {"active": False, "end_time": 0}
-    }
+# Quality tiers
+class QualityTier(NamedTuple):
+    name: str
+    emission: float  # Scale on particle emission chances and explosion sizes
+    max_particles: int  # Cap on live particles per particle system
+    antialias: bool  # Anti-aliased particle outlines
+    star_depths: int  # Starfield layers drawn, nearest first
+    rotation_steps: int  # Distinct asteroid sprite angles
+
+
+QUALITY_TIERS: List[QualityTier] = [
+    QualityTier("high", 1.0, 4000, True, 3, 32),
+    QualityTier("medium", 0.6, 1500, True, 3, 32),
+    QualityTier("low", 0.35, 600, False, 2, 16),
+    QualityTier("minimal", 0.15, 250, False, 1, 8),
+]
+
+
+class QualityGovernor:
+    """Moves through QUALITY_TIERS to keep frame work time within budget.
+
+    Decisions look at how many frames in a window missed a target, not at
+    runs or averages. The tier drops once DROP_SHARE of the last
+    DROP_FRAMES frames went over budget, so jittery frames that are over
+    every other time still count. It rises only once nearly all of a
+    longer window, all but RAISE_SHARE, stayed under RAISE_FRACTION of
+    the budget. A single hitch therefore neither drops a tier nor spoils a
+    rise. Every change restarts both windows, so each tier is judged on
+    its own frames. A drop right after a rise doubles the raise window,
+    so the tier settles instead of oscillating around the edge of the
+    budget.
+    """
     
-    # Set difficulty parameters
-    if difficulty_level == "normal":
-        base_difficulty_multiplier = 1.0
-        homing_ball_threshold = 0.5  # When to start spawning homing balls
-        max_difficulty = 0.9
-        difficulty_time = 60  # Seconds to reach max difficulty
-    else:  # Hard mode
-        base_difficulty_multiplier = 1.5
-        homing_ball_threshold = 0.3  # Earlier homing balls
-        max_difficulty = 1.0
-        difficulty_time = 45  # Reach max difficulty faster
+    DROP_FRAMES: int = 30
+    DROP_SHARE: float = 0.5
+    RAISE_FRAMES: int = 180
+    RAISE_FRACTION: float = 0.6
+    RAISE_SHARE: float = 0.05
+    MAX_RAISE_FRAMES: int = 3600
     
-    # Font settings
-    font = pygame.font.SysFont(None, 36)
-    small_font = pygame.font.SysFont(None, 24)
-    large_font = pygame.font.SysFont(None, 72)
+    def __init__(self, budget_ms: float = 1000 / 60, level: int = 0):
+        self.budget_ms: float = budget_ms
+        self.level: int = level  # Index into QUALITY_TIERS
+        self.raise_frames: int = self.RAISE_FRAMES
+        self.samples: Deque[float] = deque(maxlen=self.MAX_RAISE_FRAMES)
+        self.frames_since_raise: Optional[int] = None
     
-    # UI animation variables
-    score_pulse = 0
-    score_flash = 0
+    @property
+    def tier(self) -> QualityTier:
+        return QUALITY_TIERS[self.level]
     
-    # Game over animation
-    game_over_alpha = 0
-    game_over_scale = 0
+    def share_over(self, frames: int, limit_ms: float) -> float:
+        """Fraction of the last ``frames`` frames that took longer than ``limit_ms``."""
+        return sum(ms > limit_ms for ms in itertools.islice(reversed(self.samples), frames)) / frames
     
-    while True:
-        current_time = time.time()
-        elapsed_time = current_time - start_time
+    def update(self, frame_ms: float) -> bool:
+        """Add one frame's work time; return whether the tier changed."""
+        samples = self.samples
+        samples.append(frame_ms)
+        if self.frames_since_raise is not None:
+            self.frames_since_raise += 1
+        
+        if len(samples) >= self.DROP_FRAMES and self.level < len(QUALITY_TIERS) - 1:
+            if self.share_over(self.DROP_FRAMES, self.budget_ms) >= self.DROP_SHARE:
+                if self.frames_since_raise is not None and self.frames_since_raise < self.raise_frames:
+                    self.raise_frames = min(self.raise_frames * 2, self.MAX_RAISE_FRAMES)
+                self.frames_since_raise = None
+                self.level += 1
+                samples.clear()
+                return True
+        
+        if len(samples) >= self.raise_frames and self.level > 0:
+            if self.share_over(self.raise_frames, self.budget_ms * self.RAISE_FRACTION) <= self.RAISE_SHARE:
+                self.frames_since_raise = 0
+                self.level -= 1
+                samples.clear()
+                return True
+        return False
+
+
+# Frame profiling
+class FrameProfiler:
+    """Times the named phases of each frame and shows them in an overlay.
+
+    Between ``begin_frame`` and ``end_frame`` every ``mark`` closes the
+    running phase and starts the named one, timed with perf_counter_ns.
+    A phase marked more than once in a frame (the simulation can tick
+    several times) adds up. Recent frames feed the rolling statistics and
+    the frame-time graph. Every recorded frame is kept for ``export_json``
+    and ``export_chrome_trace``, up to ``capture_frames``. Disabled
+    profilers ignore every call.
+    """
+    
+    HISTORY: int = 240  # Frames in the rolling statistics and graph
+    REFRESH: int = 30  # Frames between overlay redraws; composing one costs a few ms
+    PANEL_SIZE: Tuple[int, int] = (300, 230)
+    GRAPH_HEIGHT: int = 60
+    
+    def __init__(self, budget_ms: float = 1000 / 60, capture_frames: int = 36_000):
+        self.budget_ms: float = budget_ms
+        self.enabled: bool = False
+        # (frame ms, {phase: ms}) of recent frames
+        self.history: Deque[Tuple[float, Dict[str, float]]] = deque(maxlen=self.HISTORY)
+        # (frame start ns, frame ns, [(phase, start ns, ns)]) of every recorded frame
+        self.capture: Deque[Tuple[int, int, List[Tuple[str, int, int]]]] = deque(maxlen=capture_frames)
+        self.frame_start: int = 0
+        self.phase: Optional[str] = None
+        self.phase_start: int = 0
+        self.spans: List[Tuple[str, int, int]] = []
+        self.panel: Optional[Surface] = None
+        self.frames_since_refresh: int = 0
+        self.rect = pygame.Rect(10, HEIGHT - self.PANEL_SIZE[1] - 10, *self.PANEL_SIZE)
+    
+    def toggle(self) -> None:
+        self.enabled = not self.enabled
+        self.phase = None
+    
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self.frame_start = self.phase_start = time.perf_counter_ns()
+        self.phase = None
+        self.spans = []
+    
+    def mark(self, name: str) -> None:
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self.phase is not None:
+            self.spans.append((self.phase, self.phase_start, now - self.phase_start))
+        self.phase = name
+        self.phase_start = now
+    
+    def end_frame(self) -> None:
+        if not self.enabled or not self.frame_start:
+            return
+        now = time.perf_counter_ns()
+        if self.phase is not None:
+            self.spans.append((self.phase, self.phase_start, now - self.phase_start))
+        self.phase = None
+        phases: Dict[str, float] = {}
+        for name, _, duration in self.spans:
+            phases[name] = phases.get(name, 0.0) + duration / 1e6
+        self.history.append(((now - self.frame_start) / 1e6, phases))
+        self.capture.append((self.frame_start, now - self.frame_start, self.spans))
+        self.frame_start = 0
+    
+    def stats(self) -> Tuple[Dict[str, float], Dict[str, Tuple[float, float, float]], int]:
+        """Frame time (avg, p95, p99), the same per phase, and how many recent frames ran over budget."""
+        names: Dict[str, None] = {}
+        for _, phases in self.history:
+            names.update(dict.fromkeys(phases))
+        # One row per frame: the frame time, then every phase
+        table = np.array([[total] + [phases.get(name, 0.0) for name in names] for total, phases in self.history])
+        means = table.mean(axis=0)
+        p95, p99 = np.percentile(table, (95, 99), axis=0)
+        per_phase = {name: (float(means[i]), float(p95[i]), float(p99[i]))
+                     for i, name in sorted(enumerate(names, 1), key=lambda item: -means[item[0]])}
+        over = int((table[:, 0] > self.budget_ms).sum())
+        return {"avg": float(means[0]), "p95": float(p95[0]), "p99": float(p99[0])}, per_phase, over
+    
+    def draw(self, surface: Surface) -> None:
+        """Draw the overlay, refreshing its contents every REFRESH frames."""
+        if not self.enabled or not self.history:
+            return
+        self.frames_since_refresh += 1
+        if self.panel is None or self.frames_since_refresh >= self.REFRESH:
+            self.frames_since_refresh = 0
+            with font_lock:
+                self._compose_panel()
+        assert self.panel is not None
+        surface.blit(self.panel, self.rect)
+    
+    def _compose_panel(self) -> None:
+        if self.panel is None:
+            self.panel = pygame.Surface(self.PANEL_SIZE)
+            self.panel.set_alpha(210)
+        panel = self.panel
+        panel.fill((0, 0, 0))
+        font = get_font(18)
+        width, height = self.PANEL_SIZE
+        frame, per_phase, over = self.stats()
+        
+        # Summary line, red while any recent frame blew the budget
+        summary_color = RED if over else GREEN
+        summary = (f"frame {frame['avg']:.2f} p95 {frame['p95']:.2f} p99 {frame['p99']:.2f} ms"
+                   f"  over {over}/{len(self.history)}")
+        panel.blit(font.render(summary, True, summary_color), (6, 4))
+        
+        # Phase table
+        y = 22
+        panel.blit(font.render("phase", True, CYAN), (6, y))
+        for x, label in ((150, "avg"), (200, "p95"), (250, "p99")):
+            panel.blit(font.render(label, True, CYAN), (x, y))
+        for name, values in list(per_phase.items())[:(height - self.GRAPH_HEIGHT - 50) // 14]:
+            y += 14
+            panel.blit(font.render(name, True, WHITE), (6, y))
+            for x, value in zip((150, 200, 250), values):
+                panel.blit(font.render(f"{value:.2f}", True, WHITE), (x, y))
+        
+        # Frame-time graph, scaled so the budget sits at half height
+        graph_top = height - self.GRAPH_HEIGHT - 4
+        scale = (self.GRAPH_HEIGHT / 2) / self.budget_ms
+        bar_width = max(1, (width - 12) // self.HISTORY)
+        for i, (total, _) in enumerate(self.history):
+            bar = min(self.GRAPH_HEIGHT, int(total * scale) + 1)
+            color = RED if total > self.budget_ms else GREEN
+            pygame.draw.rect(panel, color, (6 + i * bar_width, graph_top + self.GRAPH_HEIGHT - bar, bar_width, bar))
+        budget_y = graph_top + self.GRAPH_HEIGHT // 2
+        pygame.draw.line(panel, YELLOW, (6, budget_y), (width - 6, budget_y))
+    
+    def export_json(self, path: str) -> None:
+        """Write every captured frame with its per-phase milliseconds."""
+        frames = []
+        for start, duration, spans in self.capture:
+            phases: Dict[str, float] = {}
+            for name, _, span in spans:
+                phases[name] = phases.get(name, 0.0) + span / 1e6
+            frames.append({"start_ns": start, "ms": duration / 1e6, "phases": phases})
+        with open(path, "w") as f:
+            json.dump({"budget_ms": self.budget_ms, "frames": frames}, f)
+    
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the captured frames in Chrome trace format (chrome://tracing, Perfetto)."""
+        events: List[Dict[str, Any]] = []
+        for start, duration, spans in self.capture:
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": start / 1000, "dur": duration / 1000,
+                           "args": {"over_budget": duration / 1e6 > self.budget_ms}})
+            for name, span_start, span in spans:
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": span_start / 1000, "dur": span / 1000})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    
+    def export(self, stem: Optional[str] = None) -> Tuple[str, str]:
+        """Export both formats next to each other and return their paths."""
+        if stem is None:
+            stem = time.strftime("profile-%Y%m%d-%H%M%S")
+        json_path = stem + ".json"
+        trace_path = stem + ".trace.json"
+        self.export_json(json_path)
+        self.export_chrome_trace(trace_path)
+        return json_path, trace_path
+
+
+# Broadphase for collision and proximity queries
+class SpatialHash:
+    """Uniform grid of circles for "what is within r of this point" queries.
+
+    ``build`` files each circle under every cell its bounding box touches,
+    using a single sort over (cell, item) pairs, so rebuilding it every
+    tick stays cheap. A query then only looks at the few cells around the
+    query circle.
+    """
+
+    KEY_STRIDE: int = 1 << 20  # Cell (cx, cy) is stored under cx * KEY_STRIDE + cy
+
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size: float = cell_size
+        self.cells: Dict[int, Tuple[int, int]] = {}  # Cell key -> slice of cell_items
+        self.cell_items: np.ndarray = np.zeros(0, np.intp)
+        self.xs: np.ndarray = np.zeros(0)
+        self.ys: np.ndarray = np.zeros(0)
+        self.radii: np.ndarray = np.zeros(0)
+        self.objects: Optional[List[Any]] = None
+    
+    def build(self, xs: np.ndarray, ys: np.ndarray, radii: np.ndarray,
+              objects: Optional[List[Any]] = None) -> None:
+        """Replace the contents with the given circles.
+
+        Queries return ``objects[i]`` for a hit on circle i, or just i when
+        no objects are given.
+        """
+        self.xs = np.asarray(xs, np.float64)
+        self.ys = np.asarray(ys, np.float64)
+        self.radii = np.asarray(radii, np.float64)
+        self.objects = objects
+        n = len(self.xs)
+        if n == 0:
+            self.cells = {}
+            return
+        
+        size = self.cell_size
+        cx0 = np.floor((self.xs - self.radii) / size).astype(np.int64)
+        cy0 = np.floor((self.ys - self.radii) / size).astype(np.int64)
+        span_x = np.floor((self.xs + self.radii) / size).astype(np.int64) - cx0 + 1
+        span_y = np.floor((self.ys + self.radii) / size).astype(np.int64) - cy0 + 1
+        
+        # One (cell, item) pair for every cell each circle covers
+        per_item = span_x * span_y
+        item = np.repeat(np.arange(n), per_item)
+        offset = np.arange(len(item)) - np.repeat(np.cumsum(per_item) - per_item, per_item)
+        cx = cx0[item] + offset % span_x[item]
+        cy = cy0[item] + offset // span_x[item]
+        keys = cx * self.KEY_STRIDE + cy
+        
+        order = np.argsort(keys, kind="stable")
+        self.cell_items = item[order]
+        unique_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self.cells = dict(zip(unique_keys.tolist(), zip(starts.tolist(), (starts + counts).tolist())))
+    
+    def query(self, x: float, y: float, radius: float) -> List[Any]:
+        """Return objects whose circle overlaps the circle of ``radius`` around (x, y)."""
+        size = self.cell_size
+        parts = []
+        for cx in range(int((x - radius) // size), int((x + radius) // size) + 1):
+            for cy in range(int((y - radius) // size), int((y + radius) // size) + 1):
+                span = self.cells.get(cx * self.KEY_STRIDE + cy)
+                if span is not None:
+                    parts.append(self.cell_items[span[0]:span[1]])
+        if not parts:
+            return []
+        
+        candidates = np.unique(np.concatenate(parts))
+        reach = radius + self.radii[candidates]
+        dx = self.xs[candidates] - x
+        dy = self.ys[candidates] - y
+        hits = candidates[dx * dx + dy * dy < reach * reach].tolist()
+        if self.objects is None:
+            return hits
+        return [self.objects[i] for i in hits]
+
+
+def sweep_circles(x0: float, y0: float, x1: float, y1: float, xs0: np.ndarray, ys0: np.ndarray,
+                  xs1: np.ndarray, ys1: np.ndarray, reach: np.ndarray) -> np.ndarray:
+    """When a circle moving from (x0, y0) to (x1, y1) first touches each of many moving circles.
+    
+    Both move in a straight line over the tick, so their gap is a quadratic
+    in time and its first root is the time of impact. ``reach`` is the sum
+    of the radii. Returns the fraction of the tick at which each pair
+    first overlaps, 0 if they already did at its start, or inf if they
+    never do, so objects that pass through each other within one tick
+    still collide.
+    """
+    dx = xs0 - x0
+    dy = ys0 - y0
+    vx = (xs1 - xs0) - (x1 - x0)
+    vy = (ys1 - ys0) - (y1 - y0)
+    a = vx * vx + vy * vy
+    b = dx * vx + dy * vy
+    c = dx * dx + dy * dy - reach * reach
+    discriminant = b * b - a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        toi = (-b - np.sqrt(discriminant)) / a
+    # Closing in (b < 0) and close enough at the nearest point, before the tick ends
+    hit = (b < 0) & (discriminant >= 0) & (toi <= 1.0)
+    return np.where(c < 0, 0.0, np.where(hit, toi, np.inf))
+
+
+# Player input for one simulation step
+class InputState(NamedTuple):
+    target_x: float
+    target_y: float
+
+
+# Difficulty curve, per difficulty level
+class DifficultyParams(NamedTuple):
+    multiplier: float  # Scales the whole difficulty curve
+    homing_threshold: float  # Difficulty at which homing balls start spawning
+    max_difficulty: float  # Cap on the time-based part of the curve
+    ramp_time: float  # Seconds to reach max_difficulty
+    spawn_frames: int = 30  # Frames between ball spawns at zero difficulty
+    spawn_ramp: float = 20.0  # Frames taken off that interval per unit of difficulty
+    min_spawn_frames: int = 10  # Shortest interval between ball spawns
+    near_misses_per_step: int = 5  # Near misses that raise the skill rating one step
+    skill_step: float = 0.05
+
+
+DIFFICULTY_PRESETS: Dict[str, DifficultyParams] = {
+    "normal": DifficultyParams(1.0, 0.5, 0.9, 60.0),
+    "hard": DifficultyParams(1.5, 0.3, 1.0, 45.0),  # Earlier homing balls, max difficulty sooner
+}
+
+
+# Everything the renderer reads from a Simulation, frozen after one tick
+class SimSnapshot(NamedTuple):
+    balls: BallStore
+    powerups: List[PowerUp]
+    player: Player
+    trail_particles: ParticleSystem
+    explosion_particles: ParticleSystem
+    active_powerups: Dict[str, Dict[str, Any]]
+    quality: QualityTier
+    params: DifficultyParams
+    difficulty_level: str
+    difficulty: float
+    score: int
+    score_flash: float
+    time: float
+    game_over: bool
+    ticks: int  # Ticks simulated when it was taken
+    published: float  # time.perf_counter() when it was handed to the renderer
+
+
+# Game simulation, independent of any display
+class Simulation:
+    """All gameplay state for one run, advanced ``sim_hz`` times a second with ``step``.
+
+    Nothing in here touches a Surface, so it can be driven headless (for
+    example under ``SDL_VIDEODRIVER=dummy``) as fast as the CPU allows.
+    The clock counts whole ticks, so game time reads the same at the same
+    tick however many were run to get there.
+    """
+
+    def __init__(self, difficulty_level: str, seed: Optional[int] = None,
+                 params: Optional[DifficultyParams] = None, sim_hz: float = REFERENCE_FPS):
+        if sim_hz <= 0:
+            raise ValueError(f"simulation rate must be positive, got {sim_hz} Hz")
+        self.difficulty_level: str = difficulty_level
+        self.sim_hz: float = sim_hz
+        self.dt: float = 1.0 / sim_hz  # Seconds per tick
+        # Difficulty curve; a tuning run can pass its own instead of the level's preset
+        self.params: DifficultyParams = params if params is not None else DIFFICULTY_PRESETS[difficulty_level]
+        self.seed: int = seed if seed is not None else random.randrange(2 ** 63)
+        # Private random streams, so rendering and other code can never shift the game's
+        gameplay_seed, ball_seed, trail_seed, explosion_seed = np.random.SeedSequence(self.seed).spawn(4)
+        self.rng = random.Random(int(gameplay_seed.generate_state(2, np.uint64)[0]))  # Spawns and gameplay rolls
+        self.balls = BallStore(rng=np.random.default_rng(ball_seed))
+        self.powerups: List[PowerUp] = []
+        self.powerup_pool = PowerUpPool()
+        # Broadphase grids, rebuilt every tick after objects move
+        self.ball_grid = SpatialHash()
+        self.powerup_grid = SpatialHash()
+        # Thruster and object trails, drawn behind objects
+        self.trail_particles = ParticleSystem(rng=np.random.default_rng(trail_seed))
+        # Explosions, drawn on top
+        self.explosion_particles = ParticleSystem(rng=np.random.default_rng(explosion_seed), additive=True)
+        self.player: Player = Player(WIDTH // 2, HEIGHT // 2, self.rng)
+        self.score: int = 0
+        self.ticks: int = 0  # Ticks simulated
+        self.time: float = 0.0  # Simulation clock in seconds, always ticks / sim_hz
+        self.last_score_update: float = 0.0
+        # Spawn timers, in seconds of simulation time
+        self.ball_spawn_timer: float = 0.0
+        self.homing_ball_timer: float = 0.0
+        self.powerup_timer: float = 0.0
+        self.game_over: bool = False
+        self.difficulty: float = 0.0
+        self.score_flash: float = 0.0
+        # Sound cues raised during the last step ("explosion", "powerup", "game_over")
+        self.events: List[str] = []
+        self.profiler = FrameProfiler()  # Disabled unless the game loop hands in its own
+        self.quality_level: int = 0  # Index into QUALITY_TIERS
+        self.set_quality(0)
+        
+        # Dynamic difficulty variables
+        self.player_skill: float = 0.5  # Start at medium skill level (0.0 to 1.0)
+        self.near_miss_count: int = 0
+        self.last_near_miss_check: float = 0.0
+        
+        # Power-up status
+        self.active_powerups: Dict[str, Dict[str, Any]] = {
+            "invincible": {"active": False, "end_time": 0},
+            "slow": {"active": False, "end_time": 0},
+            "reflect": {"active": False, "end_time": 0},
+            "speed": {"active": False, "end_time": 0}
+        }
+    
+    def step(self, inputs: InputState) -> None:
+        """Advance the game by one simulation tick."""
+        self.events = []
+        self.ticks += 1
+        self.time = self.ticks / self.sim_hz
+        current_time = self.time
+        dt = self.dt
+        profiler = self.profiler
+        profiler.mark("player")
+        frames = dt * REFERENCE_FPS  # Tick length in reference frames
+        player = self.player
+        active_powerups = self.active_powerups
+        params = self.params
         
         # Calculate dynamic difficulty based on time and player skill
-        time_difficulty = min(max_difficulty, elapsed_time / difficulty_time)
-        difficulty = time_difficulty * base_difficulty_multiplier * (0.8 + player_skill * 0.4)
+        time_difficulty = min(params.max_difficulty, current_time / params.ramp_time)
+        difficulty = time_difficulty * params.multiplier * (0.8 + self.player_skill * 0.4)
+        self.difficulty = difficulty
         
         # Score update (10 points per second)
-        if current_time - last_score_update >= 1 and not game_over:
-            score += 10
-            last_score_update = current_time
-            score_flash = 1.0  # Flash score when updated
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r and game_over:
-                    return  # Return to start screen
-        
-        # Get mouse position
-        if not game_over:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
+        if current_time - self.last_score_update >= 1 and not self.game_over:
+            self.score += 10
+            self.last_score_update += 1
+            self.score_flash = 1.0  # Flash score when updated
         
         # Update player
-        if not game_over:
-            player.update(mouse_x, mouse_y, active_powerups["speed"]["active"])
-        
-        # Check for near misses (balls passing close to player)
-        if current_time - last_near_miss_check >= 0.5:  # Check every half second
-            last_near_miss_check = current_time
-            for ball in balls:
-                distance = ((player.x - ball.x) ** 2 + (player.y - ball.y) ** 2) ** 0.5
-                if player.radius + ball.radius < distance < player.radius + ball.radius + 30:
-                    near_miss_count += 1
-                    # Increase player skill rating based on near misses
-                    if near_miss_count % 5 == 0:
-                        player_skill = min(1.0, player_skill + 0.05)
+        if not self.game_over:
+            player.update(inputs.target_x, inputs.target_y, self.trail_particles,
+                          active_powerups["speed"]["active"], frames)
         
         # New ball generation (adjust frequency based on difficulty)
-        ball_spawn_timer += 1
-        spawn_rate = max(30 - int(difficulty * 20), 10)  # Higher difficulty = faster spawn rate
+        profiler.mark("spawn")
+        self.ball_spawn_timer += dt
+        # Frames between spawns; higher difficulty = faster
+        spawn_rate = max(params.spawn_frames - int(difficulty * params.spawn_ramp), params.min_spawn_frames)
         
-        if ball_spawn_timer >= spawn_rate and not game_over:
-            ball_spawn_timer = 0
-            new_ball = Ball(random.randint(0, WIDTH), difficulty)
-            balls.append(new_ball)
+        if self.ball_spawn_timer >= spawn_rate / REFERENCE_FPS and not self.game_over:
+            self.ball_spawn_timer = 0.0
+            self.balls.spawn(self.rng.randint(0, WIDTH), difficulty)
         
         # Homing ball generation
-        if difficulty >= homing_ball_threshold and not game_over:
-            homing_ball_timer += 1
+        if difficulty >= params.homing_threshold and not self.game_over:
+            self.homing_ball_timer += dt
             homing_spawn_rate = max(180 - int(difficulty * 60), 90)  # Spawn homing balls less frequently
             
-            if homing_ball_timer >= homing_spawn_rate:
-                homing_ball_timer = 0
-                new_homing_ball = Ball(random.randint(0, WIDTH), difficulty, is_homing=True, player_pos=[player.x, player.y])
-                balls.append(new_homing_ball)
+            if self.homing_ball_timer >= homing_spawn_rate / REFERENCE_FPS:
+                self.homing_ball_timer = 0.0
+                self.balls.spawn(self.rng.randint(0, WIDTH), difficulty, is_homing=True)
         
         # Power-up generation
-        powerup_timer += 1
-        powerup_spawn_rate = 300  # Spawn power-up every ~5 seconds
+        self.powerup_timer += dt
+        powerup_spawn_rate = 5.0  # Spawn power-up every ~5 seconds
         
-        if powerup_timer >= powerup_spawn_rate and not game_over:
-            powerup_timer = 0
-            if random.random() < 0.7:  # 70% chance to spawn a power-up
-                new_powerup = PowerUp(random.randint(50, WIDTH - 50), 0)
-                powerups.append(new_powerup)
+        if self.powerup_timer >= powerup_spawn_rate and not self.game_over:
+            self.powerup_timer = 0.0
+            if self.rng.random() < 0.7:  # 70% chance to spawn a power-up
+                self.powerups.append(self.powerup_pool.acquire(self.rng.randint(50, WIDTH - 50), 0, self.rng))
         
-        # Update stars
-        for star in stars:
-            star.update()
+        profiler.mark("balls")
+        self._update_balls(frames)
+        profiler.mark("powerups")
+        self._update_powerups(frames)
         
-        # Calculate time factor for ball speed (for slow power-up)
-        time_factor = 0.5 if active_powerups["slow"]["active"] else 1.0
+        # Check for near misses (balls passing close to player)
+        profiler.mark("collision")
+        if current_time - self.last_near_miss_check >= 0.5:  # Check every half second
+            self.last_near_miss_check = current_time
+            self._check_near_misses()
         
-        # Update balls
-        for ball in balls[:]:
-            # Update homing balls with current player position
-            if ball.is_homing:
-                ball.player_pos = [player.x, player.y]
-            
-            ball.update(time_factor)
-            
-            # Remove balls that are off-screen
-            if ball.y > HEIGHT + ball.radius or ball.y < -ball.radius or ball.x < -ball.radius or ball.x > WIDTH + ball.radius:
-                balls.remove(ball)
-                continue
-            
-            # Collision detection
-            if not game_over:
-                distance = ((player.x - ball.x) ** 2 + (player.y - ball.y) ** 2) ** 0.5
-                if distance < player.radius + ball.radius:
-                    if active_powerups["invincible"]["active"]:
-                        # Invincible - remove the ball with explosion effect
-                        explosion_particles.extend(create_explosion(
-                            ball.x, ball.y, ball.color, 30, (2, 5), (1, 3)
-                        ))
-                        balls.remove(ball)
-                        
-                        # Play sound if enabled
-                        if sound_enabled:
-                            explosion_sound.play()
-                            
-                        # Add bonus points
-                        score += 25
-                        score_flash = 1.0
-                    elif active_powerups["reflect"]["active"]:
-                        # Reflect - bounce the ball away with effect
-                        dx = ball.x - player.x
-                        dy = ball.y - player.y
-                        angle = math.atan2(dy, dx)
-                        ball.x = player.x + math.cos(angle) * (player.radius + ball.radius + 5)
-                        ball.y = player.y + math.sin(angle) * (player.radius + ball.radius + 5)
-                        
-                        # Add some random velocity
-                        ball.speed = random.randint(5, 8)
-                        
-                        # Add reflection particles
-                        explosion_particles.extend(create_explosion(
-                            player.x + math.cos(angle) * player.radius,
-                            player.y + math.sin(angle) * player.radius,
-                            ORANGE, 10, (1, 3), (1, 2)
-                        ))
-                    else:
-                        # Game over with explosion
-                        game_over = True
-                        explosion_particles.extend(create_explosion(
-                            player.x, player.y, WHITE, 50, (2, 6), (2, 5)
-                        ))
-                        
-                        # Play game over sound if enabled
-                        if sound_enabled:
-                            game_over_sound.play()
-        
-        # Update power-ups
-        for powerup in powerups[:]:
-            powerup.update()
-            
-            # Remove power-ups that are off-screen
-            if powerup.y > HEIGHT + powerup.radius:
-                powerups.remove(powerup)
-                continue
-            
-            # Collision detection with player
-            if not game_over and powerup.active:
-                distance = ((player.x - powerup.x) ** 2 + (player.y - powerup.y) ** 2) ** 0.5
-                if distance < player.radius + powerup.radius:
-                    # Activate power-up
-                    powerup_type = powerup.type
-                    active_powerups[powerup_type]["active"] = True
-                    active_powerups[powerup_type]["end_time"] = current_time + 5  # 5 seconds duration
-                    
-                    # Add bonus points for collecting power-up
-                    score += 50
-                    score_flash = 1.0
-                    
-                    # Add power-up collection effect
-                    explosion_particles.extend(create_explosion(
-                        powerup.x, powerup.y, powerup.color, 20, (1, 3), (1, 2)
-                    ))
-                    
-                    # Play power-up sound if enabled
-                    if sound_enabled:
-                        powerup_sound.play()
-                    
-                    # Remove collected power-up
-                    powerup.active = False
-                    powerups.remove(powerup)
+        if not self.game_over:
+            self._collide_balls()
+        if not self.game_over:
+            self._collect_powerups()
         
         # Check and deactivate expired power-ups
-        for powerup_type, status in active_powerups.items():
+        for status in active_powerups.values():
             if status["active"] and current_time > status["end_time"]:
                 status["active"] = False
         
-        # Update explosion particles
-        for particle in explosion_particles[:]:
-            particle.update()
-            if particle.life <= 0:
-                explosion_particles.remove(particle)
-        
-        # Update UI animations
-        score_pulse = (score_pulse + 0.05) % (2 * math.pi)
-        if score_flash > 0:
-            score_flash = max(0, score_flash - 0.05)
-        
-        # Update game over animation
-        if game_over:
-            game_over_alpha = min(255, game_over_alpha + 5)
-            game_over_scale = min(1.0, game_over_scale + 0.05)
-        
-        # Clear screen with space background
-        screen.fill(BG_COLOR)
-        
-        # Draw stars
-        for star in stars:
-            star.draw(screen)
-        
-        # Draw balls
-        for ball in balls:
-            ball.draw(screen)
-        
-        # Draw power-ups
-        for powerup in powerups:
-            powerup.draw(screen)
+        # Update particles
+        profiler.mark("particles")
+        self.trail_particles.update(frames)
+        self.explosion_particles.update(frames)
         
-        # Draw player
-        if not game_over:
-            player.draw(screen, active_powerups)
+        if self.score_flash > 0:
+            self.score_flash = max(0.0, self.score_flash - 0.05 * frames)
+    
+    @property
+    def quality(self) -> QualityTier:
+        return QUALITY_TIERS[self.quality_level]
+    
+    def set_quality(self, level: int) -> None:
+        """Apply a quality tier's particle budget; the rest of the tier only affects drawing."""
+        self.quality_level = level
+        tier = QUALITY_TIERS[level]
+        for particles in (self.trail_particles, self.explosion_particles):
+            particles.emission = tier.emission
+            particles.limit = tier.max_particles
+    
+    def snapshot(self) -> SimSnapshot:
+        """Copy what drawing needs, so another thread can draw it while this keeps stepping."""
+        return SimSnapshot(
+            self.balls.snapshot(), [copy.copy(powerup) for powerup in self.powerups if powerup.active],
+            self.player.snapshot(), self.trail_particles.snapshot(), self.explosion_particles.snapshot(),
+            {name: dict(status) for name, status in self.active_powerups.items()},
+            self.quality, self.params, self.difficulty_level, self.difficulty, self.score, self.score_flash,
+            self.time, self.game_over, self.ticks, time.perf_counter())
+    
+    def checksum(self) -> int:
+        """CRC32 of the gameplay state, for checking that a replay stays in sync."""
+        player = self.player
+        balls = self.balls
+        n = balls.count
+        crc = zlib.crc32(struct.pack("<5d2q?", self.time, self.difficulty, self.player_skill, player.x, player.y,
+                                     self.score, n, self.game_over))
+        for name in ("x", "y", "speed", "rotation", "type"):
+            crc = zlib.crc32(getattr(balls, name)[:n].tobytes(), crc)
+        for particles in (self.trail_particles, self.explosion_particles):
+            crc = zlib.crc32(particles.x[:particles.count].tobytes(), crc)
+            crc = zlib.crc32(particles.y[:particles.count].tobytes(), crc)
+        for powerup in self.powerups:
+            crc = zlib.crc32(struct.pack("<2d", powerup.x, powerup.y) + powerup.type.encode(), crc)
+        for status in self.active_powerups.values():
+            crc = zlib.crc32(struct.pack("<?d", status["active"], status["end_time"]), crc)
+        return crc
+    
+    def _update_balls(self, frames: float) -> None:
+        balls = self.balls
         
-        # Draw explosion particles
-        for particle in explosion_particles:
-            particle.draw(screen)
+        # Calculate time factor for ball speed (for slow power-up)
+        time_factor = 0.5 if self.active_powerups["slow"]["active"] else 1.0
+        balls.update(self.player.x, self.player.y, self.trail_particles, time_factor, frames)
         
-        # Draw UI with animations
+        n = balls.count
+        self.ball_grid.build(balls.x[:n], balls.y[:n], balls.radius[:n])
+    
+    def _update_powerups(self, frames: float) -> None:
+        for powerup in self.powerups:
+            powerup.update(self.trail_particles, frames)
+        
+        # Remove power-ups that are off-screen
+        if any(powerup.y > HEIGHT + powerup.radius for powerup in self.powerups):
+            remaining: List[PowerUp] = []
+            for powerup in self.powerups:
+                if powerup.y <= HEIGHT + powerup.radius:
+                    remaining.append(powerup)
+                else:
+                    self.powerup_pool.release(powerup)
+            self.powerups = remaining
+        
+        self.powerup_grid.build(np.array([powerup.x for powerup in self.powerups]),
+                                np.array([powerup.y for powerup in self.powerups]),
+                                np.array([powerup.radius for powerup in self.powerups]))
+    
+    def _check_near_misses(self) -> None:
+        player = self.player
+        margin = 30  # How close counts as a near miss
+        balls = self.balls
+        for i in self.ball_grid.query(player.x, player.y, player.radius + margin):
+            # The query guarantees distance < radii + margin; skip actual hits
+            touching = player.radius + balls.radius[i]
+            if (player.x - balls.x[i]) ** 2 + (player.y - balls.y[i]) ** 2 > touching * touching:
+                self.near_miss_count += 1
+                # Increase player skill rating based on near misses
+                if self.near_miss_count % self.params.near_misses_per_step == 0:
+                    self.player_skill = min(1.0, self.player_skill + self.params.skill_step)
+    
+    def _contacts(self, grid: SpatialHash, xs0: np.ndarray, ys0: np.ndarray, xs1: np.ndarray,
+                  ys1: np.ndarray) -> List[Tuple[float, int]]:
+        """(time of impact, index) of everything in ``grid`` the player touched this tick, earliest first.
+        
+        ``grid`` holds the objects at their current positions and the other
+        arrays where each started and ended the tick. The query reaches as
+        far as the player and the fastest object moved, and every candidate
+        is then swept against the player's path, so nothing tunnels through
+        however long the tick.
+        """
+        player = self.player
+        moved = math.hypot(player.x - player.prev_x, player.y - player.prev_y)
+        fastest = float(np.hypot(xs1 - xs0, ys1 - ys0).max()) if len(xs1) else 0.0
+        candidates = grid.query(player.x, player.y, player.radius + moved + fastest)
+        if not candidates:
+            return []
+        indices = np.array(candidates, np.intp)
+        toi = sweep_circles(player.prev_x, player.prev_y, player.x, player.y, xs0[indices], ys0[indices],
+                            xs1[indices], ys1[indices], player.radius + grid.radii[indices])
+        hits = np.flatnonzero(np.isfinite(toi))
+        order = hits[np.argsort(toi[hits], kind="stable")]
+        return list(zip(toi[order].tolist(), indices[order].tolist()))
+    
+    def _collide_balls(self) -> None:
+        player = self.player
+        active_powerups = self.active_powerups
+        balls = self.balls
+        n = balls.count
+        destroyed: List[int] = []
+        
+        contacts = self._contacts(self.ball_grid, balls.prev_x[:n], balls.prev_y[:n], balls.x[:n], balls.y[:n])
+        for toi, i in contacts:
+            # Where the two were at the moment of impact
+            contact_x = lerp(player.prev_x, player.x, toi)
+            contact_y = lerp(player.prev_y, player.y, toi)
+            ball_x = lerp(balls.prev_x[i], balls.x[i], toi)
+            ball_y = lerp(balls.prev_y[i], balls.y[i], toi)
+            if active_powerups["invincible"]["active"]:
+                # Invincible - remove the ball with explosion effect
+                create_explosion(
+                    self.explosion_particles, ball_x, ball_y, BALL_COLORS[balls.type[i]],
+                    30, (2, 5), (1, 3)
+                )
+                destroyed.append(i)
+                self.events.append("explosion")
+                
+                # Add bonus points
+                self.score += 25
+                self.score_flash = 1.0
+            elif active_powerups["reflect"]["active"]:
+                # Reflect - bounce the ball away from the side it hit, with effect
+                angle = math.atan2(ball_y - contact_y, ball_x - contact_x)
+                balls.x[i] = player.x + math.cos(angle) * (player.radius + balls.radius[i] + 5)
+                balls.y[i] = player.y + math.sin(angle) * (player.radius + balls.radius[i] + 5)
+                
+                # Add some random velocity
+                balls.speed[i] = self.rng.randint(5, 8)
+                
+                # Add reflection particles
+                create_explosion(
+                    self.explosion_particles,
+                    player.x + math.cos(angle) * player.radius,
+                    player.y + math.sin(angle) * player.radius,
+                    ORANGE, 10, (1, 3), (1, 2)
+                )
+            else:
+                # Game over with explosion, where the ship was hit
+                self.game_over = True
+                player.x, player.y = contact_x, contact_y
+                create_explosion(
+                    self.explosion_particles, player.x, player.y, WHITE, 50, (2, 6), (2, 5)
+                )
+                self.events.append("game_over")
+                break
         
+        if destroyed:
+            balls.remove(destroyed)
+    
+    def _collect_powerups(self) -> None:
+        player = self.player
+        powerups = self.powerups
+        collected: List[PowerUp] = []
+        
+        grid = self.powerup_grid
+        contacts = self._contacts(grid, np.array([powerup.prev_x for powerup in powerups]),
+                                  np.array([powerup.prev_y for powerup in powerups]), grid.xs, grid.ys)
+        for toi, i in contacts:
+            powerup = powerups[i]
+            if not powerup.active:
+                continue
+            # Activate power-up
+            status = self.active_powerups[powerup.type]
+            status["active"] = True
+            status["end_time"] = self.time + 5  # 5 seconds duration
+            
+            # Add bonus points for collecting power-up
+            self.score += 50
+            self.score_flash = 1.0
+            
+            # Add power-up collection effect where it was picked up
+            create_explosion(
+                self.explosion_particles, lerp(powerup.prev_x, powerup.x, toi),
+                lerp(powerup.prev_y, powerup.y, toi), powerup.color, 20, (1, 3), (1, 2)
+            )
+            self.events.append("powerup")
+            
+            # Remove collected power-up
+            powerup.active = False
+            collected.append(powerup)
+        
+        if collected:
+            self.powerups = [powerup for powerup in self.powerups if powerup.active]
+            for powerup in collected:
+                self.powerup_pool.release(powerup)
+
+
+# What the drawing code accepts: the live simulation, or a snapshot of it
+WorldView = Union[Simulation, SimSnapshot]
+
+
+# Input sources
+class InputProvider:
+    """Where the player's input comes from, asked once per simulation tick."""
+    
+    def poll(self, sim: Simulation) -> InputState:
+        raise NotImplementedError
+    
+    def restart(self, sim: Simulation) -> bool:
+        """Whether to leave the game-over screen without waiting for a key."""
+        return False
+
+
+class MouseInput(InputProvider):
+    """The ship follows the mouse; the target freezes once the game is over."""
+    
+    def __init__(self) -> None:
+        self.x, self.y = pygame.mouse.get_pos()
+    
+    def poll(self, sim: Simulation) -> InputState:
+        if not sim.game_over:
+            self.x, self.y = pygame.mouse.get_pos()
+        return InputState(int(self.x), int(self.y))  # Whole pixels, exactly as recorded
+
+
+class Autopilot(InputProvider):
+    """A bot that dodges by predicting where asteroids and the ship will be.
+    
+    Each tick it tries a ring of mouse targets around the ship. For every
+    target it follows the ship's easing towards it over a short horizon and
+    the asteroids along their paths, homing ones steering towards that ship
+    position, and keeps the target whose closest approach is the safest. All
+    candidates, asteroids and horizon samples are checked in one NumPy pass.
+    It restarts by itself shortly after a game over, so it can play
+    unattended for as long as needed.
+    """
+    
+    # Frames ahead at which positions are checked; dense at first, where the ship moves fastest
+    TIMES = (1.0, 2.0, 3.0, 4.0, 6.0, 8.0, 11.0, 15.0, 19.0, 24.0, 30.0, 36.0)
+    DIRECTIONS = 16
+    REACH = (60.0, 140.0)  # Distances of the candidate targets from the ship
+    SAFE_GAP = 40.0  # Clearance beyond which more does not make a target safer
+    RESTART_DELAY = 2.0  # Seconds of game-over screen before starting again
+    
+    def __init__(self) -> None:
+        angles = np.linspace(0.0, 2 * math.pi, self.DIRECTIONS, endpoint=False)
+        reach = np.repeat(self.REACH, self.DIRECTIONS)
+        # Staying put comes first, so it wins ties
+        self.offset_x = np.concatenate(([0.0], np.tile(np.cos(angles), len(self.REACH)) * reach))
+        self.offset_y = np.concatenate(([0.0], np.tile(np.sin(angles), len(self.REACH)) * reach))
+        self.times = np.array(self.TIMES)
+        self.game_over_time: Optional[float] = None
+    
+    def poll(self, sim: Simulation) -> InputState:
+        player = sim.player
+        margin = player.radius * 2
+        target_x = np.clip(player.x + self.offset_x, margin, WIDTH - margin)
+        target_y = np.clip(player.y + self.offset_y, margin, HEIGHT - margin)
+        
+        # Ship path towards each target, (candidates, samples)
+        rate = 0.3 if sim.active_powerups["speed"]["active"] else 0.2
+        follow = 1.0 - (1.0 - rate) ** self.times
+        ship_x = player.x + (target_x[:, None] - player.x) * follow
+        ship_y = player.y + (target_y[:, None] - player.y) * follow
+        
+        # Prefer the lower middle of the screen, and power-ups when they are safe to reach
+        preference = -0.02 * np.hypot(target_x - WIDTH / 2, target_y - HEIGHT * 0.7)
+        if sim.powerups:
+            px = np.array([powerup.x for powerup in sim.powerups])
+            py = np.array([powerup.y for powerup in sim.powerups])
+            preference -= 0.05 * np.hypot(target_x[:, None] - px, target_y[:, None] - py).min(axis=1)
+        
+        clearance = np.full(len(target_x), self.SAFE_GAP)
+        balls = sim.balls
+        n = balls.count
+        if n:
+            time_factor = 0.5 if sim.active_powerups["slow"]["active"] else 1.0
+            travel = balls.speed[:n] * time_factor * self.TIMES[-1]
+            dx = player.x - balls.x[:n]
+            dy = player.y - balls.y[:n]
+            distance = np.hypot(dx, dy)
+            # Only asteroids that could get within reach of any candidate matter
+            near = np.flatnonzero(distance < self.REACH[-1] + travel + balls.radius[:n] + player.radius
+                                  + self.SAFE_GAP)
+            if near.size:
+                step = balls.speed[near] * time_factor
+                ball_y = balls.y[near, None] + step[:, None] * self.times  # (asteroids, samples)
+                ball_x = np.broadcast_to(balls.x[near, None], ball_y.shape)
+                homing = balls.homing[near]
+                # (candidates, asteroids, samples)
+                gap_x = ship_x[:, None, :] - ball_x
+                if homing.any():
+                    # Homing asteroids drift sideways towards the ship, at most all the way
+                    pull = dx[near] / np.maximum(1.0, distance[near])
+                    drift = np.abs(pull * step)[:, None] * self.times
+                    steer = np.clip(gap_x, -drift, drift)
+                    gap_x = gap_x - np.where(homing[:, None], steer, 0.0)
+                gap_y = ship_y[:, None, :] - ball_y
+                gap = np.hypot(gap_x, gap_y) - balls.radius[near, None] - player.radius
+                # Sooner collisions are worse than later ones the ship may still avoid
+                gap += self.times * 0.5
+                clearance = np.minimum(gap.min(axis=(1, 2)), self.SAFE_GAP)
+        
+        best = int(np.argmax(clearance * 100 + preference))
+        return InputState(int(target_x[best]), int(target_y[best]))
+    
+    def restart(self, sim: Simulation) -> bool:
+        if not sim.game_over:
+            self.game_over_time = None
+            return False
+        if self.game_over_time is None:
+            self.game_over_time = sim.time
+        return sim.time - self.game_over_time >= self.RESTART_DELAY
+
+
+# Input recording and replay
+REPLAY_MAGIC: bytes = b"CDRP"
+REPLAY_VERSION: int = 5  # Bumped whenever the simulation changes so old replays would desync
+REPLAY_HEADER = struct.Struct("<4sHQ?d")  # Magic, version, seed, hard mode, simulation Hz
+REPLAY_TICK = struct.Struct("<hhBI")  # Mouse x, mouse y, quality level, state checksum after the tick
+
+
+class Recording:
+    """Seed, tick rate and per-tick inputs of one game, enough to replay it exactly.
+
+    Each tick stores the whole-pixel mouse target, the quality level (it
+    sets particle budgets) and the state checksum after stepping, 9 bytes
+    before compression. Files are a small header followed by the
+    zlib-compressed ticks.
+    """
+    
+    def __init__(self, difficulty_level: str, seed: int, sim_hz: float):
+        self.difficulty_level: str = difficulty_level
+        self.seed: int = seed
+        self.sim_hz: float = sim_hz
+        self.data = bytearray()
+    
+    def __len__(self) -> int:
+        return len(self.data) // REPLAY_TICK.size
+    
+    def record(self, inputs: InputState, quality_level: int, checksum: int) -> None:
+        self.data += REPLAY_TICK.pack(int(inputs.target_x), int(inputs.target_y), quality_level, checksum)
+    
+    def ticks(self) -> Iterator[Tuple[InputState, int, int]]:
+        """Yield (inputs, quality level, checksum) for every recorded tick."""
+        for x, y, quality_level, checksum in REPLAY_TICK.iter_unpack(self.data):
+            yield InputState(x, y), quality_level, checksum
+    
+    def save(self, path: str) -> None:
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed,
+                                    self.difficulty_level == "hard", self.sim_hz)
+        with open(path, "wb") as f:
+            f.write(header + zlib.compress(bytes(self.data), 9))
+    
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, "rb") as f:
+            blob = f.read()
+        magic, version, seed, hard, sim_hz = REPLAY_HEADER.unpack_from(blob)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} COSMIC DODGE replay")
+        recording = cls("hard" if hard else "normal", seed, sim_hz)
+        recording.data = bytearray(zlib.decompress(blob[REPLAY_HEADER.size:]))
+        return recording
+
+
+class ReplayResult(NamedTuple):
+    ticks: int  # Ticks simulated
+    desync_tick: Optional[int]  # First tick whose checksum differed from the recording
+    seconds: float  # Wall-clock time spent simulating
+    score: int
+
+
+def replay(recording: Recording, verify: bool = True) -> ReplayResult:
+    """Re-run a recorded game headless, as fast as possible, checking every tick."""
+    sim = Simulation(recording.difficulty_level, recording.seed, sim_hz=recording.sim_hz)
+    ticks = 0
+    start = time.perf_counter()
+    for inputs, quality_level, checksum in recording.ticks():
+        if quality_level != sim.quality_level:
+            sim.set_quality(quality_level)
+        sim.step(inputs)
+        ticks += 1
+        if verify and sim.checksum() != checksum:
+            return ReplayResult(ticks, ticks - 1, time.perf_counter() - start, sim.score)
+    return ReplayResult(ticks, None, time.perf_counter() - start, sim.score)
+
+
+def play_sounds(events: List[str]) -> None:
+    if events and init_audio() and audio_engine is not None:
+        audio_engine.play(events)
+
+
+# Simulation on its own thread
+class SnapshotBuffer:
+    """Double buffer handing SimSnapshots from the simulation thread to the renderer.
+    
+    The simulation publishes a fresh snapshot into the back slot after every
+    tick; the renderer takes the front one at the start of a frame and keeps
+    it until the frame is presented. Snapshots are never changed once
+    published and rebinding an attribute is atomic, so neither side locks
+    and the renderer never sees a half-written tick.
+    """
+    
+    def __init__(self, first: SimSnapshot):
+        self.back: SimSnapshot = first  # Newest published
+        self.front: SimSnapshot = first  # Being drawn
+    
+    def publish(self, snapshot: SimSnapshot) -> None:
+        self.back = snapshot
+    
+    def acquire(self) -> SimSnapshot:
+        """Swap in the newest snapshot for the renderer."""
+        self.front = self.back
+        return self.front
+
+
+class SimulationThread:
+    """Steps a Simulation in real time on a thread of its own.
+    
+    Inputs are polled, sounds played and ticks recorded on this thread, so a
+    slow rendered frame no longer delays them. The renderer draws whatever
+    ``buffer`` holds and asks for quality changes through
+    ``quality_level``, which is applied between ticks so replays still see
+    it at the tick it took effect. ``latency`` collects, per presented
+    frame, how old the drawn snapshot was: the delay this mode adds on top
+    of drawing straight from the simulation.
+    """
+    
+    SWITCH_INTERVAL = 0.0005  # Seconds between GIL hand-offs, so a tick never waits long for the renderer
+    
+    def __init__(self, sim: Simulation, inputs: InputProvider, recording: Optional[Recording] = None):
+        self.sim = sim
+        self.inputs = inputs
+        self.recording = recording
+        self.timestep = FixedTimestep(sim.sim_hz)
+        self.ticks: int = 0
+        self.quality_level: int = sim.quality_level
+        self.buffer = SnapshotBuffer(sim.snapshot())
+        self.latency: List[float] = []  # Seconds from publishing to presenting, per frame
+        self.error: Optional[BaseException] = None
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.switch_interval: float = sys.getswitchinterval()
+    
+    def start(self) -> None:
+        sys.setswitchinterval(self.SWITCH_INTERVAL)
+        self.thread.start()
+    
+    def stop(self) -> None:
+        """Stop stepping, re-raising anything the thread died of."""
+        self.stopping.set()
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+        if self.error is not None:
+            raise self.error
+    
+    def presented(self, snapshot: SimSnapshot) -> None:
+        self.latency.append(time.perf_counter() - snapshot.published)
+    
+    def report(self) -> str:
+        if not self.latency:
+            return "No frames presented"
+        latency = np.array(self.latency) * 1000.0
+        return (f"Simulation thread: {self.ticks} ticks, {latency.size} frames; snapshots were "
+                f"{latency.mean():.1f} ms old when presented on average, {np.percentile(latency, 95):.1f} ms "
+                f"at p95, {latency.max():.1f} ms at worst")
+    
+    def _run(self) -> None:
+        sim = self.sim
+        timestep = self.timestep
+        try:
+            while not self.stopping.is_set():
+                for _ in range(timestep.advance()):
+                    if self.quality_level != sim.quality_level:
+                        sim.set_quality(self.quality_level)
+                    state = self.inputs.poll(sim)
+                    sim.step(state)
+                    self.ticks += 1
+                    if self.recording is not None:
+                        self.recording.record(state, sim.quality_level, sim.checksum())
+                    play_sounds(sim.events)
+                    self.buffer.publish(sim.snapshot())
+                # Sleep until the next tick is due
+                time.sleep(max(0.0, timestep.dt - timestep.accumulator))
+        except BaseException as error:
+            self.error = error
+
+
+# Game loop with enhanced visuals
+def game(difficulty_level: str, sim_hz: float = REFERENCE_FPS, fps: int = 60, dirty: bool = False,
+         profiler: Optional[FrameProfiler] = None, record_dir: Optional[str] = None,
+         quality: str = "auto", inputs: Optional[InputProvider] = None, threaded: bool = False) -> None:
+    """Run one game, simulating at ``sim_hz`` and drawing at up to ``fps``.
+
+    With ``dirty`` the stars hold still and only the screen regions that
+    changed are redrawn and sent to the display. F3 toggles the frame
+    profiler overlay and F4 exports what it captured. With ``record_dir``
+    the game is saved there as a replay when it ends. ``quality`` names a
+    fixed tier, or with "auto" a QualityGovernor picks one. ``inputs``
+    steers the ship, following the mouse by default. With ``threaded`` the
+    simulation steps on a SimulationThread while this thread draws its
+    snapshots, and the latency that adds is printed when the game ends.
+    """
+    screen = init_display()
+    if inputs is None:
+        inputs = MouseInput()
+    sim = Simulation(difficulty_level, sim_hz=sim_hz)
+    recording = Recording(difficulty_level, sim.seed, sim_hz) if record_dir is not None else None
+    try:
+        _run_game(screen, sim, fps, dirty, profiler, recording, quality, inputs, threaded)
+    finally:
+        if recording is not None and record_dir is not None:
+            os.makedirs(record_dir, exist_ok=True)
+            path = os.path.join(record_dir, time.strftime("replay-%Y%m%d-%H%M%S.cdr"))
+            recording.save(path)
+            print(f"Replay of {len(recording)} ticks written to {path}")
+
+
+def _run_game(screen: Surface, sim: Simulation, fps: int, dirty: bool,
+              profiler: Optional[FrameProfiler], recording: Optional[Recording], quality: str,
+              inputs: InputProvider, threaded: bool = False) -> None:
+    budget_ms = 1000 / (fps or REFERENCE_FPS)
+    if profiler is None:
+        profiler = FrameProfiler(budget_ms)
+    governor: Optional[QualityGovernor] = None
+    if quality == "auto":
+        governor = QualityGovernor(budget_ms)
+    else:
+        sim.set_quality([tier.name for tier in QUALITY_TIERS].index(quality))
+    sim_thread: Optional[SimulationThread] = None
+    if threaded:
+        # The profiler is not thread-safe, so it only times the render thread
+        sim_thread = SimulationThread(sim, inputs, recording)
+        timestep = sim_thread.timestep
+    else:
+        sim.profiler = profiler
+        timestep = FixedTimestep(sim.sim_hz)
+    scheduler.fps = fps
+    scheduler.reset()
+    frame_time = 1.0 / fps if fps else 1.0 / REFERENCE_FPS  # Duration of the last rendered frame, for UI animations
+    
+    # Shared star background
+    starfield = get_starfield()
+    
+    # Font settings
+    font = get_font(36)
+    small_font = get_font(24)
+    large_font = get_font(72)
+    hud = Hud(font, small_font)
+    regions = DirtyRegions(make_background(starfield)) if dirty else None
+    # Dirty rects redraw parts of the screen itself, so they always draw at the logical size
+    canvas = RenderCanvas(RENDER_SCALE, SMOOTH_SCALING) if RENDER_SCALE != 1.0 and regions is None else None
+    world = canvas.surface if canvas is not None else screen
+    
+    # UI animation variables
+    score_pulse = 0.0
+    
+    # Game over animation
+    game_over_alpha = 0.0
+    game_over_scale = 0.0
+    
+    closed = False  # The window was closed; pygame shuts down once the simulation thread has stopped
+    if sim_thread is not None:
+        sim_thread.start()
+    try:
+        while True:
+            profiler.begin_frame()
+            profiler.mark("events")
+            for event in pygame.event.get():
+                scheduler.handle(event)
+                if event.type == pygame.QUIT:
+                    closed = True
+                    break
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_r and sim.game_over:
+                        return  # Return to start screen
+                    if event.key == pygame.K_F3:
+                        profiler.toggle()
+                        profiler.begin_frame()
+                    elif event.key == pygame.K_F4 and profiler.capture:
+                        print("Profile written to %s and %s" % profiler.export())
+            if closed:
+                break
+            
+            if inputs.restart(sim):
+                return
+            
+            view: WorldView
+            if sim_thread is None:
+                for _ in range(timestep.advance()):
+                    state = inputs.poll(sim)
+                    sim.step(state)
+                    if recording is not None:
+                        recording.record(state, sim.quality_level, sim.checksum())
+                    profiler.mark("audio")
+                    play_sounds(sim.events)
+                view = sim
+                alpha = timestep.alpha
+            else:
+                # Draw the newest tick, as far towards the next one as the time since it was published
+                view = sim_thread.buffer.acquire()
+                alpha = min(1.0, (time.perf_counter() - view.published) / timestep.dt)
+            tick_frames = timestep.dt * REFERENCE_FPS
+            
+            # Presentation-only animation runs on wall-clock time
+            profiler.mark("stars")
+            render_frames = frame_time * REFERENCE_FPS
+            
+            # Update stars
+            if regions is None:
+                starfield.update(render_frames)
+            
+            # Update UI animations
+            score_pulse = (score_pulse + 0.05 * render_frames) % (2 * math.pi)
+            
+            # Update game over animation
+            if view.game_over:
+                game_over_alpha = min(255.0, game_over_alpha + 5 * render_frames)
+                game_over_scale = min(1.0, game_over_scale + 0.05 * render_frames)
+            
+            if regions is None:
+                # Clear screen with space background
+                world.fill(BG_COLOR)
+                
+                # Draw stars
+                starfield.draw(world, view.quality.star_depths)
+            else:
+                # Clear only what moved since last frame
+                mark_world(regions, view, alpha, tick_frames)
+                for rect in hud.REGIONS:
+                    regions.mark(rect)
+                if profiler.enabled:
+                    regions.mark(profiler.rect)
+                if view.game_over:
+                    if game_over_alpha < 150:
+                        regions.mark_all()  # The overlay is still fading in everywhere
+                    else:
+                        regions.mark(GAME_OVER_REGION)
+                regions.restore(screen)
+            
+            profiler.mark("draw")
+            draw_world(world, view, alpha, tick_frames)
+            if canvas is not None:
+                canvas.present_to(screen)
+            profiler.mark("hud")
+            hud.draw(screen, view, score_pulse)
+            
+            # Game over display with animation
+            if view.game_over:
+                draw_game_over(screen, view, font, large_font, game_over_alpha, game_over_scale,
+                               regions.rects if regions is not None else None)
+            
+            profiler.mark("profiler")
+            profiler.draw(screen)
+            profiler.mark("present")
+            present(regions)
+            profiler.end_frame()
+            if sim_thread is not None:
+                sim_thread.presented(sim_thread.buffer.front)
+            # The game-over screen waits for a key, so it may idle like a menu
+            scheduler.idle_allowed = view.game_over
+            frame_time = scheduler.wait()
+            
+            # Trade detail for frame rate when the frame's work runs over budget
+            if governor is not None and governor.update(scheduler.work_ms):
+                if sim_thread is None:
+                    sim.set_quality(governor.level)
+                else:
+                    sim_thread.quality_level = governor.level
+    finally:
+        if sim_thread is not None:
+            sim_thread.stop()
+            print(sim_thread.report())
+    pygame.quit()
+    sys.exit()
+
+
+def draw_world(surface: Surface, sim: WorldView, alpha: float = 1.0, tick_frames: float = 1.0,
+               backend: Optional[RenderBackend] = None) -> None:
+    """Draw the simulation ``alpha`` of the way from its previous tick to the current one.
+    
+    The world is recorded into a DrawList and executed on ``backend``, by
+    default a PygameBackend drawing onto ``surface``. A surface of other
+    than the logical size, like a RenderCanvas, is drawn at its scale.
+    """
+    commands = DrawList(scale=surface.get_width() / WIDTH)
+    # Particles are drawn back along their velocity instead of storing old positions
+    particle_lag = (1.0 - alpha) * tick_frames
+    quality = sim.quality
+    
+    # Draw trails behind everything else
+    sim.trail_particles.draw(commands, LAYER_TRAILS, particle_lag, quality.antialias)
+    
+    # Draw balls
+    sim.balls.draw(commands, sim.player.x, sim.player.y, alpha, quality.rotation_steps)
+    
+    # Draw power-ups
+    for powerup in sim.powerups:
+        powerup.draw(commands, alpha)
+    
+    # Draw player
+    if not sim.game_over:
+        sim.player.draw(commands, sim.active_powerups, sim.ticks, alpha)
+    
+    # Draw explosion particles
+    sim.explosion_particles.draw(commands, LAYER_EXPLOSIONS, particle_lag, quality.antialias)
+    
+    commands.flush(backend if backend is not None else PygameBackend(surface))
+
+
+def mark_world(regions: DirtyRegions, sim: WorldView, alpha: float = 1.0, tick_frames: float = 1.0) -> None:
+    """Mark everything ``draw_world`` is about to draw with the same arguments."""
+    particle_lag = (1.0 - alpha) * tick_frames
+    regions.mark_circles(*sim.trail_particles.extents(particle_lag))
+    regions.mark_circles(*sim.balls.extents(alpha))
+    for powerup in sim.powerups:
+        if powerup.active:
+            regions.mark(powerup.bounds(alpha))
+    if not sim.game_over:
+        regions.mark(sim.player.bounds(alpha))
+    regions.mark_circles(*sim.explosion_particles.extents(particle_lag))
+
+
+class Hud:
+    """Score, time, difficulty and power-up read-outs.
+
+    The right-hand panel is composed into a retained surface and only
+    redrawn when one of its displayed values changes. Score and time are
+    blitted straight from the text cache each frame.
+    """
+    
+    POWERUP_LABELS: Dict[str, Tuple[Tuple[int, int, int], str]] = {
+        "invincible": (GOLD, "Invincible"),
+        "slow": (CYAN, "Time Slow"),
+        "reflect": (ORANGE, "Reflect"),
+        "speed": (YELLOW, "Speed Up"),
+    }
+    PANEL_X: int = WIDTH - 150
+    # Screen areas the HUD draws into, for dirty-rect mode
+    REGIONS: Tuple[pygame.Rect, ...] = (pygame.Rect(10, 10, 280, 70), pygame.Rect(PANEL_X, 10, 150, 210))
+    
+    def __init__(self, font: pygame.font.Font, small_font: pygame.font.Font):
+        self.font = font
+        self.small_font = small_font
+        self.panel: Surface = pygame.Surface((150, 210))
+        self.panel.set_colorkey(SPRITE_KEY)
+        self.panel_state: Optional[Tuple[Any, ...]] = None
+    
+    def draw(self, surface: Surface, sim: WorldView, score_pulse: float) -> None:
         # Score display with pulse and flash effects
         score_color = WHITE
-        if score_flash > 0:
-            flash_intensity = int(255 * score_flash)
+        if sim.score_flash > 0:
+            flash_intensity = int(255 * round(sim.score_flash * 8) / 8)  # 8 flash levels
             score_color = (255, 255, flash_intensity)
         
         score_scale = 1.0 + math.sin(score_pulse) * 0.05
-        score_text = font.render(f"Score: {score}", True, score_color)
-        score_text = pygame.transform.scale(
-            score_text,
-            (int(score_text.get_width() * score_scale),
-             int(score_text.get_height() * score_scale))
-        )
-        screen.blit(score_text, (10, 10))
+        surface.blit(text_cache.render(self.font, f"Score: {sim.score}", score_color, score_scale), (10, 10))
         
         # Time display
-        time_text = font.render(f"Time: {int(elapsed_time)}s", True, WHITE)
-        screen.blit(time_text, (10, 50))
+        surface.blit(text_cache.render(self.font, f"Time: {int(sim.time)}s", WHITE), (10, 50))
+        
+        # Everything else only changes a few times a second
+        difficulty = round(sim.difficulty, 2)
+        countdowns = tuple(
+            (powerup_type, int(status["end_time"] - sim.time))
+            for powerup_type, status in sim.active_powerups.items() if status["active"]
+        )
+        state = (sim.difficulty_level, difficulty, countdowns)
+        if state != self.panel_state:
+            self.panel_state = state
+            self._compose_panel(sim.difficulty_level, difficulty, sim.params.max_difficulty, countdowns)
+        surface.blit(self.panel, (self.PANEL_X, 10))
+    
+    def _compose_panel(self, difficulty_level: str, difficulty: float, max_difficulty: float,
+                       countdowns: Tuple[Tuple[str, int], ...]) -> None:
+        panel = self.panel
+        panel.fill(SPRITE_KEY)
+        # Panel coordinates are screen coordinates shifted by (PANEL_X, 10)
         
         # Difficulty display with color gradient
         diff_color = GREEN
@@ -1113,23 +3529,23 @@ def game(difficulty_level: str) -> None:
             diff_color = YELLOW
         if difficulty > 0.8:
             diff_color = RED
-            
-        diff_text = font.render(f"Mode: {'Normal' if difficulty_level == 'normal' else 'Hard'}", True, 
-                               GREEN if difficulty_level == "normal" else RED)
-        screen.blit(diff_text, (WIDTH - 150, 10))
+        
+        diff_text = text_cache.render(self.font, f"Mode: {'Normal' if difficulty_level == 'normal' else 'Hard'}",
+                                      GREEN if difficulty_level == "normal" else RED)
+        panel.blit(diff_text, (0, 0))
         
         # Difficulty meter
-        diff_meter_text = small_font.render(f"Difficulty: {difficulty:.2f}", True, diff_color)
-        screen.blit(diff_meter_text, (WIDTH - 150, 50))
+        diff_meter_text = text_cache.render(self.small_font, f"Difficulty: {difficulty:.2f}", diff_color)
+        panel.blit(diff_meter_text, (0, 40))
         
         # Draw difficulty bar
         bar_width = 100
         bar_height = 10
-        bar_x = WIDTH - 150
-        bar_y = 75
+        bar_x = 0
+        bar_y = 65
         
         # Background bar
-        pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
+        pygame.draw.rect(panel, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
         
         # Fill bar based on difficulty
         fill_width = int(bar_width * (difficulty / max_difficulty))
@@ -1151,100 +3567,180 @@ def game(difficulty_level: str) -> None:
         g = max(0, min(255, int(g)))
         b = max(0, min(255, int(b)))
         
-        pygame.draw.rect(screen, (r, g, b), (bar_x, bar_y, fill_width, bar_height))
+        pygame.draw.rect(panel, (r, g, b), (bar_x, bar_y, fill_width, bar_height))
         
         # Display active power-ups with countdown
-        powerup_y = 90
-        for powerup_type, status in active_powerups.items():
-            if status["active"]:
-                time_left = int(status["end_time"] - current_time)
-                if powerup_type == "invincible":
-                    color = GOLD
-                    name = "Invincible"
-                elif powerup_type == "slow":
-                    color = CYAN
-                    name = "Time Slow"
-                elif powerup_type == "reflect":
-                    color = ORANGE
-                    name = "Reflect"
-                elif powerup_type == "speed":
-                    color = YELLOW
-                    name = "Speed Up"
-                
-                # Pulse effect for countdown
-                pulse = math.sin(current_time * 10) * 0.2 + 0.8
-                if time_left <= 1:  # Flash when about to expire
-                    pulse = math.sin(current_time * 20) * 0.5 + 0.5
-                
-                # Draw power-up icon
-                pygame.draw.circle(screen, color, (WIDTH - 140, powerup_y + 10), 8)
-                
-                # Draw power-up text with pulse effect
-                powerup_text = small_font.render(f"{name}: {time_left}s", True, color)
-                screen.blit(powerup_text, (WIDTH - 120, powerup_y))
-                
-                # Draw countdown bar
-                bar_width = 100
-                bar_height = 4
-                bar_x = WIDTH - 120
-                bar_y = powerup_y + 20
-                
-                # Background bar
-                pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
-                
-                # Fill bar based on time left
-                fill_width = int(bar_width * (time_left / 5))  # 5 seconds is full duration
-                pygame.draw.rect(screen, color, (bar_x, bar_y, fill_width, bar_height))
-                
-                powerup_y += 30
-        
-        # Game over display with animation
-        if game_over:
-            # Semi-transparent overlay
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay_alpha = min(150, int(game_over_alpha))
-            overlay.fill((0, 0, 0, overlay_alpha))
-            screen.blit(overlay, (0, 0))
+        powerup_y = 80
+        for powerup_type, time_left in countdowns:
+            color, name = self.POWERUP_LABELS[powerup_type]
             
-            # Game over text with scale animation
-            game_over_text = large_font.render("GAME OVER!", True, RED)
-            scaled_text = pygame.transform.scale(
-                game_over_text,
-                (int(game_over_text.get_width() * game_over_scale),
-                 int(game_over_text.get_height() * game_over_scale))
-            )
-            screen.blit(scaled_text, 
-                       (WIDTH // 2 - scaled_text.get_width() // 2, 
-                        HEIGHT // 2 - 50 - scaled_text.get_height() // 2))
+            # Draw power-up icon
+            pygame.draw.circle(panel, color, (10, powerup_y + 10), 8)
             
-            # Final score with fade-in
-            if game_over_alpha > 100:
-                alpha = min(255, game_over_alpha - 100)
-                final_score_text = font.render(f"Final Score: {score}", True, WHITE)
-                screen.blit(final_score_text, 
-                           (WIDTH // 2 - final_score_text.get_width() // 2, 
-                            HEIGHT // 2))
+            # Draw power-up text
+            powerup_text = text_cache.render(self.small_font, f"{name}: {time_left}s", color)
+            panel.blit(powerup_text, (30, powerup_y))
             
-            # Restart instruction with pulse
-            if game_over_alpha > 150:
-                pulse = (math.sin(current_time * 5) + 1) * 0.5
-                r = max(0, min(255, int(GREEN[0] * pulse + 100)))
-                g = max(0, min(255, int(GREEN[1] * pulse + 100)))
-                b = max(0, min(255, int(GREEN[2] * pulse + 100)))
-                restart_color = (r, g, b)
-                restart_text = font.render("Press R to return to menu", True, restart_color)
-                screen.blit(restart_text, 
-                           (WIDTH // 2 - restart_text.get_width() // 2, 
-                            HEIGHT // 2 + 50))
-        
-        pygame.display.update()
-        clock.tick(60)
+            # Draw countdown bar
+            bar_width = 100
+            bar_height = 4
+            bar_x = 30
+            bar_y = powerup_y + 20
+            
+            # Background bar
+            pygame.draw.rect(panel, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
+            
+            # Fill bar based on time left
+            fill_width = int(bar_width * (time_left / 5))  # 5 seconds is full duration
+            pygame.draw.rect(panel, color, (bar_x, bar_y, fill_width, bar_height))
+            
+            powerup_y += 30
+
+
+GAME_OVER_REGION: pygame.Rect = pygame.Rect(WIDTH // 2 - 250, HEIGHT // 2 - 110, 500, 200)  # Game over texts
+_overlay: Optional[Surface] = None
+
+
+def get_overlay(alpha: int) -> Surface:
+    """The shared full-screen black overlay, set to ``alpha`` opacity."""
+    global _overlay
+    if _overlay is None:
+        _overlay = pygame.Surface((WIDTH, HEIGHT), 0, init_display())
+        _overlay.fill(BLACK)
+    _overlay.set_alpha(alpha)
+    return _overlay
+
+
+def draw_game_over(surface: Surface, sim: WorldView, font: pygame.font.Font,
+                   large_font: pygame.font.Font, game_over_alpha: float, game_over_scale: float,
+                   regions: Optional[List[pygame.Rect]] = None) -> None:
+    """Draw the game over screen, dimming only ``regions`` if given."""
+    # Semi-transparent overlay
+    overlay = get_overlay(min(150, int(game_over_alpha)))
+    if regions is None:
+        surface.blit(overlay, (0, 0))
+    else:
+        for rect in regions:
+            surface.blit(overlay, rect, rect)
+    
+    # Game over text with scale animation
+    scaled_text = text_cache.render(large_font, "GAME OVER!", RED, game_over_scale)
+    surface.blit(scaled_text, 
+               (WIDTH // 2 - scaled_text.get_width() // 2, 
+                HEIGHT // 2 - 50 - scaled_text.get_height() // 2))
+    
+    # Final score with fade-in
+    if game_over_alpha > 100:
+        final_score_text = text_cache.render(font, f"Final Score: {sim.score}", WHITE)
+        surface.blit(final_score_text, 
+                   (WIDTH // 2 - final_score_text.get_width() // 2, 
+                    HEIGHT // 2))
+    
+    # Restart instruction with pulse
+    if game_over_alpha > 150:
+        pulse = round((math.sin(sim.time * 5) + 1) * 8) / 16  # 16 pulse levels
+        r = max(0, min(255, int(GREEN[0] * pulse + 100)))
+        g = max(0, min(255, int(GREEN[1] * pulse + 100)))
+        b = max(0, min(255, int(GREEN[2] * pulse + 100)))
+        restart_color = (r, g, b)
+        restart_text = text_cache.render(font, "Press R to return to menu", restart_color)
+        surface.blit(restart_text, 
+                   (WIDTH // 2 - restart_text.get_width() // 2, 
+                    HEIGHT // 2 + 50))
 
 # Main loop
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
+    global STAR_COUNT, FONT_NAME, FULLSCREEN, RENDER_SCALE, SMOOTH_SCALING
+    parser = argparse.ArgumentParser(description="COSMIC DODGE")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each subsystem took to start")
+    parser.add_argument("--sim-hz", type=float, default=REFERENCE_FPS,
+                        help="simulation tick rate (default: %(default)s)")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="maximum rendered frames per second, 0 for no limit (default: %(default)s)")
+    parser.add_argument("--threaded", action="store_true",
+                        help="step the simulation on its own thread and report the latency that adds")
+    parser.add_argument("--vsync", action="store_true",
+                        help="let the display's refresh pace full-rate frames")
+    parser.add_argument("--pacing-report", action="store_true",
+                        help="on exit, print how many frames missed their deadline")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="fill the screen, stretching the logical %dx%d picture" % (WIDTH, HEIGHT))
+    parser.add_argument("--render-scale", type=float, default=RENDER_SCALE, metavar="SCALE",
+                        help="draw the game world at SCALE times the logical resolution, "
+                             "e.g. 0.5 on slow machines (default: %(default)s)")
+    parser.add_argument("--smooth-scaling", action="store_true",
+                        help="filter the world when stretching it up to the screen instead of keeping hard pixels")
+    parser.add_argument("--integer-scaling", action="store_true",
+                        help="round --render-scale so world pixels map onto whole screen pixels")
+    parser.add_argument("--stars", type=int, default=STAR_COUNT,
+                        help="number of background stars (default: %(default)s)")
+    parser.add_argument("--font", metavar="NAME",
+                        help="system font for all text; found once, then remembered (default: pygame's own)")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw and upload only the screen regions that change (stars hold still)")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the frame profiler overlay on (F3 toggles, F4 exports)")
+    parser.add_argument("--quality", choices=["auto"] + [tier.name for tier in QUALITY_TIERS], default="auto",
+                        help="detail level, or auto to adapt it to the frame rate (default: %(default)s)")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the built-in bot play back-to-back games, skipping the title screen")
+    parser.add_argument("--level", choices=sorted(DIFFICULTY_PRESETS), default="normal",
+                        help="difficulty of --autopilot games (default: %(default)s)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save every game to DIR as a replay file")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="re-run a replay file headless at full speed, verify it and exit")
+    args = parser.parse_args(argv)
+    
+    if args.fps < 0:
+        parser.error("--fps must be 0 or more")
+    if args.sim_hz <= 0:
+        parser.error("--sim-hz must be positive")
+    if not 0.25 <= args.render_scale <= 4.0:
+        parser.error("--render-scale must be between 0.25 and 4")
+    if args.dirty_rects and args.render_scale != 1.0:
+        parser.error("--dirty-rects redraws parts of the screen itself and needs --render-scale 1")
+    FULLSCREEN = args.fullscreen
+    RENDER_SCALE = integer_scale(args.render_scale) if args.integer_scaling else args.render_scale
+    SMOOTH_SCALING = args.smooth_scaling
+    STAR_COUNT = args.stars
+    FONT_NAME = args.font
+    scheduler.fps = args.fps
+    scheduler.vsync = args.vsync
+    if args.pacing_report:
+        atexit.register(lambda: print(scheduler.report()))
+    
+    if args.replay:
+        try:
+            recording = Recording.load(args.replay)
+        except ValueError as error:
+            parser.error(str(error))
+        result = replay(recording)
+        print(f"{result.ticks} ticks ({result.ticks / recording.sim_hz:.1f}s of play) replayed in "
+              f"{result.seconds:.2f}s, {result.ticks / max(result.seconds, 1e-9):.0f} ticks/s, "
+              f"final score {result.score}")
+        if result.desync_tick is not None:
+            print(f"Desync: state checksum differs from the recording at tick {result.desync_tick}")
+            sys.exit(1)
+        return
+    
+    # Fonts, sounds and static text load while the title screen animates
+    init(audio=False)
+    assets.preload()
+    if args.startup_report:
+        assets.wait()
+        report_startup()
+    
+    # One profiler across games so a capture can span several runs
+    profiler = FrameProfiler(1000 / (args.fps or REFERENCE_FPS))
+    profiler.enabled = args.profile
+    
+    autopilot = Autopilot() if args.autopilot else None
     while True:
-        difficulty: str = start_screen()
-        game(difficulty)
+        difficulty: str = args.level if autopilot is not None else start_screen(args.dirty_rects)
+        game(difficulty, args.sim_hz, args.fps, args.dirty_rects, profiler, args.record, args.quality, autopilot,
+             args.threaded)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,359 @@
+"""Frame-time benchmarks for the COSMIC DODGE update and draw paths.
+
+Runs scripted, seeded scenarios headless and reports milliseconds per
+frame for each phase of the game loop:
+
+    update     Simulation.step, minus the collision checks below
+    collision  near-miss, ball and power-up checks against the player
+    draw       background, stars and the game world (or the whole menu)
+    hud        HUD and game-over overlay
+    present    pygame.display.update
+
+Usage:
+
+    python benchmark.py                      # run everything, compare with the baseline if present
+    python benchmark.py asteroids_500 menu   # run some scenarios
+    python benchmark.py --save-baseline      # record the current numbers as the baseline
+    python benchmark.py --backend null       # record draw commands but rasterize nothing
+    python benchmark.py --render-scale 0.5   # draw the world at half resolution
+
+With the null backend the draw phase only records and counts the world's
+draw commands and the HUD and present phases are skipped, which leaves
+the cost of everything but rasterization. At another render scale the
+draw phase includes stretching the world onto the screen. Neither kind of
+run is compared with the baseline.
+
+Exits with status 1 when a phase got slower than the baseline by more than
+``--threshold``, so it can gate performance work.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pygame
+
+import ball_dodge_game as game
+
+PHASES = ("update", "collision", "draw", "hud", "present")
+PERCENTILES = (50, 95, 99)
+DEFAULT_BASELINE = "benchmark_baseline.json"
+MIN_DELTA_MS = 0.1  # Slowdowns smaller than this are timer noise, not regressions
+
+
+class Timings:
+    """Per-frame milliseconds for every phase."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+        self.frame: Dict[str, float] = {}
+
+    def start_frame(self) -> None:
+        self.frame = {phase: 0.0 for phase in PHASES}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.frame[phase] += seconds * 1000.0
+
+    def end_frame(self) -> None:
+        for phase, ms in self.frame.items():
+            self.samples[phase].append(ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        totals = np.sum([self.samples[phase] for phase in PHASES], axis=0)
+        result: Dict[str, Dict[str, float]] = {}
+        for phase, values in list(self.samples.items()) + [("total", totals.tolist())]:
+            data = np.asarray(values)
+            stats = {"mean": float(data.mean())}
+            for p in PERCENTILES:
+                stats[f"p{p}"] = float(np.percentile(data, p))
+            result[phase] = stats
+        return result
+
+
+def timed(timings: Timings, phase: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``func`` so its run time is booked to ``phase``."""
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings.add(phase, time.perf_counter() - start)
+    return wrapper
+
+
+# Scenarios
+class Scenario(NamedTuple):
+    description: str
+    setup: Callable[[game.Simulation], None]  # Scripts the starting state
+    tick: Callable[[game.Simulation, int], None]  # Runs before every step
+    powerups: Tuple[str, ...] = ()  # Power-ups held active for the whole run
+    autopilot: bool = False  # Steered by the autopilot instead of the scripted sweep
+
+
+def no_op(sim: game.Simulation, frame: int = 0) -> None:
+    pass
+
+
+def fill_asteroids(count: int) -> Scenario:
+    def setup(sim: game.Simulation) -> None:
+        for _ in range(count):
+            i = sim.balls.spawn(random.randint(0, game.WIDTH), 0.5)
+            sim.balls.y[i] = sim.balls.prev_y[i] = random.uniform(0, game.HEIGHT)
+
+    def tick(sim: game.Simulation, frame: int) -> None:
+        # Replace asteroids that fell off the screen or were destroyed
+        for _ in range(count - len(sim.balls)):
+            sim.balls.spawn(random.randint(0, game.WIDTH), 0.5)
+
+    # Invincible so the run never ends; the player destroys what it touches
+    return Scenario(f"{count} asteroids on screen", setup, tick, ("invincible",))
+
+
+def explosion_burst(sim: game.Simulation, frame: int) -> None:
+    # Explosions live 20-40 frames, so a new burst starts as the last one fades
+    if frame % 40 == 0:
+        for _ in range(20):
+            x = game.WIDTH // 2 + random.randint(-60, 60)
+            y = game.HEIGHT // 2 + random.randint(-60, 60)
+            game.create_explosion(sim.explosion_particles, x, y, random.choice(game.BALL_COLORS),
+                                  30, (2, 5), (1, 3))
+
+
+POWERUP_ASTEROIDS = fill_asteroids(100)
+
+
+def all_powerups_tick(sim: game.Simulation, frame: int) -> None:
+    POWERUP_ASTEROIDS.tick(sim, frame)
+    if frame % 30 == 0:
+        sim.powerups.append(game.PowerUp(random.randint(50, game.WIDTH - 50), 0, sim.rng))
+
+
+LATE_GAME_SECONDS = 50  # Normal difficulty is close to its cap by then
+
+
+def late_game(sim: game.Simulation) -> None:
+    # Play the early game headless, so measuring starts with a real late-game screen
+    autopilot = game.Autopilot()
+    for _ in range(LATE_GAME_SECONDS * game.REFERENCE_FPS):
+        sim.step(autopilot.poll(sim))
+
+
+SCENARIOS: Dict[str, Optional[Scenario]] = {
+    "menu": None,  # The title screen, run through Menu instead of Simulation
+    "asteroids_50": fill_asteroids(50),
+    "asteroids_500": fill_asteroids(500),
+    "asteroids_5000": fill_asteroids(5000),
+    "explosions_20": Scenario("20 overlapping explosions every 40 frames", no_op, explosion_burst),
+    "all_powerups": Scenario("All four power-ups active with 100 asteroids", POWERUP_ASTEROIDS.setup,
+                             all_powerups_tick, ("invincible", "slow", "reflect", "speed")),
+    "late_game": Scenario(f"A normal game {LATE_GAME_SECONDS}s in, played by the autopilot", late_game, no_op,
+                          autopilot=True),
+}
+
+
+def player_path(frame: int) -> game.InputState:
+    """Scripted mouse movement sweeping most of the screen."""
+    t = frame / game.REFERENCE_FPS
+    return game.InputState(game.WIDTH / 2 + math.sin(t * 1.3) * game.WIDTH * 0.4,
+                           game.HEIGHT / 2 + math.sin(t * 2.1) * game.HEIGHT * 0.3)
+
+
+def run_menu(screen: pygame.Surface, frames: int, warmup: int, seed: int) -> Timings:
+    timings = Timings()
+    menu = game.Menu(game.Starfield(game.STAR_COUNT, seed=seed))
+    for frame in range(warmup + frames):
+        timings.start_frame()
+        timed(timings, "update", menu.update)(frame / game.REFERENCE_FPS)
+        timed(timings, "draw", menu.draw)(screen)
+        timed(timings, "present", pygame.display.update)()
+        if frame >= warmup:
+            timings.end_frame()
+    return timings
+
+
+def run_game(screen: pygame.Surface, scenario: Scenario, frames: int, warmup: int, seed: int,
+             backend: Optional[game.NullBackend] = None, render_scale: float = 1.0) -> Timings:
+    timings = Timings()
+    sim = game.Simulation("normal", seed=seed)
+    scenario.setup(sim)
+    for name in ("_check_near_misses", "_collide_balls", "_collect_powerups"):
+        setattr(sim, name, timed(timings, "collision", getattr(sim, name)))
+    starfield = game.Starfield(game.STAR_COUNT, seed=seed)
+    hud = game.Hud(game.get_font(36), game.get_font(24))
+    font, large_font = game.get_font(36), game.get_font(72)
+    autopilot = game.Autopilot() if scenario.autopilot else None
+    canvas = game.RenderCanvas(render_scale) if render_scale != 1.0 else None
+    world = canvas.surface if canvas is not None else screen
+
+    for frame in range(warmup + frames):
+        timings.start_frame()
+
+        # The autopilot stands in for the player, so its thinking time is not booked
+        inputs = autopilot.poll(sim) if autopilot is not None else player_path(frame)
+        start = time.perf_counter()
+        scenario.tick(sim, frame)
+        for name in scenario.powerups:
+            sim.active_powerups[name] = {"active": True, "end_time": sim.time + 5}
+        sim.step(inputs)
+        starfield.update()
+        # Collision time was booked separately while step ran
+        timings.add("update", time.perf_counter() - start - timings.frame["collision"] / 1000.0)
+
+        start = time.perf_counter()
+        if backend is not None:
+            game.draw_world(screen, sim, backend=backend)
+            timings.add("draw", time.perf_counter() - start)
+            if frame >= warmup:
+                timings.end_frame()
+            continue
+        world.fill(game.BG_COLOR)
+        starfield.draw(world)
+        game.draw_world(world, sim)
+        if canvas is not None:
+            canvas.present_to(screen)
+        timings.add("draw", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        hud.draw(screen, sim, frame * 0.05)
+        if sim.game_over:
+            game.draw_game_over(screen, sim, font, large_font, 255.0, 1.0)
+        timings.add("hud", time.perf_counter() - start)
+
+        timed(timings, "present", pygame.display.update)()
+        if frame >= warmup:
+            timings.end_frame()
+    return timings
+
+
+def run(name: str, frames: int, warmup: int, seed: int, null: bool = False,
+        render_scale: float = 1.0) -> Dict[str, Dict[str, float]]:
+    # Every scenario starts from the same seeds and cold caches
+    random.seed(seed)
+    game.sprite_atlas.clear()
+    game.text_cache.surfaces.clear()
+    screen = game.init_display()
+    scenario = SCENARIOS[name]
+    if scenario is None:
+        timings = run_menu(screen, frames, warmup, seed)
+    elif null:
+        backend = game.NullBackend()
+        timings = run_game(screen, scenario, frames, warmup, seed, backend)
+        counts = ", ".join(f"{count / backend.frames:.1f} {name}" for name, count in sorted(backend.commands.items()))
+        print(f"\n{name}: per frame {counts or 'no commands'}, {backend.sprites / backend.frames:.1f} sprites")
+    else:
+        timings = run_game(screen, scenario, frames, warmup, seed, render_scale=render_scale)
+    return timings.summary()
+
+
+# Reporting
+def print_results(name: str, results: Dict[str, Dict[str, float]],
+                  baseline: Optional[Dict[str, Dict[str, float]]], flagged: List[str]) -> None:
+    scenario = SCENARIOS[name]
+    print(f"\n{name}: {scenario.description if scenario else 'Title screen'}")
+    header = "  {:<10}{:>9}" + "{:>9}" * len(PERCENTILES) + "{:>12}"
+    print(header.format("phase", "mean", *[f"p{p}" for p in PERCENTILES], "vs base"))
+    for phase, stats in results.items():
+        change = ""
+        if baseline and phase in baseline and baseline[phase]["p50"] > 0:
+            change = f"{(stats['p50'] / baseline[phase]['p50'] - 1) * 100:+.0f}%"
+            if f"{name}.{phase}" in flagged:
+                change += " !"
+        print(header.format(phase, *[f"{stats[key]:.3f}" for key in ["mean"] + [f"p{p}" for p in PERCENTILES]],
+                            change))
+
+
+def regressions(name: str, results: Dict[str, Dict[str, float]],
+                baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Phases whose median frame time grew by more than ``threshold`` over the baseline."""
+    flagged: List[str] = []
+    for phase, stats in results.items():
+        base = baseline.get(phase)
+        if base is None:
+            continue
+        if stats["p50"] > base["p50"] * (1 + threshold) and stats["p50"] - base["p50"] > MIN_DELTA_MS:
+            flagged.append(f"{name}.{phase}")
+    return flagged
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark COSMIC DODGE update and draw paths")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=60,
+                        help="unmeasured frames run first to fill caches (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1234, help="RNG seed (default: %(default)s)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to the baseline file")
+    parser.add_argument("--backend", choices=("pygame", "null"), default="pygame",
+                        help="where the game world is drawn (default: %(default)s)")
+    parser.add_argument("--render-scale", type=float, default=1.0, metavar="SCALE",
+                        help="resolution of the game world relative to the screen (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown of a phase's median before it is flagged (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    null = args.backend == "null"
+    comparable = not null and args.render_scale == 1.0
+    if args.save_baseline and not comparable:
+        parser.error("the baseline is for the pygame backend at render scale 1")
+
+    game.init(audio=False)
+    names = args.scenarios or list(SCENARIOS)
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline) and not args.save_baseline and comparable:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("frames") != args.frames or baseline.get("seed") != args.seed:
+            print(f"note: baseline was recorded with frames={baseline.get('frames')} seed={baseline.get('seed')}")
+
+    all_results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    flagged: List[str] = []
+    for name in names:
+        results = run(name, args.frames, args.warmup, args.seed, null, args.render_scale)
+        all_results[name] = results
+        base = baseline.get("scenarios", {}).get(name)
+        scenario_flagged = regressions(name, results, base, args.threshold) if base else []
+        flagged += scenario_flagged
+        print_results(name, results, base, scenario_flagged)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                saved = json.load(f)
+        else:
+            saved = {}
+        saved.update({
+            "frames": args.frames,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+        })
+        saved.setdefault("scenarios", {}).update(all_results)
+        with open(args.baseline, "w") as f:
+            json.dump(saved, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+    elif flagged:
+        print(f"\nRegressions (median more than {args.threshold:.0%} slower): {', '.join(flagged)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Unattended soak test for COSMIC DODGE.
+
+The autopilot plays back-to-back games through the full update and draw
+path for as long as asked, while frame time and memory are sampled, to
+catch slow drift and leaks that a short benchmark never shows:
+
+    python soak.py --minutes 60                    # an hour at 60 fps
+    python soak.py --minutes 5 --fps 0 --json soak.json
+
+Every ``--interval`` seconds it prints one row: frame work time (excluding
+the frame cap's sleep), resident memory and the sizes of the long-lived
+caches. At the end it fits a line through the per-interval samples and
+reports drift in milliseconds per hour and memory growth in MB per hour.
+With ``--max-drift``/``--max-growth`` it exits with status 1 when either is
+exceeded. ``--trace-heap`` also tracks the Python heap with tracemalloc and
+lists the allocation sites that grew; it slows every frame down, so leave
+it off when drift is what matters.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pygame
+
+import ball_dodge_game as game
+
+TOP_GROWTH = 10  # Allocation sites listed with --trace-heap
+
+
+class Sample(NamedTuple):
+    minutes: float  # Wall-clock time since the soak started
+    frames: int
+    games: int  # Games finished so far
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    rss_mb: float
+    heap_mb: float  # Python allocations traced by tracemalloc, 0 when not tracing
+    sprites: int
+    texts: int
+    particles: int
+
+
+def rss_mb() -> float:
+    """Resident memory of this process now, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux, bytes on macOS
+
+
+def take_sample(start: float, frames: int, games: int, frame_ms: List[float], sim: game.Simulation) -> Sample:
+    data = np.asarray(frame_ms)
+    p50, p95, p99 = np.percentile(data, (50, 95, 99))
+    return Sample((time.perf_counter() - start) / 60, frames, games, float(p50), float(p95), float(p99),
+                  float(data.max()), rss_mb(), tracemalloc.get_traced_memory()[0] / 2 ** 20,
+                  len(game.sprite_atlas.sprites), len(game.text_cache.surfaces),
+                  sim.trail_particles.count + sim.explosion_particles.count)
+
+
+def print_sample(sample: Sample) -> None:
+    print(f"{sample.minutes:7.1f} {sample.frames:9d} {sample.games:6d} {sample.p50_ms:7.2f} {sample.p95_ms:7.2f} "
+          f"{sample.p99_ms:7.2f} {sample.max_ms:7.2f} {sample.rss_mb:8.1f} {sample.heap_mb:8.1f} "
+          f"{sample.sprites:8d} {sample.texts:6d} {sample.particles:9d}")
+
+
+def per_hour(samples: List[Sample], field: str) -> float:
+    """Slope of a least-squares line through ``field``, in units per hour."""
+    if len(samples) < 2:
+        return 0.0
+    minutes = [sample.minutes for sample in samples]
+    values = [getattr(sample, field) for sample in samples]
+    return float(np.polyfit(minutes, values, 1)[0] * 60)
+
+
+def soak(minutes: float, interval: float, fps: int, level: str, quality: str,
+         seed: int) -> Tuple[List[Sample], Optional[tracemalloc.Snapshot]]:
+    """Play until ``minutes`` are up; returns the samples and, when tracing, the heap after the first one."""
+    screen = game.init_display()
+    starfield = game.get_starfield()
+    font, small_font, large_font = game.get_font(36), game.get_font(24), game.get_font(72)
+    hud = game.Hud(font, small_font)
+    autopilot = game.Autopilot()
+    clock = pygame.time.Clock()
+    quality_level = [tier.name for tier in game.QUALITY_TIERS].index(quality)
+
+    def new_game(games: int) -> game.Simulation:
+        sim = game.Simulation(level, seed + games)
+        sim.set_quality(quality_level)
+        return sim
+
+    samples: List[Sample] = []
+    settled: Optional[tracemalloc.Snapshot] = None
+    frame_ms: List[float] = []
+    frames = games = 0
+    sim = new_game(games)
+    start = next_sample = time.perf_counter()
+    next_sample += interval
+    end = start + minutes * 60
+    print(" minutes    frames  games     p50     p95     p99     max   rss MB  heap MB  sprites  texts  particles")
+
+    while True:
+        frame_start = time.perf_counter()
+        pygame.event.pump()
+        if autopilot.restart(sim):
+            games += 1
+            sim = new_game(games)
+        sim.step(autopilot.poll(sim))
+        starfield.update()
+        screen.fill(game.BG_COLOR)
+        starfield.draw(screen, sim.quality.star_depths)
+        game.draw_world(screen, sim)
+        hud.draw(screen, sim, frames * 0.05)
+        if sim.game_over:
+            game.draw_game_over(screen, sim, font, large_font, 255.0, 1.0)
+        pygame.display.update()
+        now = time.perf_counter()
+        frame_ms.append((now - frame_start) * 1000.0)
+        frames += 1
+
+        if now >= next_sample or now >= end:
+            samples.append(take_sample(start, frames, games, frame_ms, sim))
+            print_sample(samples[-1])
+            frame_ms = []
+            next_sample += interval
+            if len(samples) == 1 and tracemalloc.is_tracing():
+                settled = tracemalloc.take_snapshot()
+            if now >= end:
+                return samples, settled
+        if fps:
+            clock.tick(fps)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Soak-test COSMIC DODGE with the autopilot playing")
+    parser.add_argument("--minutes", type=float, default=60.0, help="how long to run (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=60.0,
+                        help="seconds between samples (default: %(default)s)")
+    parser.add_argument("--fps", type=int, default=60, help="frame cap, 0 for none (default: %(default)s)")
+    parser.add_argument("--level", choices=sorted(game.DIFFICULTY_PRESETS), default="hard",
+                        help="difficulty of the games (default: %(default)s)")
+    parser.add_argument("--quality", choices=[tier.name for tier in game.QUALITY_TIERS], default="high",
+                        help="fixed detail level, so the governor cannot hide drift (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first game (default: %(default)s)")
+    parser.add_argument("--max-drift", type=float, metavar="MS",
+                        help="fail if median frame time grows by more than MS per hour")
+    parser.add_argument("--max-growth", type=float, metavar="MB",
+                        help="fail if resident memory grows by more than MB per hour")
+    parser.add_argument("--trace-heap", action="store_true",
+                        help="track Python allocations and list the sites that grew (slow)")
+    parser.add_argument("--json", metavar="FILE", help="also write the samples and summary to FILE")
+    args = parser.parse_args(argv)
+
+    if args.minutes <= 0 or args.interval <= 0:
+        parser.error("--minutes and --interval must be positive")
+
+    game.init(audio=False)
+    if args.trace_heap:
+        tracemalloc.start()
+    samples, settled = soak(args.minutes, args.interval, args.fps, args.level, args.quality, args.seed)
+
+    # The first interval fills the caches, so drift and growth are measured after it
+    steady = samples[1:] if len(samples) > 2 else samples
+    drift = per_hour(steady, "p50_ms")
+    growth = per_hour(steady, "rss_mb")
+    heap_growth = per_hour(steady, "heap_mb")
+    print(f"\nFrame time drift: {drift:+.2f} ms/hour (median)")
+    print(f"Memory growth: {growth:+.1f} MB/hour resident", end="")
+    print(f", {heap_growth:+.1f} MB/hour Python heap" if args.trace_heap else "")
+    if settled is not None:
+        print("Allocation sites that grew most since the first sample:")
+        for stat in tracemalloc.take_snapshot().compare_to(settled, "lineno")[:TOP_GROWTH]:
+            print(f"  {stat}")
+
+    if args.json:
+        summary: Dict[str, Any] = {
+            "minutes": args.minutes,
+            "fps": args.fps,
+            "level": args.level,
+            "quality": args.quality,
+            "seed": args.seed,
+            "drift_ms_per_hour": drift,
+            "rss_mb_per_hour": growth,
+            "heap_mb_per_hour": heap_growth if args.trace_heap else None,
+            "samples": [sample._asdict() for sample in samples],
+        }
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = []
+    if args.max_drift is not None and drift > args.max_drift:
+        failed.append(f"frame time drift {drift:.2f} ms/hour > {args.max_drift}")
+    if args.max_growth is not None and growth > args.max_growth:
+        failed.append(f"memory growth {growth:.1f} MB/hour > {args.max_growth}")
+    if failed:
+        print(f"\nFailed: {'; '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
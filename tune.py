@@ -0,0 +1,212 @@
+"""Difficulty tuning harness for COSMIC DODGE.
+
+Plays many seeded games headless with the autopilot or a scripted player,
+spread over a process pool, and reports survival time and score
+distributions for every combination of difficulty parameters asked for:
+
+    python tune.py                                    # the normal preset, 100 games
+    python tune.py --level hard --games 500           # the hard preset
+    python tune.py --set multiplier=1.0,1.25,1.5 --set homing_threshold=0.3,0.5
+
+``--set`` takes any field of ``DifficultyParams``; every combination of the
+values given is played, starting from the ``--level`` preset. Every parameter
+set plays the same seeds, so differences between sets come from the
+parameters rather than from luck.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import itertools
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import ball_dodge_game as game
+
+PERCENTILES = (10, 50, 90)
+
+
+# Players
+class Sweep(game.InputProvider):
+    """Scripted mouse movement sweeping most of the screen, ignoring the asteroids."""
+
+    def poll(self, sim: game.Simulation) -> game.InputState:
+        t = sim.time
+        return game.InputState(int(game.WIDTH / 2 + math.sin(t * 1.3) * game.WIDTH * 0.4),
+                               int(game.HEIGHT / 2 + math.sin(t * 2.1) * game.HEIGHT * 0.3))
+
+
+PLAYERS: Dict[str, Callable[[], game.InputProvider]] = {
+    "autopilot": game.Autopilot,
+    "sweep": Sweep,
+}
+
+
+# Trials
+class Trial(NamedTuple):
+    params: game.DifficultyParams
+    level: str
+    seed: int
+    player: str
+    max_seconds: float
+    sim_hz: float
+
+
+class Result(NamedTuple):
+    seconds: float  # Game time survived
+    score: int
+    reached_limit: bool  # Still alive after max_seconds
+
+
+def play(trial: Trial) -> Result:
+    """Play one game to the end, or to ``max_seconds``."""
+    sim = game.Simulation(trial.level, trial.seed, trial.params, trial.sim_hz)
+    # Particles never touch the gameplay, so keep as few of them as possible
+    sim.set_quality(len(game.QUALITY_TIERS) - 1)
+    player = PLAYERS[trial.player]()
+    for _ in range(int(trial.max_seconds * trial.sim_hz)):
+        sim.step(player.poll(sim))
+        if sim.game_over:
+            break
+    return Result(sim.time, sim.score, not sim.game_over)
+
+
+def parameter_grid(base: game.DifficultyParams, settings: List[str]) -> List[game.DifficultyParams]:
+    """Every combination of the ``name=v1,v2,...`` settings applied to ``base``."""
+    axes: Dict[str, List[Any]] = {}
+    for setting in settings:
+        name, sep, values = setting.partition("=")
+        if not sep or name not in game.DifficultyParams._fields:
+            raise ValueError(f"expected NAME=V1,V2,... with NAME one of {', '.join(game.DifficultyParams._fields)}, "
+                             f"got {setting!r}")
+        kind = game.DifficultyParams.__annotations__[name]  # Not the preset's value, which may be written as an int
+        try:
+            axes[name] = [kind(value) for value in values.split(",")]
+        except ValueError:
+            raise ValueError(f"{name} takes {kind.__name__} values, got {values!r}") from None
+    grid = [base._replace(**dict(zip(axes, combo))) for combo in itertools.product(*axes.values())]
+    for params in grid:
+        check_params(params)
+    return grid
+
+
+# Lower bounds the simulation needs, so a bad sweep point fails before any game is played
+PARAM_MINIMUMS: Dict[str, Tuple[float, bool]] = {  # Name: (bound, whether the bound itself is allowed)
+    "multiplier": (0, True),
+    "ramp_time": (0, False),
+    "spawn_frames": (1, True),
+    "min_spawn_frames": (1, True),
+    "near_misses_per_step": (1, True),
+}
+
+
+def check_params(params: game.DifficultyParams) -> None:
+    """Raise ValueError for parameters the simulation cannot play with."""
+    for name, (bound, inclusive) in PARAM_MINIMUMS.items():
+        value = getattr(params, name)
+        if value < bound or (value == bound and not inclusive):
+            raise ValueError(f"{name} must be {'at least' if inclusive else 'more than'} {bound}, got {value}")
+
+
+def describe(params: game.DifficultyParams, base: game.DifficultyParams) -> str:
+    changed = [f"{name}={value}" for name, value in params._asdict().items() if value != getattr(base, name)]
+    return " ".join(changed) or "preset"
+
+
+def summarize(results: List[Result]) -> Dict[str, Any]:
+    survival = np.array([result.seconds for result in results])
+    scores = np.array([result.score for result in results])
+    summary: Dict[str, Any] = {
+        "games": len(results),
+        # Fraction still alive at the time limit
+        "survived": float(np.mean([result.reached_limit for result in results])),
+    }
+    for name, data in (("survival", survival), ("score", scores)):
+        stats = {"mean": float(data.mean())}
+        for p in PERCENTILES:
+            stats[f"p{p}"] = float(np.percentile(data, p))
+        summary[name] = stats
+    return summary
+
+
+def print_results(rows: List[Tuple[str, Dict[str, Any]]]) -> None:
+    width = max(len("parameters"), *(len(label) for label, _ in rows))
+    columns = ["mean"] + [f"p{p}" for p in PERCENTILES]
+    header = " ".join(f"{'s ' + column:>8}" for column in columns) + "  " + \
+        " ".join(f"{'pts ' + column:>9}" for column in columns)
+    print(f"{'parameters':<{width}}  {header}  survived")
+    for label, summary in rows:
+        survival = " ".join(f"{summary['survival'][column]:8.1f}" for column in columns)
+        score = " ".join(f"{summary['score'][column]:9.0f}" for column in columns)
+        print(f"{label:<{width}}  {survival}  {score}  {summary['survived']:8.0%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tune COSMIC DODGE difficulty with headless bot games")
+    parser.add_argument("--level", choices=sorted(game.DIFFICULTY_PRESETS), default="normal",
+                        help="preset the parameters start from (default: %(default)s)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2",
+                        help="parameter values to sweep; repeat for a grid")
+    parser.add_argument("--games", type=int, default=100, help="games per parameter set (default: %(default)s)")
+    parser.add_argument("--player", choices=sorted(PLAYERS), default="autopilot",
+                        help="who plays the games (default: %(default)s)")
+    parser.add_argument("--max-seconds", type=float, default=180.0,
+                        help="game time after which a game counts as survived (default: %(default)s)")
+    parser.add_argument("--sim-hz", type=float, default=game.REFERENCE_FPS,
+                        help="simulation ticks per second (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first game (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core, %(default)s)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args(argv)
+
+    if args.games < 1 or args.jobs < 1:
+        parser.error("--games and --jobs must be at least 1")
+    if args.sim_hz <= 0:
+        parser.error("--sim-hz must be positive")
+    base = game.DIFFICULTY_PRESETS[args.level]
+    try:
+        grid = parameter_grid(base, args.set)
+    except ValueError as e:
+        parser.error(str(e))
+
+    trials = [Trial(params, args.level, args.seed + i, args.player, args.max_seconds, args.sim_hz)
+              for params in grid for i in range(args.games)]
+    print(f"Playing {len(trials)} games ({len(grid)} parameter sets x {args.games}) on {args.jobs} processes...",
+          file=sys.stderr)
+    start = time.perf_counter()
+    # Chunks keep the pool's per-task overhead small next to games that take a second or two
+    chunksize = max(1, len(trials) // (args.jobs * 8))
+    with ProcessPoolExecutor(args.jobs) as executor:
+        results = list(executor.map(play, trials, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.1f}s ({len(trials) / elapsed:.1f} games/s)\n", file=sys.stderr)
+
+    rows = [(describe(params, base), summarize(results[i * args.games:(i + 1) * args.games]))
+            for i, params in enumerate(grid)]
+    print_results(rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "level": args.level,
+                "player": args.player,
+                "games": args.games,
+                "max_seconds": args.max_seconds,
+                "sim_hz": args.sim_hz,
+                "seed": args.seed,
+                "results": [dict(summary, params=params._asdict()) for params, (_, summary) in zip(grid, rows)],
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())